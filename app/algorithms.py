@@ -1,190 +1,385 @@
 # backend/app/algorithms.py
 import heapq, math, time
-from typing import List, Dict, Tuple, Any
-from .models import Edge, Node
-
-# helpers
-def build_adj(nodes: List[Node], edges: List[Edge], directed=False):
-    adj = {n.id: [] for n in nodes}
-    for e in edges:
-        adj[e.source].append((e.target, e.weight))
-        if not directed:
-            adj[e.target].append((e.source, e.weight))
-    return adj
+from collections import deque
+from typing import List, Dict, Any
+import numpy as np
+from .bellman import bellman_ford_tree
+from .connectivity import connectivity
+from .graph import CompiledGraph, compile_graph, reconstruct
+from .metrics import PhaseTimer
+from .trace import FORMATS, POP, POP_F, VISIT, Trace
+
+def _finish(graph: CompiledGraph, prev, s, t, trace, distance=None, **counters):
+    """Reconstruct the path (timed separately from the search) and store the search counters.
+    ``distance`` is the target's distance when the search computed it."""
+    t0 = time.perf_counter_ns()
+    path = graph.labels(reconstruct(prev, s, t))
+    trace.count(reconstruct_ns=time.perf_counter_ns() - t0, **counters)
+    return path, (distance if path else None), trace
 
 # BFS (unweighted shortest path)
-def bfs(nodes, edges, source, target, options):
-    adj = build_adj(nodes, edges, directed=options.get("directed", False))
-    from collections import deque
-    q = deque([(source, [source])])
-    visited=set([source])
-    steps=[]
+def bfs(graph: CompiledGraph, source, target, options, trace=None):
+    offsets, targets, _ = graph.csr(options.get("directed", False)).lists()
+    trace = trace or Trace(graph.ids)
+    record = trace.record
+    s, t = graph.index.get(source), graph.index.get(target)
+    if s is None or t is None:
+        return [], None, trace
+    prev = [-1]*graph.n
+    visited = [False]*graph.n
+    visited[s] = True
+    q = deque([s])
+    scanned = pushes = 0
     while q:
-        v, path = q.popleft()
-        steps.append({"visit": v})
-        if v==target: return path, steps
-        for nb,_ in adj.get(v,[]):
-            if nb not in visited:
-                visited.add(nb)
-                q.append((nb, path+[nb]))
-    return [], steps
+        u = q.popleft()
+        record(VISIT, u)
+        if u==t:
+            break
+        scanned += offsets[u+1] - offsets[u]
+        for k in range(offsets[u], offsets[u+1]):
+            v = targets[k]
+            if not visited[v]:
+                visited[v] = True
+                prev[v] = u
+                q.append(v)
+                pushes += 1
+    return _finish(graph, prev, s, t, trace, settled=trace.total, scanned=scanned, pushes=pushes)
 
 # Dijkstra
-def dijkstra(nodes, edges, source, target, options):
-    adj = build_adj(nodes, edges, directed=options.get("directed", False))
-    dist = {n.id: math.inf for n in nodes}
-    prev = {n.id: None for n in nodes}
-    dist[source]=0
-    pq=[(0, source)]
-    steps=[]
+def dijkstra(graph: CompiledGraph, source, target, options, trace=None):
+    offsets, targets, weights = graph.csr(options.get("directed", False)).lists()
+    trace = trace or Trace(graph.ids)
+    record = trace.record
+    s, t = graph.index.get(source), graph.index.get(target)
+    if s is None or t is None:
+        return [], None, trace
+    dist = [math.inf]*graph.n
+    prev = [-1]*graph.n
+    dist[s]=0
+    pq=[(0, s)]
+    scanned = pushes = 0
     while pq:
         d,u = heapq.heappop(pq)
         if d>dist[u]: continue
-        steps.append({"pop": u, "dist": d})
-        if u==target:
+        record(POP, u, d)
+        if u==t:
             break
-        for v,w in adj.get(u,[]):
-            nd = d + w
+        scanned += offsets[u+1] - offsets[u]
+        for k in range(offsets[u], offsets[u+1]):
+            v = targets[k]
+            nd = d + weights[k]
             if nd < dist[v]:
                 dist[v]=nd
                 prev[v]=u
                 heapq.heappush(pq,(nd,v))
-    # reconstruct
-    path=[]
-    cur=target
-    while cur is not None:
-        path.insert(0, cur)
-        cur = prev[cur]
-    if path and path[0]==source:
-        return path, steps
-    return [], steps
-
-# Bellman-Ford
-def bellman_ford(nodes, edges, source, target, options):
-    ids=[n.id for n in nodes]
-    dist = {i: math.inf for i in ids}
-    prev = {i: None for i in ids}
-    dist[source]=0
-    steps=[]
-    # relax
-    for _ in range(len(ids)-1):
-        changed=False
-        for e in edges:
-            if dist[e.source] + e.weight < dist[e.target]:
-                dist[e.target] = dist[e.source] + e.weight
-                prev[e.target] = e.source
-                changed=True
-                steps.append({"update": e.target, "dist": dist[e.target]})
-            if dist[e.target] + e.weight < dist[e.source]:
-                dist[e.source] = dist[e.target] + e.weight
-                prev[e.source] = e.target
-                changed=True
-                steps.append({"update": e.source, "dist": dist[e.source]})
-        if not changed:
-            break
-    path=[]
-    cur=target
-    while cur is not None:
-        path.insert(0,cur)
-        cur=prev[cur]
-    if path and path[0]==source:
-        return path, steps
-    return [], steps
+                pushes += 1
+    return _finish(graph, prev, s, t, trace, dist[t], settled=trace.total, scanned=scanned, pushes=pushes)
+
+# Full shortest-path trees (no target), shared by the all-pairs and batch engines
+def dijkstra_tree(graph: CompiledGraph, s: int, directed=False, weights=None, reverse=False, stop_at=None):
+    """Settle every node reachable from ``s``; returns (dist, prev, settled order).
+
+    ``weights`` optionally overrides the CSR weights (same order as ``targets``);
+    ``reverse`` searches the in-edges, giving distances *to* ``s``. With
+    ``stop_at`` the search ends once all of those nodes are settled, and only
+    their entries (and the paths to them) are final.
+    """
+    csr = graph.reverse_csr(directed) if reverse else graph.csr(directed)
+    offsets, targets, csr_weights = csr.lists()
+    if weights is None:
+        weights = csr_weights
+    dist = [math.inf]*graph.n
+    prev = [-1]*graph.n
+    dist[s]=0
+    pq=[(0, s)]
+    order=[]
+    pending = set(stop_at) if stop_at is not None else None
+    while pq:
+        d,u = heapq.heappop(pq)
+        if d>dist[u]: continue
+        order.append(u)
+        if pending is not None:
+            pending.discard(u)
+            if not pending: break
+        for k in range(offsets[u], offsets[u+1]):
+            v = targets[k]
+            nd = d + weights[k]
+            if nd < dist[v]:
+                dist[v]=nd
+                prev[v]=u
+                heapq.heappush(pq,(nd,v))
+    return dist, prev, order
+
+def bfs_tree(graph: CompiledGraph, s: int, directed=False, stop_at=None):
+    """Hop-count counterpart of :func:`dijkstra_tree`."""
+    offsets, targets, _ = graph.csr(directed).lists()
+    dist = [math.inf]*graph.n
+    prev = [-1]*graph.n
+    dist[s]=0
+    order=[s]
+    pending = set(stop_at) - {s} if stop_at is not None else None
+    for u in order:
+        if pending is not None and not pending: break
+        du = dist[u] + 1
+        for k in range(offsets[u], offsets[u+1]):
+            v = targets[k]
+            if dist[v] == math.inf:
+                dist[v]=du
+                prev[v]=u
+                order.append(v)
+                if pending is not None: pending.discard(v)
+    return dist, prev, order
+
+# Bellman-Ford (SPFA or vectorized passes, see bellman.py)
+def bellman_ford(graph: CompiledGraph, source, target, options, trace=None):
+    trace = trace or Trace(graph.ids)
+    s, t = graph.index.get(source), graph.index.get(target)
+    if s is None or t is None:
+        return [], None, trace
+    dist, prev, counters = bellman_ford_tree(graph, s, options.get("directed", False),
+                                             options.get("bellman_method", "auto"), trace)
+    return _finish(graph, prev, s, t, trace, dist[t], **counters)
 
 # A* (with optional coordinate heuristic if nodes have x,y)
-def a_star(nodes, edges, source, target, options):
-    adj = build_adj(nodes, edges, directed=options.get("directed", False))
-    coords = {n.id: (n.x or 0, n.y or 0) for n in nodes}
-    def h(a,b):
-        (ax,ay) = coords.get(a,(0,0))
-        (bx,by) = coords.get(b,(0,0))
-        return math.hypot(ax-bx, ay-by)
-    g={n.id: math.inf for n in nodes}
-    g[source]=0
-    pq=[(h(source,target), source)]
-    prev={n.id: None for n in nodes}
-    steps=[]
+def a_star(graph: CompiledGraph, source, target, options, trace=None):
+    trace = trace or Trace(graph.ids)
+    s, t = graph.index.get(source), graph.index.get(target)
+    if s is None or t is None:
+        return [], None, trace
+    xs = np.nan_to_num(graph.x)
+    ys = np.nan_to_num(graph.y)
+    h = np.hypot(xs - xs[t], ys - ys[t]).tolist()
+    return _a_star(graph, s, t, h, options.get("directed", False), trace)
+
+# ALT: A* with landmark lower bounds (admissible for any non-negative weights)
+def alt(graph: CompiledGraph, source, target, options, trace=None):
+    from .landmarks import DEFAULT_LANDMARKS, landmark_suffix, landmarks_for
+    from .storage import artifact_path
+    trace = trace or Trace(graph.ids)
+    s, t = graph.index.get(source), graph.index.get(target)
+    if s is None or t is None:
+        return [], None, trace
+    directed = options.get("directed", False)
+    tid = options.get("topology_id")
+    path = artifact_path(tid, landmark_suffix(directed)) if tid else None
+    table = landmarks_for(graph, directed, int(options.get("landmarks", DEFAULT_LANDMARKS)), path=path)
+    return _a_star(graph, s, t, table.heuristic(t), directed, trace)
+
+def _a_star(graph: CompiledGraph, s, t, h, directed, trace):
+    offsets, targets, weights = graph.csr(directed).lists()
+    record = trace.record
+    g = [math.inf]*graph.n
+    g[s]=0
+    pq=[(h[s], s)]
+    prev = [-1]*graph.n
+    if h[s] == math.inf:
+        return [], None, trace
+    scanned = pushes = 0
     while pq:
         f,u = heapq.heappop(pq)
-        steps.append({"pop":u,"f":f})
-        if u==target:
+        if f > g[u] + h[u]: continue
+        record(POP_F, u, f)
+        if u==t:
             break
-        for v,w in adj.get(u,[]):
-            tentative = g[u] + w
-            if tentative < g[v]:
+        scanned += offsets[u+1] - offsets[u]
+        for k in range(offsets[u], offsets[u+1]):
+            v = targets[k]
+            tentative = g[u] + weights[k]
+            if tentative < g[v] and h[v] != math.inf:
                 g[v]=tentative
                 prev[v]=u
-                heapq.heappush(pq,(tentative + h(v,target), v))
-    path=[]
-    cur=target
-    while cur is not None:
-        path.insert(0,cur)
-        cur=prev[cur]
-    if path and path[0]==source:
-        return path, steps
-    return [], steps
-
-# Floyd-Warshall
-def floyd_warshall(nodes, edges, source, target, options):
-    ids=[n.id for n in nodes]
-    dist = {i: {j: math.inf for j in ids} for i in ids}
-    nextn = {i: {j: None for j in ids} for i in ids}
-    for i in ids: dist[i][i]=0
-    for e in edges:
-        dist[e.source][e.target]=e.weight
-        dist[e.target][e.source]=e.weight
-        nextn[e.source][e.target]=e.target
-        nextn[e.target][e.source]=e.source
-    for k in ids:
-        for i in ids:
-            for j in ids:
-                if dist[i][k] + dist[k][j] < dist[i][j]:
-                    dist[i][j] = dist[i][k] + dist[k][j]
-                    nextn[i][j] = nextn[i][k]
-    if nextn[source][target] is None:
-        return [], []
-    path=[source]
-    u=source
-    while u!=target:
-        u = nextn[u][target]
-        path.append(u)
-    return path, []
+                heapq.heappush(pq,(tentative + h[v], v))
+                pushes += 1
+    return _finish(graph, prev, s, t, trace, g[t], settled=trace.total, scanned=scanned, pushes=pushes)
+
+# Bidirectional Dijkstra: alternate forward/backward searches until the frontiers meet
+def bidirectional_dijkstra(graph: CompiledGraph, source, target, options, trace=None):
+    directed = options.get("directed", False)
+    trace = trace or Trace(graph.ids)
+    record = trace.record
+    s, t = graph.index.get(source), graph.index.get(target)
+    if s is None or t is None:
+        return [], None, trace
+    trace.sided = True
+    if s == t:
+        record(POP, s, 0, 0)
+        return [source], 0.0, trace
+    adj = (graph.csr(directed).lists(), graph.reverse_csr(directed).lists())
+    dist = ([math.inf]*graph.n, [math.inf]*graph.n)
+    prev = ([-1]*graph.n, [-1]*graph.n)
+    dist[0][s]=0
+    dist[1][t]=0
+    pqs = ([(0, s)], [(0, t)])
+    best, meet = math.inf, -1
+    scanned = pushes = 0
+    while pqs[0] and pqs[1]:
+        if pqs[0][0][0] + pqs[1][0][0] >= best:
+            break
+        side = 0 if len(pqs[0]) <= len(pqs[1]) else 1
+        d,u = heapq.heappop(pqs[side])
+        mine, other = dist[side], dist[1-side]
+        if d>mine[u]: continue
+        record(POP, u, d, side)
+        offsets, targets, weights = adj[side]
+        scanned += offsets[u+1] - offsets[u]
+        for k in range(offsets[u], offsets[u+1]):
+            v = targets[k]
+            nd = d + weights[k]
+            if nd < mine[v]:
+                mine[v]=nd
+                prev[side][v]=u
+                heapq.heappush(pqs[side],(nd,v))
+                pushes += 1
+            if mine[v] + other[v] < best:
+                best, meet = mine[v] + other[v], v
+    t0 = time.perf_counter_ns()
+    path = []
+    if meet != -1:
+        path = reconstruct(prev[0], s, meet)
+        u = prev[1][meet]
+        while u != -1:
+            path.append(u)
+            u = prev[1][u]
+    trace.count(reconstruct_ns=time.perf_counter_ns() - t0, settled=trace.total, scanned=scanned, pushes=pushes)
+    return graph.labels(path), (best if path else None), trace
+
+# Contraction hierarchy query; plain Dijkstra when no fresh hierarchy is stored
+def ch_query(graph: CompiledGraph, source, target, options, trace=None):
+    from .contraction import ch_suffix, hierarchy_for
+    from .storage import artifact_path
+    trace = trace or Trace(graph.ids)
+    s, t = graph.index.get(source), graph.index.get(target)
+    if s is None or t is None:
+        return [], None, trace
+    directed = options.get("directed", False)
+    tid = options.get("topology_id")
+    ch = hierarchy_for(graph, directed, artifact_path(tid, ch_suffix(directed))) if tid else None
+    if ch is None:
+        return dijkstra(graph, source, target, options, trace)
+    path, dist, settled = ch.query(s, t)
+    trace.note(hierarchy=True, settled=settled, dist=None if dist == math.inf else dist)
+    trace.count(settled=settled)
+    return graph.labels(path), (dist if path else None), trace
+
+# Floyd-Warshall (served from the cached all-pairs tables)
+def floyd_warshall(graph: CompiledGraph, source, target, options, trace=None):
+    from .allpairs import all_pairs
+    trace = trace or Trace(graph.ids)
+    s, t = graph.index.get(source), graph.index.get(target)
+    if s is None or t is None:
+        return [], None, trace
+    ap = all_pairs(graph, directed=options.get("directed", False), method="floyd-warshall")
+    path = ap.path(s, t)
+    return graph.labels(path), (ap.distance(s, t) if path else None), trace
 
 # runner
-def run_algorithm(nodes, edges, algorithm, source, target, options):
-    t0=time.time()
+PATH_METRICS = ("distance", "hops", "hop_weights", "max_hop_weight", "min_hop_weight")
+DEFAULT_PATH_METRICS = ("distance", "hops")
+
+def path_metrics(graph: CompiledGraph, path: List[str], distance, directed=False, wanted=DEFAULT_PATH_METRICS):
+    """Requested path metrics. ``distance`` is the search's own result, if any; everything
+    else comes from one vectorized lookup of the hops in the graph's edge index."""
+    if not isinstance(wanted, (list, tuple)):
+        raise ValueError("metrics must be a list of metric names")
+    unknown = [m for m in wanted if m not in PATH_METRICS]
+    if unknown:
+        raise ValueError(f"unknown path metrics {unknown}; expected any of {', '.join(PATH_METRICS)}")
+    out: Dict[str, Any] = {}
+    if "hops" in wanted:
+        out["hops"] = max(0, len(path)-1)
+    per_hop = [m for m in wanted if m not in ("hops", "distance")]
+    if "distance" in wanted and (distance is not None or not path):
+        out["distance"] = None if distance is None else float(distance)
+    elif "distance" in wanted:
+        per_hop.append("distance")
+    if not per_hop:
+        return {m: out[m] for m in wanted}
+    w = graph.path_weights([graph.index[v] for v in path], directed) if path else np.empty(0)
+    valid = bool(path) and not np.isnan(w).any()
+    for m in per_hop:
+        if not valid:
+            out[m] = None
+        elif m == "distance":
+            out[m] = float(w.sum())
+        elif m == "hop_weights":
+            out[m] = w.tolist()
+        elif w.size:
+            out[m] = float(w.max() if m == "max_hop_weight" else w.min())
+        else:
+            out[m] = None
+    return {m: out[m] for m in wanted}
+
+def _unreachable(graph: CompiledGraph, name, source, target, directed):
+    """True when the connectivity index rules out any path, so the search can be skipped.
+    With negative weights Bellman-Ford and Floyd-Warshall still run: they must report negative cycles."""
+    s, t = graph.index.get(source), graph.index.get(target)
+    if s is None or t is None:
+        return False
+    if name in ("bellman-ford", "floyd-warshall") and graph.m and float(graph.weights.min()) < 0:
+        return False
+    return not connectivity(graph, directed).may_reach(s, t)
+
+def run_algorithm(nodes, edges, algorithm, source, target, options, graph=None, sink=None):
+    """Run one search, on ``graph`` when given (``nodes``/``edges`` are then unused).
+    ``options["trace"]`` picks the trace mode; with ``sink`` the trace is streamed
+    to it in chunks instead of returned. ``options["metrics"]`` picks the path
+    metrics (see PATH_METRICS); ``metrics`` also carries per-phase milliseconds
+    and the search's work counters."""
+    t0 = time.perf_counter_ns()
+    timer = PhaseTimer()
+    with timer("build"):
+        if graph is None:
+            graph = compile_graph(nodes, edges)
+    trace = Trace.from_options(graph.ids, options, sink)
+    fmt = options.get("trace_format", "objects")
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown trace format {fmt!r}; expected one of {', '.join(FORMATS)}")
     alg = algorithm.strip().lower()
     if alg in ("bfs", "breadth-first", "breadthfirst"):
-        path, steps = bfs(nodes, edges, source, target, options)
+        name, search = "bfs", bfs
     elif alg in ("dijkstra",):
-        path, steps = dijkstra(nodes, edges, source, target, options)
+        name, search = "dijkstra", dijkstra
     elif alg in ("bellman-ford","bellmanford","bellman"):
-        path, steps = bellman_ford(nodes, edges, source, target, options)
+        name, search = "bellman-ford", bellman_ford
     elif alg in ("a*","astar","a-star"):
-        path, steps = a_star(nodes, edges, source, target, options)
+        name, search = "a*", a_star
     elif alg in ("floyd","floyd-warshall","floydwarshall"):
-        path, steps = floyd_warshall(nodes, edges, source, target, options)
+        name, search = "floyd-warshall", floyd_warshall
+    elif alg in ("bidirectional","bidirectional-dijkstra","bidijkstra"):
+        name, search = "bidirectional", bidirectional_dijkstra
+    elif alg in ("alt","a*-landmarks","astar-landmarks"):
+        name, search = "alt", alt
+    elif alg in ("ch","contraction-hierarchy","contraction-hierarchies"):
+        name, search = "ch", ch_query
     else:
         # default to dijkstra
-        path, steps = dijkstra(nodes, edges, source, target, options)
-    t1=time.time()
+        name, search = "dijkstra", dijkstra
+    with timer("search"):
+        if _unreachable(graph, name, source, target, options.get("directed", False)):
+            path, distance = [], None
+            trace.count(unreachable=1)
+        else:
+            path, distance, trace = search(graph, source, target, options, trace)
+        trace.flush()
+    # _finish timed the reconstruction inside the search
+    reconstruct_ns = trace.counters.pop("reconstruct_ns", 0)
+    timer.add("search", -reconstruct_ns)
+    timer.add("reconstruct", reconstruct_ns)
+    with timer("reconstruct"):
+        values = path_metrics(graph, path, distance, options.get("directed", False),
+                              options.get("metrics") or DEFAULT_PATH_METRICS)
+    with timer("serialize"):
+        steps, trace_info = trace.encode(fmt)
     metrics = {
-        "time_ms": round((t1-t0)*1000,3),
-        "hops": max(0, len(path)-1),
-        "distance": None
+        "time_ms": round((time.perf_counter_ns()-t0)/1e6, 3),
+        **values,
+        "algorithm": name,
+        "counters": trace.counters,
+        "phases": timer.ms(),
     }
-    # compute distance if path exists
-    if path:
-        idx = {n.id:n for n in nodes}
-        dist=0.0
-        for i in range(len(path)-1):
-            a,b = path[i], path[i+1]
-            # find an edge weight
-            w = None
-            for e in edges:
-                if (e.source==a and e.target==b) or (e.source==b and e.target==a):
-                    w=e.weight; break
-            if w is None: w=1.0
-            dist+=w
-        metrics["distance"]=dist
-    return {"path": path, "steps": steps, "metrics": metrics}
+    return {"path": path, "steps": steps, "metrics": metrics, "trace": trace_info}
+
+def stream_algorithm(channel, algorithm, source, target, options, graph):
+    """:func:`run_algorithm` on ``graph`` with its trace put on ``channel`` chunk by chunk, as ``("trace", chunk)``."""
+    return run_algorithm(None, None, algorithm, source, target, options, graph,
+                         sink=lambda chunk: channel.put(("trace", chunk)))
@@ -0,0 +1,196 @@
+# backend/app/allpairs.py
+"""
+All-pairs shortest paths over a :class:`~app.graph.CompiledGraph`.
+
+Dense graphs use a row-blocked, NumPy-vectorized Floyd-Warshall; sparse graphs
+use Johnson's reweighting followed by one Dijkstra per source. Both produce the
+same reusable distance / next-hop matrices, memoized on the compiled graph.
+The matrices take 12 bytes per node pair, so their size is checked against
+the fixed ``ALL_PAIRS_MAX_BYTES`` budget before anything is allocated.
+"""
+
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .algorithms import dijkstra_tree
+from .graph import CompiledGraph
+
+MAX_ALL_PAIRS_NODES = 4000
+MAX_ALL_PAIRS_BYTES = int(os.environ.get("ALL_PAIRS_MAX_BYTES", 0)) or 256 * 1024 * 1024
+# float64 distance plus int32 next hop
+PAIR_BYTES = 12
+FW_BLOCK_ROWS = 256
+# Floyd-Warshall is chosen when the graph has at least n^2 / DENSE_RATIO edges.
+DENSE_RATIO = 64
+SMALL_GRAPH_NODES = 256
+
+METHODS = ("auto", "floyd-warshall", "johnson")
+
+
+class AllPairs:
+    """Distance matrix and next-hop matrix (``-1`` = unreachable) over dense node indices."""
+
+    def __init__(self, graph: CompiledGraph, dist: np.ndarray, nxt: np.ndarray, method: str):
+        self.graph = graph
+        self.dist = dist
+        self.next = nxt
+        self.method = method
+
+    def path(self, s: int, t: int) -> List[int]:
+        if self.next[s, t] < 0:
+            return []
+        path = [s]
+        u = s
+        while u != t:
+            u = int(self.next[u, t])
+            path.append(u)
+        return path
+
+    def distance(self, s: int, t: int) -> Optional[float]:
+        d = float(self.dist[s, t])
+        return None if np.isinf(d) else d
+
+    def table(self, rows: Sequence[int], cols: Sequence[int], include_next: bool = True) -> Dict[str, Any]:
+        """JSON-ready slice of the matrices; unreachable entries are ``None``."""
+        ix = np.ix_(np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64))
+        d = self.dist[ix]
+        out: Dict[str, Any] = {
+            "rows": self.graph.labels(rows),
+            "cols": self.graph.labels(cols),
+            "dist": np.where(np.isinf(d), None, d).tolist(),
+        }
+        if include_next:
+            labels = np.array(self.graph.ids + [None], dtype=object)
+            out["next"] = labels[self.next[ix]].tolist()
+        return out
+
+
+def floyd_warshall_matrix(graph: CompiledGraph, directed: bool = False, block: int = FW_BLOCK_ROWS):
+    n = graph.n
+    dist = np.full((n, n), np.inf)
+    src, dst, w = graph.src, graph.dst, graph.weights
+    if not directed:
+        src, dst, w = np.concatenate([src, dst]), np.concatenate([dst, src]), np.concatenate([w, w])
+    np.minimum.at(dist, (src, dst), w)
+    diag = np.arange(n)
+    dist[diag, diag] = np.minimum(dist[diag, diag], 0.0)
+    nxt = np.where(np.isfinite(dist), diag[None, :], -1).astype(np.int32)
+    nxt[diag, diag] = diag
+    for k in range(n):
+        row_k = dist[k]
+        for r0 in range(0, n, block):
+            d = dist[r0:r0 + block]
+            cand = d[:, k, None] + row_k[None, :]
+            better = cand < d
+            if better.any():
+                np.copyto(d, cand, where=better)
+                np.copyto(nxt[r0:r0 + block], np.broadcast_to(nxt[r0:r0 + block, k, None], better.shape), where=better)
+    if (dist[diag, diag] < 0).any():
+        raise ValueError("Negative weight cycle detected")
+    return dist, nxt
+
+
+def _potentials(graph: CompiledGraph, directed: bool) -> np.ndarray:
+    """Johnson potentials from a virtual source, via vectorized Bellman-Ford passes."""
+    src, dst, w = graph.src, graph.dst, graph.weights
+    if not directed:
+        src, dst, w = np.concatenate([src, dst]), np.concatenate([dst, src]), np.concatenate([w, w])
+    h = np.zeros(graph.n)
+    for _ in range(graph.n):
+        cand = h[src] + w
+        nh = h.copy()
+        np.minimum.at(nh, dst, cand)
+        if np.array_equal(nh, h):
+            return h
+        h = nh
+    raise ValueError("Negative weight cycle detected")
+
+
+def johnson_matrix(graph: CompiledGraph, directed: bool = False):
+    n = graph.n
+    csr = graph.csr(directed)
+    weights = None
+    h = None
+    if graph.m and graph.weights.min() < 0:
+        h = _potentials(graph, directed)
+        owner = np.repeat(np.arange(n), np.diff(csr.offsets))
+        weights = (csr.weights + h[owner] - h[csr.targets]).tolist()
+    dist = np.full((n, n), np.inf)
+    nxt = np.full((n, n), -1, dtype=np.int32)
+    for s in range(n):
+        d, prev, order = dijkstra_tree(graph, s, directed, weights)
+        first = nxt[s]
+        first[s] = s
+        for v in order[1:]:
+            p = prev[v]
+            first[v] = v if p == s else first[p]
+        dist[s] = d
+    if h is not None:
+        dist += h[None, :] - h[:, None]
+    return dist, nxt
+
+
+def check_size(n: int) -> None:
+    """
+    Raises:
+        ValueError: if the tables for ``n`` nodes would exceed the node cap
+            or ``MAX_ALL_PAIRS_BYTES``.
+    """
+    if n > MAX_ALL_PAIRS_NODES:
+        raise ValueError(f"all-pairs is limited to {MAX_ALL_PAIRS_NODES} nodes")
+    need = PAIR_BYTES * n * n
+    if need > MAX_ALL_PAIRS_BYTES:
+        raise ValueError(f"all-pairs tables for {n} nodes need {need / 2**20:.1f} MB, "
+                         f"over the {MAX_ALL_PAIRS_BYTES / 2**20:.1f} MB limit")
+
+
+def resolve_method(graph: CompiledGraph, method: str = "auto") -> str:
+    if method not in METHODS:
+        raise ValueError(f"unknown all-pairs method {method}")
+    if method != "auto":
+        return method
+    if graph.n <= SMALL_GRAPH_NODES or graph.m * DENSE_RATIO >= graph.n * graph.n:
+        return "floyd-warshall"
+    return "johnson"
+
+
+def job_size(graph: CompiledGraph, method: str = "auto") -> int:
+    """Cost of building the tables in the edge units of :meth:`~app.executor.ComputeExecutor.run`'s ``size``."""
+    if resolve_method(graph, method) == "floyd-warshall":
+        return graph.n * graph.n
+    # one Dijkstra per node, whatever rows are asked for
+    return graph.n * graph.m + graph.n
+
+
+def all_pairs(graph: CompiledGraph, directed: bool = False, method: str = "auto") -> AllPairs:
+    """
+    Compute (or fetch the memoized) all-pairs tables for ``graph``.
+
+    Raises:
+        ValueError: if the graph is too large, the method is unknown, or a
+            negative cycle is reachable.
+    """
+    method = resolve_method(graph, method)
+    key = ("all-pairs", bool(directed), method)
+    if graph.peek(key) is None:
+        check_size(graph.n)
+
+    def build():
+        if method == "floyd-warshall":
+            dist, nxt = floyd_warshall_matrix(graph, directed)
+        else:
+            dist, nxt = johnson_matrix(graph, directed)
+        return AllPairs(graph, dist, nxt, method)
+
+    return graph.derived(key, build)
+
+
+def all_pairs_table(graph: CompiledGraph, directed: bool, method: str, rows: Sequence[int], cols: Sequence[int],
+                    include_next: bool = True) -> Dict[str, Any]:
+    """:meth:`AllPairs.table` of the memoized tables plus the method used, in one picklable call."""
+    ap = all_pairs(graph, directed, method)
+    table = ap.table(rows, cols, include_next=include_next)
+    table["method"] = ap.method
+    return table
@@ -0,0 +1,98 @@
+# backend/app/batch.py
+"""
+Batch shortest-path queries.
+
+Pairs are grouped by source so that one full shortest-path tree per distinct
+source answers every target of that source. :func:`run_batch` can spread the
+sources over jobs of the shared compute executor, so a batch takes admission
+slots and CPU budget like any other search.
+"""
+
+import asyncio
+import math
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from starlette.requests import Request
+
+from .algorithms import bfs_tree, dijkstra_tree
+from .executor import compute
+from .graph import CompiledGraph, reconstruct
+
+BATCH_ALGORITHMS = {
+    "dijkstra": dijkstra_tree,
+    "bfs": bfs_tree,
+    "breadth-first": bfs_tree,
+}
+
+def solve_sources(graph: CompiledGraph, jobs: Sequence[Tuple[int, List[int]]],
+                  algorithm: str = "dijkstra", directed: bool = False) -> List[List[Tuple[List[int], Optional[float]]]]:
+    """For each ``(source, targets)`` job build one tree and extract every target's path."""
+    tree = BATCH_ALGORITHMS[algorithm]
+    out = []
+    for s, targets in jobs:
+        dist, prev, _ = tree(graph, s, directed, stop_at=targets)
+        answers = []
+        for t in targets:
+            d = dist[t]
+            answers.append((reconstruct(prev, s, t), None if d == math.inf else d))
+        out.append(answers)
+    return out
+
+
+def _chunks(items: List[Any], parts: int) -> List[List[Any]]:
+    size = max(1, math.ceil(len(items) / parts))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+async def run_batch(request: Optional[Request], graph: CompiledGraph, pairs: Sequence[Tuple[str, str]],
+                    algorithm: str = "dijkstra", options: Optional[Dict[str, Any]] = None, workers: int = 0,
+                    budget: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Answer many (source, target) queries, returning results in input order.
+
+    The sources are split over up to ``workers`` compute jobs (one when 0),
+    each holding an admission slot and running under ``budget``.
+
+    Raises:
+        ValueError: for an unsupported algorithm or unknown node IDs.
+        Overloaded, BudgetExceeded, Cancelled: from the executor; the other
+            jobs of the batch are cancelled.
+    """
+    options = options or {}
+    algorithm = algorithm.strip().lower()
+    if algorithm not in BATCH_ALGORITHMS:
+        raise ValueError(f"batch supports {sorted(BATCH_ALGORITHMS)}")
+    directed = options.get("directed", False)
+    index = graph.index
+    unknown = {nid for pair in pairs for nid in pair if nid not in index}
+    if unknown:
+        raise ValueError(f"unknown nodes: {sorted(unknown)[:5]}")
+
+    groups: "OrderedDict[int, List[int]]" = OrderedDict()
+    slots: Dict[int, List[int]] = {}
+    for i, (source, target) in enumerate(pairs):
+        s = index[source]
+        groups.setdefault(s, []).append(index[target])
+        slots.setdefault(s, []).append(i)
+    jobs = list(groups.items())
+
+    parts = _chunks(jobs, max(1, min(workers, compute.workers, len(jobs))))
+    tasks = [asyncio.ensure_future(compute.run(request, solve_sources, graph, part, algorithm, directed,
+                                               size=graph.m, budget=budget))
+             for part in parts]
+    try:
+        solved = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    answers = [a for part in solved for a in part]
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(pairs)
+    for (s, _), per_source in zip(jobs, answers):
+        for i, (path, dist) in zip(slots[s], per_source):
+            source, target = pairs[i]
+            results[i] = {"source": source, "target": target, "path": graph.labels(path),
+                          "distance": dist, "hops": max(0, len(path) - 1)}
+    return results
@@ -0,0 +1,196 @@
+# backend/app/bellman.py
+"""
+Bellman-Ford engine for graphs with negative weights.
+
+Two relaxation strategies share one interface:
+
+    spfa        queue-based: only nodes whose distance just dropped are
+                rescanned, and the search ends as soon as the queue empties
+    vectorized  Jacobi passes over NumPy arc arrays; each pass relaxes every
+                arc leaving the nodes improved by the previous pass at once,
+                and the passes stop when nothing improves
+
+Both maintain a predecessor array in which every cycle has negative weight
+(a predecessor is only set on a strict improvement and distances only
+decrease). Negative cycles are therefore found by looking for a cycle in it,
+by pointer doubling, once per ``n`` distance updates, and reported as the
+actual cycle instead of running the full ``n - 1`` passes first.
+"""
+
+import math
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .graph import CompiledGraph
+from .trace import UPDATE
+
+METHODS = ("auto", "spfa", "vectorized")
+# below this many arcs the queue-based search wins; above it whole-array passes do
+VECTORIZED_MIN_ARCS = 4_000
+
+
+class NegativeCycle(ValueError):
+    """A negative cycle reachable from the source. ``cycle`` lists node IDs and ends where it starts."""
+
+    def __init__(self, cycle: List[str], weight: float):
+        super().__init__(cycle, weight)
+        self.cycle = cycle
+        self.weight = weight
+
+    def __str__(self) -> str:
+        return f"negative cycle (weight {self.weight:g}): {' -> '.join(self.cycle)}"
+
+    def detail(self) -> Dict[str, Any]:
+        return {"message": str(self), "cycle": self.cycle, "weight": self.weight}
+
+
+def find_prev_cycle(prev) -> Optional[List[int]]:
+    """A cycle in a predecessor array (``-1`` = none) in forward order, or None."""
+    n = len(prev)
+    anc = np.asarray(prev, dtype=np.int64)
+    # the sentinel ``n`` stands for "no predecessor" and points at itself
+    anc = np.append(np.where(anc < 0, n, anc), n)
+    steps = 1
+    while steps <= n:
+        anc = anc[anc]
+        steps *= 2
+    # a walk of at least n steps that never ran out is inside a cycle
+    hit = np.flatnonzero(anc[:n] != n)
+    if not hit.size:
+        return None
+    start = int(anc[hit[0]])
+    cycle = [start]
+    u = int(prev[start])
+    while u != start:
+        cycle.append(u)
+        u = int(prev[u])
+    cycle.append(start)
+    cycle.reverse()
+    return cycle
+
+
+def _raise_cycle(graph: CompiledGraph, directed: bool, cycle: List[int]) -> None:
+    csr = graph.csr(directed)
+    offsets, targets, weights = csr.offsets, csr.targets, csr.weights
+    total = 0.0
+    for u, v in zip(cycle, cycle[1:]):
+        lo, hi = offsets[u], offsets[u + 1]
+        total += float(weights[lo:hi][targets[lo:hi] == v].min())
+    raise NegativeCycle(graph.labels(cycle), total)
+
+
+def bellman_ford_tree(graph: CompiledGraph, s: int, directed: bool = False, method: str = "auto",
+                      trace=None) -> Tuple[List[float], List[int], Dict[str, int]]:
+    """
+    Shortest distances from ``s`` allowing negative weights.
+
+    Undirected graphs relax every edge in both directions, so a negative
+    undirected edge is itself a negative cycle.
+
+    Args:
+        graph: Compiled topology.
+        s: Source index.
+        directed: Follow edges one way only.
+        method: ``spfa``, ``vectorized`` or ``auto`` (picked by arc count).
+        trace: Optional :class:`~app.trace.Trace` receiving one ``update``
+            event per distance improvement.
+
+    Returns:
+        ``(dist, prev, counters)`` with ``math.inf`` for unreachable nodes
+        and work counters (``passes``, ``scanned``, ``updates``, ...).
+
+    Raises:
+        NegativeCycle: when a negative cycle is reachable from ``s``.
+        ValueError: for an unknown method.
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown Bellman-Ford method {method!r}; expected one of {', '.join(METHODS)}")
+    if method == "auto":
+        arcs = graph.m if directed else 2 * graph.m
+        method = "vectorized" if arcs >= VECTORIZED_MIN_ARCS else "spfa"
+    if method == "spfa":
+        return _spfa(graph, s, directed, trace)
+    return _vectorized(graph, s, directed, trace)
+
+
+def _spfa(graph: CompiledGraph, s: int, directed: bool, trace) -> Tuple[List[float], List[int], Dict[str, int]]:
+    offsets, targets, weights = graph.csr(directed).lists()
+    n = graph.n
+    record = trace.record if trace is not None else None
+    dist = [math.inf]*n
+    prev = [-1]*n
+    dist[s] = 0.0
+    queued = [False]*n
+    queued[s] = True
+    q = deque([s])
+    scanned = updates = pushes = 0
+    next_check = n
+    while q:
+        u = q.popleft()
+        queued[u] = False
+        du = dist[u]
+        lo, hi = offsets[u], offsets[u+1]
+        scanned += hi - lo
+        for k in range(lo, hi):
+            v = targets[k]
+            nd = du + weights[k]
+            if nd < dist[v]:
+                dist[v] = nd
+                prev[v] = u
+                updates += 1
+                if record is not None:
+                    record(UPDATE, v, nd)
+                if not queued[v]:
+                    queued[v] = True
+                    q.append(v)
+                    pushes += 1
+        if updates >= next_check:
+            next_check = updates + n
+            cycle = find_prev_cycle(prev)
+            if cycle is not None:
+                _raise_cycle(graph, directed, cycle)
+    return dist, prev, {"scanned": scanned, "updates": updates, "pushes": pushes}
+
+
+def _vectorized(graph: CompiledGraph, s: int, directed: bool, trace) -> Tuple[List[float], List[int], Dict[str, int]]:
+    csr = graph.csr(directed)
+    arc_src, arc_dst, arc_w = graph.arc_sources(directed), csr.targets, csr.weights
+    n = graph.n
+    dist = np.full(n, np.inf)
+    prev = np.full(n, -1, dtype=np.int64)
+    dist[s] = 0.0
+    active = np.zeros(n, dtype=bool)
+    active[s] = True
+    passes = scanned = updates = 0
+    next_check = n
+    while True:
+        sel = np.flatnonzero(active[arc_src])
+        if not sel.size:
+            break
+        passes += 1
+        scanned += sel.size
+        u, v = arc_src[sel], arc_dst[sel]
+        cand = dist[u] + arc_w[sel]
+        better = cand < dist[v]
+        if not better.any():
+            break
+        u, v, cand = u[better], v[better], cand[better]
+        best = dist.copy()
+        np.minimum.at(best, v, cand)
+        win = cand == best[v]
+        prev[v[win]] = u[win]
+        changed = np.flatnonzero(best < dist)
+        dist = best
+        active[:] = False
+        active[changed] = True
+        updates += changed.size
+        if trace is not None:
+            trace.record_many(UPDATE, changed, dist[changed])
+        if updates >= next_check:
+            next_check = updates + n
+            cycle = find_prev_cycle(prev)
+            if cycle is not None:
+                _raise_cycle(graph, directed, cycle)
+    return dist.tolist(), prev.tolist(), {"passes": passes, "scanned": scanned, "updates": updates}
@@ -0,0 +1,337 @@
+# backend/app/binfmt.py
+"""
+Compact binary topology format (``.ntb``).
+
+Layout: a fixed header (magic, version, node/edge counts, the graph
+fingerprint and a section table) followed by 64-byte aligned sections holding
+the node-ID string table, float64 coordinates, int64 edge endpoints, float64
+weights and optional label / edge-ID string tables. Loading memory-maps the
+numeric sections and hands them to :class:`CompiledGraph` without copying or
+building per-element Python objects; only the node-ID strings are decoded.
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .graph import CompiledGraph, cache_get, cache_put, fingerprint_arrays
+from .storage import artifact_path, binary_only, load_saved_graph
+
+MAGIC = b"NTOPO\x00\x00\x01"
+VERSION = 1
+ALIGN = 64
+SECTIONS = ("id_offsets", "id_data", "x", "y", "src", "dst", "weights",
+            "label_offsets", "label_data", "label_mask", "eid_offsets", "eid_data", "eid_mask")
+_HEADER = struct.Struct("<8sIIQQ32s")
+_SECTION = struct.Struct("<QQ")
+HEADER_SIZE = _HEADER.size + _SECTION.size * len(SECTIONS)
+BINARY_SUFFIX = ".ntb"
+
+
+def _string_table(values: Sequence[Optional[str]]):
+    encoded = [(v or "").encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, b"".join(encoded)
+
+
+def _decode_strings(offsets: np.ndarray, data: bytes) -> List[str]:
+    bounds = offsets.tolist()
+    if data.isascii():
+        text = data.decode("ascii")
+        return [text[a:b] for a, b in zip(bounds, bounds[1:])]
+    return [data[a:b].decode("utf-8") for a, b in zip(bounds, bounds[1:])]
+
+
+def write_binary(path: str, ids: Sequence[str], x, y, src, dst, weights,
+                 labels: Optional[Sequence[Optional[str]]] = None,
+                 edge_ids: Optional[Sequence[Optional[str]]] = None,
+                 fingerprint: Optional[str] = None) -> None:
+    """Atomically write a topology in ``.ntb`` format."""
+    x = np.ascontiguousarray(x, dtype="<f8")
+    y = np.ascontiguousarray(y, dtype="<f8")
+    src = np.ascontiguousarray(src, dtype="<i8")
+    dst = np.ascontiguousarray(dst, dtype="<i8")
+    weights = np.ascontiguousarray(weights, dtype="<f8")
+    fingerprint = fingerprint or fingerprint_arrays(list(ids), x, y, src, dst, weights)
+    id_offsets, id_data = _string_table(ids)
+    payload: Dict[str, bytes] = {
+        "id_offsets": id_offsets.astype("<i8").tobytes(), "id_data": id_data,
+        "x": x.tobytes(), "y": y.tobytes(), "src": src.tobytes(), "dst": dst.tobytes(),
+        "weights": weights.tobytes(),
+    }
+    if labels is not None and any(l is not None for l in labels):
+        offsets, data = _string_table(labels)
+        payload.update(label_offsets=offsets.astype("<i8").tobytes(), label_data=data,
+                       label_mask=np.array([l is not None for l in labels], dtype=np.uint8).tobytes())
+    if edge_ids is not None and any(e is not None for e in edge_ids):
+        offsets, data = _string_table(edge_ids)
+        payload.update(eid_offsets=offsets.astype("<i8").tobytes(), eid_data=data,
+                       eid_mask=np.array([e is not None for e in edge_ids], dtype=np.uint8).tobytes())
+
+    table = []
+    pos = -(-HEADER_SIZE // ALIGN) * ALIGN
+    for name in SECTIONS:
+        blob = payload.get(name, b"")
+        table.append((pos, len(blob)))
+        pos = -(-(pos + len(blob)) // ALIGN) * ALIGN
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, 0, len(ids), int(src.shape[0]), fingerprint.encode("ascii")))
+            for entry in table:
+                f.write(_SECTION.pack(*entry))
+            for name, (offset, size) in zip(SECTIONS, table):
+                if size:
+                    f.seek(offset)
+                    f.write(payload[name])
+            f.truncate(pos)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+class BinaryTopology:
+    """
+    Memory-mapped view of an ``.ntb`` file; numeric sections are zero-copy
+    arrays. ``path`` may also be an in-memory buffer such as a request body.
+
+    Use it as a context manager (or call :meth:`close`) when no graph is built
+    from it; a :meth:`graph` keeps the mapping alive for as long as it lives.
+    """
+
+    def __init__(self, path: Union[str, bytes, memoryview]):
+        if isinstance(path, (bytes, bytearray, memoryview)):
+            self._mm = memoryview(path).cast("B")
+        else:
+            with open(path, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read_header()
+        except ValueError:
+            self.close()
+            raise
+
+    def _read_header(self) -> None:
+        if len(self._mm) < HEADER_SIZE:
+            raise ValueError("truncated topology binary file")
+        magic, version, _, self.n, self.m, fingerprint = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a topology binary file")
+        self.fingerprint = fingerprint.decode("ascii")
+        self._sections = {}
+        for i, name in enumerate(SECTIONS):
+            offset, size = _SECTION.unpack_from(self._mm, _HEADER.size + i * _SECTION.size)
+            if offset + size > len(self._mm):
+                raise ValueError(f"section {name} exceeds file size")
+            self._sections[name] = (offset, size)
+
+    def close(self) -> None:
+        """Unmap the file; arrays still viewing it keep the mapping until they are gone."""
+        try:
+            if isinstance(self._mm, mmap.mmap):
+                self._mm.close()
+            else:
+                self._mm.release()
+        except BufferError:
+            pass
+
+    def __enter__(self) -> "BinaryTopology":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def has(self, name: str) -> bool:
+        return self._sections[name][1] > 0
+
+    def array(self, name: str, dtype: str) -> np.ndarray:
+        offset, size = self._sections[name]
+        dt = np.dtype(dtype)
+        return np.frombuffer(self._mm, dtype=dt, count=size // dt.itemsize, offset=offset)
+
+    def raw(self, name: str) -> bytes:
+        offset, size = self._sections[name]
+        return bytes(self._mm[offset:offset + size])
+
+    def strings(self, prefix: str) -> Optional[List[Optional[str]]]:
+        if not self.has(f"{prefix}_offsets"):
+            return None
+        values = _decode_strings(self.array(f"{prefix}_offsets", "<i8"), self.raw(f"{prefix}_data"))
+        if prefix == "id":
+            return values
+        mask = self.array(f"{prefix}_mask", "u1").tolist()
+        return [v if keep else None for v, keep in zip(values, mask)]
+
+    def validate(self) -> None:
+        """
+        Check section sizes and index ranges before trusting an uploaded file.
+
+        Raises:
+            ValueError: if the file is inconsistent.
+        """
+        n, m = self.n, self.m
+        expected = {"id_offsets": 8 * (n + 1), "x": 8 * n, "y": 8 * n, "src": 8 * m, "dst": 8 * m, "weights": 8 * m}
+        for name, size in expected.items():
+            if self._sections[name][1] != size:
+                raise ValueError(f"section {name} has the wrong size")
+        for prefix, count in (("label", n), ("eid", m)):
+            if self.has(f"{prefix}_offsets") and (self._sections[f"{prefix}_offsets"][1] != 8 * (count + 1)
+                                                  or self._sections[f"{prefix}_mask"][1] != count):
+                raise ValueError(f"section {prefix}_offsets has the wrong size")
+        for prefix in ("id", "label", "eid"):
+            if prefix != "id" and not self.has(f"{prefix}_offsets"):
+                continue
+            offsets = self.array(f"{prefix}_offsets", "<i8")
+            if offsets[0] != 0 or offsets[-1] != self._sections[f"{prefix}_data"][1] or np.any(np.diff(offsets) < 0):
+                raise ValueError(f"section {prefix}_offsets is inconsistent")
+        for name in ("src", "dst"):
+            arr = self.array(name, "<i8")
+            if m and (arr.min() < 0 or arr.max() >= n):
+                raise ValueError(f"section {name} references unknown nodes")
+        ids = self.strings("id")
+        if len(set(ids)) != n:
+            raise ValueError("duplicate node ids")
+        if fingerprint_arrays(ids, *(self.array(k, "<f8") for k in ("x", "y")),
+                              self.array("src", "<i8"), self.array("dst", "<i8"),
+                              self.array("weights", "<f8")) != self.fingerprint:
+            raise ValueError("fingerprint does not match the file contents")
+
+    def graph(self) -> CompiledGraph:
+        return CompiledGraph(self.strings("id"), self.array("src", "<i8"), self.array("dst", "<i8"),
+                             self.array("weights", "<f8"), x=self.array("x", "<f8"), y=self.array("y", "<f8"),
+                             fingerprint=self.fingerprint)
+
+
+def load_graph(path: str) -> CompiledGraph:
+    """
+    Memory-map an ``.ntb`` file straight into a :class:`CompiledGraph`.
+
+    The fingerprint is read from the header, so a graph already in the shared
+    cache is returned without decoding the file.
+    """
+    b = BinaryTopology(path)
+    cached = cache_get(b.fingerprint)
+    if cached is not None:
+        b.close()
+        return cached
+    return cache_put(b.graph())
+
+
+def json_to_binary(topology: Dict[str, Any], path: str) -> str:
+    """
+    Convert a ``{"nodes": [...], "edges": [...]}`` dict to ``.ntb``; returns the fingerprint.
+
+    The fingerprint equals that of ``compile_graph`` on the same topology, so
+    artifacts keyed by it (landmarks, hierarchies) stay valid across formats.
+    """
+    nodes, edges = topology.get("nodes", []), topology.get("edges", [])
+    ids = [n["id"] for n in nodes]
+    index = {nid: i for i, nid in enumerate(ids)}
+    for e in edges:
+        for nid in (e["source"], e["target"]):
+            if nid not in index:
+                index[nid] = len(ids)
+                ids.append(nid)
+    pad = [None] * (len(ids) - len(nodes))
+    nan = float("nan")
+    x = np.array([nan if n.get("x") is None else n["x"] for n in nodes] + [nan] * len(pad), dtype=np.float64)
+    y = np.array([nan if n.get("y") is None else n["y"] for n in nodes] + [nan] * len(pad), dtype=np.float64)
+    src = np.fromiter((index[e["source"]] for e in edges), dtype=np.int64, count=len(edges))
+    dst = np.fromiter((index[e["target"]] for e in edges), dtype=np.int64, count=len(edges))
+    w = np.fromiter((e.get("weight", 1.0) for e in edges), dtype=np.float64, count=len(edges))
+    fingerprint = fingerprint_arrays(ids, x, y, src, dst, w)
+    write_binary(path, ids, x, y, src, dst, w,
+                 labels=[n.get("label") for n in nodes] + pad,
+                 edge_ids=[e.get("id") for e in edges], fingerprint=fingerprint)
+    return fingerprint
+
+
+def binary_to_json(path: str) -> Dict[str, Any]:
+    """Expand an ``.ntb`` file back into the JSON topology shape."""
+    with BinaryTopology(path) as b:
+        ids = b.strings("id")
+        labels = b.strings("label") or [None] * b.n
+        edge_ids = b.strings("eid") or [None] * b.m
+        xs = b.array("x", "<f8").tolist()
+        ys = b.array("y", "<f8").tolist()
+        src, dst = b.array("src", "<i8").tolist(), b.array("dst", "<i8").tolist()
+        weights = b.array("weights", "<f8").tolist()
+    nodes = []
+    for nid, x, y, label in zip(ids, xs, ys, labels):
+        node: Dict[str, Any] = {"id": nid, "x": None if x != x else x, "y": None if y != y else y}
+        if label is not None:
+            node["label"] = label
+        nodes.append(node)
+    edges = []
+    for eid, a, c, w in zip(edge_ids, src, dst, weights):
+        edge: Dict[str, Any] = {"source": ids[a], "target": ids[c], "weight": w}
+        if eid is not None:
+            edge["id"] = eid
+        edges.append(edge)
+    return {"nodes": nodes, "edges": edges}
+
+
+def saved_topology(tid: str) -> Optional[Dict[str, Any]]:
+    """JSON body of a saved topology; imported ones are expanded from their ``.ntb`` copy on demand."""
+    if not binary_only(tid):
+        return load_saved_graph(tid)
+    path = binary_path(tid)
+    if path is None or not os.path.exists(path):
+        return None
+    return binary_to_json(path)
+
+
+def binary_path(tid: str) -> Optional[str]:
+    """Path of the ``.ntb`` copy of a saved topology (None if no such topology)."""
+    return artifact_path(tid, BINARY_SUFFIX)
+
+
+def export_binary(tid: str) -> Optional[str]:
+    """
+    Path of an up-to-date ``.ntb`` copy of a saved topology, writing it from
+    the JSON document when missing or older than it. Imported topologies
+    have no JSON body; their upload is the copy.
+
+    Returns:
+        The binary path, or None if no topology with this ID is saved.
+    """
+    path = binary_path(tid)
+    if path is None:
+        return None
+    if binary_only(tid):
+        return path if os.path.exists(path) else None
+    source = path[:-len(BINARY_SUFFIX)] + ".json"
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(source):
+        return path
+    raw = load_saved_graph(tid)
+    if raw is None:
+        return None
+    json_to_binary(raw, path)
+    return path
+
+
+def saved_fingerprint(tid: str) -> Optional[str]:
+    """Fingerprint in the header of a saved topology's ``.ntb`` copy, if one was written."""
+    path = binary_path(tid)
+    if path is None or not os.path.exists(path):
+        return None
+    try:
+        with BinaryTopology(path) as b:
+            return b.fingerprint
+    except (OSError, ValueError):
+        return None
+
+
+def saved_graph(tid: str) -> Optional[CompiledGraph]:
+    """Compiled graph of a saved topology, loaded through its ``.ntb`` copy."""
+    path = export_binary(tid)
+    return None if path is None else load_graph(path)
@@ -0,0 +1,177 @@
+# backend/app/columnar.py
+"""
+Columnar graph payloads and fast JSON responses.
+
+The regular endpoints validate one Pydantic model per node and edge, which
+dominates the server time for large graphs. The columnar endpoints accept the
+same topology as parallel arrays instead::
+
+    {"nodes": {"id": [...], "x": [...], "y": [...]},
+     "edges": {"source": [...], "target": [...], "weight": [...]},
+     "algorithm": "dijkstra", "source": "a", "target": "b", "options": {...}}
+
+Edge endpoints are node IDs or integer positions in ``nodes.id``; ``x``,
+``y`` and ``weight`` are optional. Alternatively the body is an ``.ntb``
+binary topology (``Content-Type: application/x-ntb``) and the search
+parameters go in the query string, ``options`` as a JSON object. Either way
+the arrays go straight into a :class:`CompiledGraph`.
+
+Responses are encoded with ``orjson`` when it is installed.
+"""
+
+import json
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from .binfmt import BinaryTopology
+from .graph import CompiledGraph, cache_get, cache_put, fingerprint_arrays
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used instead
+    orjson = None
+
+BINARY_TYPES = ("application/x-ntb", "application/octet-stream")
+
+
+def loads(body: bytes) -> Any:
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson when available (NumPy arrays included)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _column(columns: Dict[str, Any], key: str, n: int, default: float) -> np.ndarray:
+    values = columns.get(key)
+    if values is None:
+        return np.full(n, default)
+    try:
+        arr = np.asarray([default if v is None else v for v in values], dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be a list of numbers")
+    if arr.shape != (n,):
+        raise ValueError(f"{key} must have one value per entry")
+    return arr
+
+
+def _endpoints(values, index: Dict[str, int], ids: list, name: str) -> np.ndarray:
+    if not isinstance(values, list):
+        raise ValueError(f"edges.{name} must be a list")
+    n = len(ids)
+    if values and all(type(v) is int for v in values):
+        arr = np.asarray(values, dtype=np.int64)
+        if arr.min() < 0 or arr.max() >= n:
+            raise ValueError(f"edges.{name} references unknown node positions")
+        return arr
+    out = np.empty(len(values), dtype=np.int64)
+    for k, v in enumerate(values):
+        if type(v) is int and 0 <= v < n:
+            out[k] = v
+            continue
+        if not isinstance(v, str):
+            raise ValueError(f"edges.{name} must hold node IDs or positions")
+        i = index.get(v)
+        if i is None:
+            # like compile_graph: unknown endpoints become coordinate-less nodes
+            i = index[v] = len(ids)
+            ids.append(v)
+        out[k] = i
+    return out
+
+
+def graph_from_columns(nodes: Dict[str, Any], edges: Dict[str, Any]) -> CompiledGraph:
+    """
+    Compile a columnar topology, reusing a cached graph with the same fingerprint.
+
+    Raises:
+        ValueError: for malformed columns or duplicate node IDs.
+    """
+    if not isinstance(nodes, dict) or not isinstance(edges, dict):
+        raise ValueError("nodes and edges must be objects of parallel arrays")
+    ids = nodes.get("id")
+    if not isinstance(ids, list) or not all(isinstance(i, str) for i in ids):
+        raise ValueError("nodes.id must be a list of strings")
+    index = {nid: i for i, nid in enumerate(ids)}
+    if len(index) != len(ids):
+        raise ValueError("duplicate node ids")
+    ids = list(ids)
+    declared = len(ids)
+    x = _column(nodes, "x", declared, np.nan)
+    y = _column(nodes, "y", declared, np.nan)
+    src = _endpoints(edges.get("source"), index, ids, "source")
+    dst = _endpoints(edges.get("target"), index, ids, "target")
+    if src.shape != dst.shape:
+        raise ValueError("edges.source and edges.target must have the same length")
+    w = _column(edges, "weight", len(src), 1.0)
+    if len(ids) > declared:
+        pad = np.full(len(ids) - declared, np.nan)
+        x, y = np.concatenate([x, pad]), np.concatenate([y, pad])
+    fp = fingerprint_arrays(ids, x, y, src, dst, w)
+    g = cache_get(fp)
+    if g is not None:
+        return g
+    return cache_put(CompiledGraph(ids, src, dst, w, x=x, y=y, fingerprint=fp))
+
+
+def _binary_graph(body: bytes) -> CompiledGraph:
+    b = BinaryTopology(body)
+    # the header's fingerprint is only trusted once validate() has re-hashed the arrays
+    b.validate()
+    cached = cache_get(b.fingerprint)
+    if cached is not None:
+        return cached
+    return cache_put(b.graph())
+
+
+def _query_params(request: Request) -> Dict[str, Any]:
+    params: Dict[str, Any] = dict(request.query_params)
+    if "options" in params:
+        try:
+            params["options"] = json.loads(params["options"])
+        except ValueError:
+            raise ValueError("options must be a JSON object")
+    return params
+
+
+def _decode(body: bytes, binary: bool, request: Request) -> Tuple[CompiledGraph, Dict[str, Any]]:
+    if binary:
+        return _binary_graph(body), _query_params(request)
+    try:
+        payload = loads(body)
+    except ValueError:
+        raise ValueError("body is not valid JSON")
+    if not isinstance(payload, dict):
+        raise ValueError("body must be a JSON object")
+    graph = graph_from_columns(payload.pop("nodes", None), payload.pop("edges", None))
+    return graph, payload
+
+
+async def read_graph_request(request: Request) -> Tuple[CompiledGraph, Dict[str, Any]]:
+    """
+    Compiled graph and the remaining parameters of a columnar request; the
+    decoding runs in the threadpool.
+
+    Raises:
+        ValueError: for a malformed body.
+    """
+    body = await request.body()
+    binary = request.headers.get("content-type", "").split(";")[0].strip() in BINARY_TYPES
+    graph, params = await run_in_threadpool(_decode, body, binary, request)
+    options: Optional[Any] = params.get("options")
+    if options is not None and not isinstance(options, dict):
+        raise ValueError("options must be a JSON object")
+    return graph, params
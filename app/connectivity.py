@@ -0,0 +1,304 @@
+# backend/app/connectivity.py
+"""
+Connectivity index: which queries cannot have a path at all.
+
+Undirected graphs get their connected components from a union-find. It is
+built by vectorized hooking over the edge arrays: each root hooks onto the
+smallest root across its edges, and the pointers are then compressed. After
+an edge insertion the index is updated without a rebuild.
+
+Directed graphs get their strongly connected components (Tarjan) and the
+condensation DAG. Tarjan numbers the components sinks first, so a component
+can only reach components with smaller numbers. Weakly connected components
+give a second O(1) filter. For condensations of up to ``MAX_REACH_COMPONENTS``
+components, reachability between all component pairs is also kept as bitsets,
+which makes every answer exact.
+
+:meth:`Components.may_reach` is O(1) either way. It never rejects a reachable
+pair.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .graph import CompiledGraph
+
+# condensations up to this size get exact pairwise reachability (n^2 / 8 bytes)
+MAX_REACH_COMPONENTS = 2048
+
+
+class UnionFind:
+    """Disjoint sets over ``0..n-1`` with path halving and union by size."""
+
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+        self.size = [1]*n
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> bool:
+        """Merge the sets of ``a`` and ``b``; False if they already were one."""
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return True
+
+
+def _hook(n: int, src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """Union-find roots of every node after uniting all ``src[i], dst[i]`` pairs, vectorized."""
+    root = np.arange(n, dtype=np.int64)
+    while True:
+        a, b = root[src], root[dst]
+        differ = a != b
+        if not differ.any():
+            return root
+        lo, hi = np.minimum(a[differ], b[differ]), np.maximum(a[differ], b[differ])
+        # roots only ever point at smaller roots, so no cycles form
+        np.minimum.at(root, hi, lo)
+        while True:
+            nxt = root[root]
+            if np.array_equal(nxt, root):
+                break
+            root = nxt
+
+
+def _dense(root: np.ndarray) -> Tuple[np.ndarray, int]:
+    """Relabel roots to ``0..k-1``, in order of each component's first node."""
+    _, first, inverse = np.unique(root, return_index=True, return_inverse=True)
+    rank = np.empty(first.size, dtype=np.int64)
+    rank[np.argsort(first, kind="stable")] = np.arange(first.size)
+    return rank[inverse], int(first.size)
+
+
+def _tarjan(n: int, offsets: List[int], targets: List[int]) -> Tuple[List[int], int]:
+    """Iterative Tarjan; components are numbered in the order they complete (sinks first)."""
+    index = [-1]*n
+    low = [0]*n
+    comp = [-1]*n
+    stack: List[int] = []
+    counter = count = 0
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        work = [(root, offsets[root])]
+        while work:
+            u, k = work[-1]
+            end = offsets[u+1]
+            while k < end:
+                v = targets[k]
+                k += 1
+                if index[v] == -1:
+                    work[-1] = (u, k)
+                    index[v] = low[v] = counter
+                    counter += 1
+                    stack.append(v)
+                    work.append((v, offsets[v]))
+                    break
+                # visited and not yet assigned a component = still on the stack
+                if comp[v] == -1 and index[v] < low[u]:
+                    low[u] = index[v]
+            else:
+                work.pop()
+                if low[u] == index[u]:
+                    while True:
+                        w = stack.pop()
+                        comp[w] = count
+                        if w == u:
+                            break
+                    count += 1
+                if work:
+                    p = work[-1][0]
+                    if low[u] < low[p]:
+                        low[p] = low[u]
+    return comp, count
+
+
+class Components:
+    """
+    Connectivity index of one compiled graph.
+
+    ``labels[v]`` is the (strongly, when directed) connected component of node
+    ``v``. Directed indexes also hold the weak components, the condensation
+    DAG as ``(dag_src, dag_dst)`` component arcs and, when small enough, one
+    reachability bitset per component.
+    """
+
+    def __init__(self, directed: bool, labels: np.ndarray, count: int, weak: Optional[np.ndarray] = None,
+                 dag: Optional[Tuple[np.ndarray, np.ndarray]] = None, reach: Optional[List[int]] = None):
+        self.directed = directed
+        self.labels = labels
+        self.count = count
+        self.weak = labels if weak is None else weak
+        empty = np.empty(0, dtype=np.int64)
+        self.dag_src, self.dag_dst = dag if dag is not None else (empty, empty)
+        self.reach = reach
+        self._labels = labels.tolist()
+        self._weak = self._labels if weak is None else weak.tolist()
+
+    @property
+    def exact(self) -> bool:
+        return not self.directed or self.reach is not None
+
+    def reaches(self, s: int, t: int) -> Optional[bool]:
+        """Whether ``t`` is reachable from ``s``; None when only a search can tell."""
+        cs, ct = self._labels[s], self._labels[t]
+        if cs == ct:
+            return True
+        if not self.directed or self._weak[s] != self._weak[t] or cs < ct:
+            return False
+        if self.reach is not None:
+            return bool(self.reach[cs] >> ct & 1)
+        return None
+
+    def may_reach(self, s: int, t: int) -> bool:
+        """False only when ``t`` is certainly unreachable from ``s``."""
+        return self.reaches(s, t) is not False
+
+    def sizes(self) -> np.ndarray:
+        return np.bincount(self.labels, minlength=self.count)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_labels")
+        state.pop("_weak")
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._labels = self.labels.tolist()
+        self._weak = self._labels if self.weak is self.labels else self.weak.tolist()
+
+
+def _reach_bitsets(count: int, dag_src: np.ndarray, dag_dst: np.ndarray) -> List[int]:
+    succ: List[List[int]] = [[] for _ in range(count)]
+    for a, b in zip(dag_src.tolist(), dag_dst.tolist()):
+        succ[a].append(b)
+    reach = [0]*count
+    # successors always carry smaller numbers, so they are done first
+    for c in range(count):
+        bits = 1 << c
+        for d in succ[c]:
+            bits |= reach[d]
+        reach[c] = bits
+    return reach
+
+
+def build_components(graph: CompiledGraph, directed: bool = False) -> Components:
+    """Build the index from scratch; prefer :func:`connectivity`, which memoizes it on the graph."""
+    if not directed:
+        labels, count = _dense(_hook(graph.n, graph.src, graph.dst))
+        return Components(False, labels, count)
+    offsets, targets, _ = graph.csr(True).lists()
+    comp, count = _tarjan(graph.n, offsets, targets)
+    labels = np.asarray(comp, dtype=np.int64)
+    weak, _ = _dense(_hook(graph.n, graph.src, graph.dst))
+    a, b = labels[graph.src], labels[graph.dst]
+    keys = np.unique((a * count + b)[a != b])
+    dag_src, dag_dst = keys // max(count, 1), keys % max(count, 1)
+    reach = _reach_bitsets(count, dag_src, dag_dst) if count <= MAX_REACH_COMPONENTS else None
+    return Components(True, labels, count, weak, (dag_src, dag_dst), reach)
+
+
+def connectivity(graph: CompiledGraph, directed: bool = False) -> Components:
+    """Connectivity index of ``graph``, memoized on it."""
+    return graph.derived(("connectivity", directed), lambda: build_components(graph, directed))
+
+
+def _remap(values: np.ndarray, pos: np.ndarray, start: int) -> np.ndarray:
+    """``values`` moved to the new node positions ``pos``; new nodes get fresh labels from ``start``."""
+    known = pos >= 0
+    out = np.empty(pos.size, dtype=np.int64)
+    out[known] = values[pos[known]]
+    out[~known] = np.arange(start, start + int((~known).sum()))
+    return out
+
+
+def _carried(old: Components, pos: np.ndarray, added: List[Tuple[int, int]],
+             added_old: List[Tuple[int, int]]) -> Optional[Components]:
+    fresh = int((pos < 0).sum())
+    labels = _remap(old.labels, pos, old.count)
+    count = old.count + fresh
+    if not old.directed:
+        uf = UnionFind(count)
+        merged = False
+        for u, v in added:
+            merged = uf.union(int(labels[u]), int(labels[v])) or merged
+        if not merged:
+            return Components(False, labels, count)
+        roots = np.fromiter((uf.find(c) for c in range(count)), dtype=np.int64, count=count)
+        labels, count = _dense(roots[labels])
+        return Components(False, labels, count)
+    # a directed insertion keeps the index only if its head was already reachable from its tail
+    if len(added_old) < len(added) or any(old.reaches(u, v) is not True for u, v in added_old):
+        return None
+    weak = _remap(old.weak, pos, int(old.weak.max(initial=-1)) + 1)
+    reach = None if old.reach is None else old.reach + [1 << c for c in range(old.count, count)]
+    return Components(True, labels, count, weak, (old.dag_src, old.dag_dst), reach)
+
+
+def carry_over(old_graph: CompiledGraph, graph: CompiledGraph, added: Sequence[Tuple[str, str]]) -> None:
+    """
+    Seed ``graph``'s connectivity indexes from those already built on
+    ``old_graph``, when ``graph`` is ``old_graph`` plus new nodes and the edges
+    ``added`` (endpoint ID pairs). Reweights do not matter. Indexes that
+    cannot be carried over are rebuilt on demand.
+    """
+    pos = np.fromiter((old_graph.index.get(nid, -1) for nid in graph.ids), dtype=np.int64, count=graph.n)
+    if int((pos >= 0).sum()) != old_graph.n:
+        return
+    index, old_index = graph.index, old_graph.index
+    pairs = [(index[u], index[v]) for u, v in added]
+    pairs_old = [(old_index[u], old_index[v]) for u, v in added if u in old_index and v in old_index]
+    for directed in (False, True):
+        old = old_graph.peek(("connectivity", directed))
+        if old is None:
+            continue
+        comps = _carried(old, pos, pairs, pairs_old)
+        if comps is not None:
+            graph.derived(("connectivity", directed), lambda: comps)
+
+
+def run_components(graph: CompiledGraph, directed: bool = False, limit: Optional[int] = 100) -> Dict[str, Any]:
+    """
+    JSON-ready summary of the connectivity index.
+
+    Components are listed largest first, at most ``limit`` of them (all when
+    None). Directed summaries add the weak component count and the
+    condensation arcs between the listed components.
+    """
+    comps = connectivity(graph, directed)
+    sizes = comps.sizes()
+    order = np.argsort(-sizes, kind="stable")
+    shown = order if limit is None else order[:max(0, limit)]
+    members = np.argsort(comps.labels, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(sizes)])
+    ids = graph.ids
+    out: Dict[str, Any] = {
+        "directed": directed,
+        "count": comps.count,
+        "largest": int(sizes.max(initial=0)),
+        "singletons": int((sizes == 1).sum()),
+        "components": [{"id": int(c), "size": int(sizes[c]),
+                        "nodes": [ids[v] for v in members[starts[c]:starts[c+1]].tolist()]} for c in shown],
+    }
+    if directed:
+        listed = np.zeros(comps.count, dtype=bool)
+        listed[shown] = True
+        keep = listed[comps.dag_src] & listed[comps.dag_dst]
+        out["weak_count"] = int(comps.weak.max(initial=-1)) + 1
+        out["condensation"] = {"arcs": int(comps.dag_src.size), "exact_reachability": comps.exact,
+                               "listed_arcs": np.stack([comps.dag_src[keep], comps.dag_dst[keep]], 1).tolist()}
+    return out
@@ -0,0 +1,269 @@
+# backend/app/contraction.py
+"""
+Contraction hierarchies for saved topologies.
+
+Preprocessing contracts nodes in edge-difference order (lazily updated),
+adding a shortcut ``u -> x`` through ``v`` whenever a bounded witness search
+finds no path at most as short that avoids ``v``. Queries run a bidirectional
+Dijkstra restricted to upward arcs and unpack shortcuts through their middle
+node. The hierarchy is persisted next to the topology JSON and tagged with the
+graph fingerprint so that a stale file is detected and ignored.
+"""
+
+import heapq
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .graph import CompiledGraph
+
+CH_SUFFIX = ".ch.npz"
+CH_DIRECTED_SUFFIX = ".ch-directed.npz"
+WITNESS_SETTLE_LIMIT = 64
+
+
+def ch_suffix(directed: bool = False) -> str:
+    return CH_DIRECTED_SUFFIX if directed else CH_SUFFIX
+
+
+class ContractionHierarchy:
+    """Node ranks plus all original and shortcut arcs (``mid == -1`` for originals)."""
+
+    def __init__(self, rank: np.ndarray, src: np.ndarray, dst: np.ndarray, weights: np.ndarray,
+                 mid: np.ndarray, directed: bool, fingerprint: str):
+        self.rank = rank
+        self.src = src
+        self.dst = dst
+        self.weights = weights
+        self.mid = mid
+        self.directed = directed
+        self.fingerprint = fingerprint
+        self._prepare()
+
+    def _prepare(self) -> None:
+        n = len(self.rank)
+        rank = self.rank
+        up = rank[self.dst] > rank[self.src]
+        # forward search climbs arcs a -> b with rank[b] > rank[a]
+        self.up = _adjacency(n, self.src[up], self.dst[up], self.weights[up])
+        # backward search climbs arcs a -> b with rank[a] > rank[b], stored reversed at b
+        down = ~up
+        self.down = _adjacency(n, self.dst[down], self.src[down], self.weights[down])
+        shortcut = self.mid >= 0
+        self.middle: Dict[Tuple[int, int], int] = dict(zip(
+            zip(self.src[shortcut].tolist(), self.dst[shortcut].tolist()), self.mid[shortcut].tolist()))
+
+    @property
+    def shortcuts(self) -> int:
+        return int((self.mid >= 0).sum())
+
+    def query(self, s: int, t: int) -> Tuple[List[int], Optional[float], int]:
+        """Shortest ``s``-``t`` path as node indices, its length, and the number of settled nodes."""
+        if s == t:
+            return [s], 0.0, 1
+        n = len(self.rank)
+        dist = ([math.inf] * n, [math.inf] * n)
+        prev = ([-1] * n, [-1] * n)
+        dist[0][s] = 0.0
+        dist[1][t] = 0.0
+        pqs = ([(0.0, s)], [(0.0, t)])
+        adj = (self.up, self.down)
+        done = [False, False]
+        best, meet, settled = math.inf, -1, 0
+        while not (done[0] and done[1]):
+            for side in (0, 1):
+                pq = pqs[side]
+                if done[side]:
+                    continue
+                if not pq or pq[0][0] >= best:
+                    done[side] = True
+                    continue
+                d, u = heapq.heappop(pq)
+                mine, other = dist[side], dist[1 - side]
+                if d > mine[u]:
+                    continue
+                settled += 1
+                if d + other[u] < best:
+                    best, meet = d + other[u], u
+                offsets, targets, weights = adj[side]
+                for k in range(offsets[u], offsets[u + 1]):
+                    v = targets[k]
+                    nd = d + weights[k]
+                    if nd < mine[v]:
+                        mine[v] = nd
+                        prev[side][v] = u
+                        heapq.heappush(pq, (nd, v))
+        if meet == -1:
+            return [], None, settled
+        up_path = [meet]
+        while up_path[-1] != s:
+            up_path.append(prev[0][up_path[-1]])
+        up_path.reverse()
+        down_path = [meet]
+        while down_path[-1] != t:
+            down_path.append(prev[1][down_path[-1]])
+        path = up_path + down_path[1:]
+        return self._unpack(path), best, settled
+
+    def _unpack(self, path: List[int]) -> List[int]:
+        out = [path[0]]
+        stack: List[Tuple[int, int]] = []
+        for a, b in zip(path, path[1:]):
+            stack.append((a, b))
+            while stack:
+                a2, b2 = stack.pop()
+                m = self.middle.get((a2, b2))
+                if m is None:
+                    out.append(b2)
+                else:
+                    stack.append((m, b2))
+                    stack.append((a2, m))
+        return out
+
+    def save(self, path: str) -> None:
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, rank=self.rank, src=self.src, dst=self.dst, weights=self.weights, mid=self.mid,
+                     directed=np.array(self.directed), fingerprint=np.array(self.fingerprint))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ContractionHierarchy":
+        with np.load(path) as data:
+            return cls(data["rank"], data["src"], data["dst"], data["weights"], data["mid"],
+                       bool(data["directed"]), str(data["fingerprint"]))
+
+
+def _adjacency(n: int, src: np.ndarray, dst: np.ndarray, weights: np.ndarray):
+    order = np.argsort(src, kind="stable")
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=offsets[1:])
+    return offsets.tolist(), dst[order].tolist(), weights[order].tolist()
+
+
+def _witness(out: Dict[int, Dict[int, Tuple[float, int]]], u: int, skip: int, limit: float) -> Dict[int, float]:
+    dist = {u: 0.0}
+    pq = [(0.0, u)]
+    settled = 0
+    while pq and settled < WITNESS_SETTLE_LIMIT:
+        d, x = heapq.heappop(pq)
+        if d > limit:
+            break
+        if d > dist[x]:
+            continue
+        settled += 1
+        for y, (w, _) in out[x].items():
+            if y == skip:
+                continue
+            nd = d + w
+            if nd < dist.get(y, math.inf):
+                dist[y] = nd
+                heapq.heappush(pq, (nd, y))
+    return dist
+
+
+def build_hierarchy(graph: CompiledGraph, directed: bool = False) -> ContractionHierarchy:
+    """
+    Contract every node of ``graph``.
+
+    Raises:
+        ValueError: if the graph has negative weights.
+    """
+    if graph.m and graph.weights.min() < 0:
+        raise ValueError("contraction hierarchies require non-negative weights")
+    n = graph.n
+    out: Dict[int, Dict[int, Tuple[float, int]]] = {v: {} for v in range(n)}
+    inn: Dict[int, Dict[int, Tuple[float, int]]] = {v: {} for v in range(n)}
+    arcs: Dict[Tuple[int, int], Tuple[float, int]] = {}
+
+    def add_arc(a: int, b: int, w: float, m: int) -> None:
+        if a == b:
+            return
+        cur = arcs.get((a, b))
+        if cur is None or w < cur[0]:
+            arcs[(a, b)] = (w, m)
+            out[a][b] = (w, m)
+            inn[b][a] = (w, m)
+
+    for a, b, w in zip(graph.src.tolist(), graph.dst.tolist(), graph.weights.tolist()):
+        add_arc(a, b, w, -1)
+        if not directed:
+            add_arc(b, a, w, -1)
+
+    deleted_neighbours = [0] * n
+
+    def shortcuts_for(v: int) -> List[Tuple[int, int, float]]:
+        found = []
+        outs = out[v]
+        for u, (w1, _) in inn[v].items():
+            if not outs:
+                break
+            limit = w1 + max(w for w, _ in outs.values())
+            witness = _witness(out, u, v, limit)
+            for x, (w2, _) in outs.items():
+                if x == u:
+                    continue
+                if witness.get(x, math.inf) > w1 + w2:
+                    found.append((u, x, w1 + w2))
+        return found
+
+    def priority(v: int, shortcuts: List[Tuple[int, int, float]]) -> int:
+        return len(shortcuts) - len(inn[v]) - len(out[v]) + deleted_neighbours[v]
+
+    pq = [(priority(v, shortcuts_for(v)), v) for v in range(n)]
+    heapq.heapify(pq)
+    rank = np.zeros(n, dtype=np.int64)
+    contracted = [False] * n
+    level = 0
+    while pq:
+        _, v = heapq.heappop(pq)
+        if contracted[v]:
+            continue
+        shortcuts = shortcuts_for(v)
+        p = priority(v, shortcuts)
+        if pq and p > pq[0][0]:
+            heapq.heappush(pq, (p, v))
+            continue
+        for u, x, w in shortcuts:
+            add_arc(u, x, w, v)
+        contracted[v] = True
+        rank[v] = level
+        level += 1
+        for u in list(inn[v]):
+            del out[u][v]
+            deleted_neighbours[u] += 1
+        for x in list(out[v]):
+            del inn[x][v]
+            deleted_neighbours[x] += 1
+        out[v] = {}
+        inn[v] = {}
+
+    keys = list(arcs)
+    src = np.array([a for a, _ in keys], dtype=np.int64)
+    dst = np.array([b for _, b in keys], dtype=np.int64)
+    weights = np.array([arcs[k][0] for k in keys], dtype=np.float64)
+    mid = np.array([arcs[k][1] for k in keys], dtype=np.int64)
+    return ContractionHierarchy(rank, src, dst, weights, mid, directed, graph.fingerprint)
+
+
+def hierarchy_for(graph: CompiledGraph, directed: bool = False, path: Optional[str] = None) -> Optional[ContractionHierarchy]:
+    """The persisted hierarchy at ``path`` if it matches ``graph``, else None (stale or missing)."""
+    def load():
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            ch = ContractionHierarchy.load(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        if ch.fingerprint != graph.fingerprint or ch.directed != directed:
+            return None
+        return ch
+
+    key = ("ch", bool(directed), path)
+    ch = graph.derived(key, load)
+    if ch is None:
+        # not memoized, so a hierarchy built later is picked up
+        graph.forget(key)
+    return ch
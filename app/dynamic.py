@@ -0,0 +1,247 @@
+# backend/app/dynamic.py
+"""
+Incremental single-source shortest paths for mutable topologies.
+
+Each tracked source keeps its shortest-path tree. After an edge is inserted,
+deleted or reweighted only the affected part of the tree is repaired:
+decreases propagate Dijkstra-style from the improved node, while increases and
+deletions reset the subtree hanging off the changed tree arc and re-settle it
+from its unaffected in-neighbours (Ramalingam-Reps).
+"""
+
+import heapq
+import math
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .models import Edge
+
+Arc = Tuple[str, str]
+
+
+class DynamicGraph:
+    """Dict-based adjacency that collapses parallel edges to their minimum weight."""
+
+    def __init__(self, nodes: Iterable[str], edges: Iterable[Edge], directed: bool = False):
+        self.directed = directed
+        self.out: Dict[str, Dict[str, float]] = {}
+        self.inn: Dict[str, Dict[str, float]] = {}
+        self.parallel: Dict[Arc, Dict[str, float]] = {}
+        self.edge_arcs: Dict[str, Tuple[Arc, ...]] = {}
+        for nid in nodes:
+            self.add_node(nid)
+        for e in edges:
+            self.set_edge(e.id, e.source, e.target, e.weight)
+
+    def add_node(self, nid: str) -> None:
+        self.out.setdefault(nid, {})
+        self.inn.setdefault(nid, {})
+
+    def remove_node(self, nid: str) -> None:
+        self.out.pop(nid, None)
+        self.inn.pop(nid, None)
+
+    def _arcs(self, source: str, target: str) -> Tuple[Arc, ...]:
+        if self.directed or source == target:
+            return ((source, target),)
+        return ((source, target), (target, source))
+
+    def _refresh(self, arc: Arc, changes: List[Tuple[str, str, float, float]]) -> None:
+        u, v = arc
+        old = self.out.get(u, {}).get(v, math.inf)
+        weights = self.parallel.get(arc)
+        new = min(weights.values()) if weights else math.inf
+        if new == math.inf:
+            self.parallel.pop(arc, None)
+            self.out.get(u, {}).pop(v, None)
+            self.inn.get(v, {}).pop(u, None)
+        else:
+            self.add_node(u)
+            self.add_node(v)
+            self.out[u][v] = new
+            self.inn[v][u] = new
+        if old != new:
+            changes.append((u, v, old, new))
+
+    def set_edge(self, eid: str, source: str, target: str, weight: Optional[float]) -> List[Tuple[str, str, float, float]]:
+        """Insert, reweight (``weight`` given) or delete (``None``) one edge; returns arc changes."""
+        changes: List[Tuple[str, str, float, float]] = []
+        arcs = self.edge_arcs.pop(eid, ())
+        for arc in arcs:
+            self.parallel.get(arc, {}).pop(eid, None)
+        if weight is not None:
+            arcs = tuple(dict.fromkeys(arcs + self._arcs(source, target)))
+            self.edge_arcs[eid] = self._arcs(source, target)
+            for arc in self.edge_arcs[eid]:
+                self.parallel.setdefault(arc, {})[eid] = weight
+        for arc in arcs:
+            self._refresh(arc, changes)
+        return changes
+
+
+class DynamicSSSP:
+    """Shortest-path tree from one source, repaired in place on arc changes."""
+
+    def __init__(self, graph: DynamicGraph, source: str):
+        self.graph = graph
+        self.source = source
+        self.dist: Dict[str, float] = {}
+        self.parent: Dict[str, Optional[str]] = {}
+        self.children: Dict[str, Set[str]] = {}
+        self._before: Dict[str, Tuple[float, Optional[str]]] = {}
+        self.recompute()
+
+    def recompute(self) -> None:
+        self.dist = {nid: math.inf for nid in self.graph.out}
+        self.parent = {nid: None for nid in self.graph.out}
+        self.children = {nid: set() for nid in self.graph.out}
+        self.dist[self.source] = 0.0
+        self._propagate([(0.0, self.source)])
+        self._before = {}
+
+    def _touch(self, x: str) -> None:
+        if x not in self._before:
+            self._before[x] = (self.dist.get(x, math.inf), self.parent.get(x))
+
+    def _set(self, x: str, d: float, p: Optional[str]) -> None:
+        self._touch(x)
+        old = self.parent.get(x)
+        if old is not None and old != p:
+            self.children.get(old, set()).discard(x)
+        if p is not None:
+            self.children.setdefault(p, set()).add(x)
+        self.dist[x] = d
+        self.parent[x] = p
+
+    def _propagate(self, heap: List[Tuple[float, str]]) -> None:
+        heapq.heapify(heap)
+        out, dist = self.graph.out, self.dist
+        while heap:
+            d, x = heapq.heappop(heap)
+            if d > dist.get(x, math.inf):
+                continue
+            for y, w in out.get(x, {}).items():
+                nd = d + w
+                if nd < dist.get(y, math.inf):
+                    self._set(y, nd, x)
+                    heapq.heappush(heap, (nd, y))
+
+    def _subtree(self, root: str) -> List[str]:
+        order = [root]
+        for x in order:
+            order.extend(self.children.get(x, ()))
+        return order
+
+    def arc_changed(self, u: str, v: str, old: float, new: float) -> None:
+        if new < old:
+            nd = self.dist.get(u, math.inf) + new
+            if nd < self.dist.get(v, math.inf):
+                self._set(v, nd, u)
+                self._propagate([(nd, v)])
+        elif new > old and self.parent.get(v) == u:
+            affected = self._subtree(v)
+            lost = set(affected)
+            for x in affected:
+                self._set(x, math.inf, None)
+            heap = []
+            inn, dist = self.graph.inn, self.dist
+            for x in affected:
+                best, via = math.inf, None
+                for p, w in inn.get(x, {}).items():
+                    if p not in lost and dist.get(p, math.inf) + w < best:
+                        best, via = dist[p] + w, p
+                if via is not None:
+                    self._set(x, best, via)
+                    heap.append((best, x))
+            self._propagate(heap)
+
+    def node_added(self, nid: str) -> None:
+        self.dist.setdefault(nid, math.inf)
+        self.parent.setdefault(nid, None)
+        self.children.setdefault(nid, set())
+
+    def node_removed(self, nid: str) -> None:
+        # incident arcs were already deleted, so ``nid`` is a detached leaf here
+        self._before.pop(nid, None)
+        p = self.parent.pop(nid, None)
+        if p is not None:
+            self.children.get(p, set()).discard(nid)
+        self.dist.pop(nid, None)
+        self.children.pop(nid, None)
+
+    def path(self, target: str) -> List[str]:
+        if self.dist.get(target, math.inf) == math.inf:
+            return []
+        path = []
+        cur: Optional[str] = target
+        while cur is not None:
+            path.append(cur)
+            cur = self.parent[cur]
+        path.reverse()
+        return path
+
+    def route(self, target: str) -> Dict[str, Any]:
+        d = self.dist.get(target, math.inf)
+        return {"target": target, "distance": None if d == math.inf else d, "path": self.path(target)}
+
+    def drain_changes(self) -> List[str]:
+        """Targets whose route changed since the last drain (including re-parented subtrees)."""
+        changed = []
+        reparented = []
+        for x, (d, p) in self._before.items():
+            if x not in self.dist:
+                continue
+            if self.dist[x] != d or self.parent[x] != p:
+                changed.append(x)
+                if self.parent[x] != p:
+                    reparented.append(x)
+        self._before = {}
+        seen = set(changed)
+        for x in reparented:
+            for y in self._subtree(x):
+                if y not in seen:
+                    seen.add(y)
+                    changed.append(y)
+        return changed
+
+
+class DynamicRouting:
+    """Shortest-path trees for a set of tracked sources over one :class:`DynamicGraph`."""
+
+    def __init__(self, nodes: Iterable[str], edges: Iterable[Edge], sources: Iterable[str], directed: bool = False):
+        edges = list(edges)
+        if any(e.weight < 0 for e in edges):
+            raise ValueError("dynamic routing requires non-negative weights")
+        self.graph = DynamicGraph(nodes, edges, directed)
+        self.trees: Dict[str, DynamicSSSP] = {}
+        for s in sources:
+            if s not in self.graph.out:
+                raise ValueError(f"unknown source {s}")
+            self.trees[s] = DynamicSSSP(self.graph, s)
+
+    @property
+    def directed(self) -> bool:
+        return self.graph.directed
+
+    def apply(self, events: List[Tuple[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Feed session events (``("add_node", id)``, ``("remove_node", id)``,
+        ``("set", Edge)``, ``("del", Edge)``) and return the changed routes per source.
+        """
+        for kind, obj in events:
+            if kind == "add_node":
+                self.graph.add_node(obj)
+                for tree in self.trees.values():
+                    tree.node_added(obj)
+            elif kind == "remove_node":
+                self.graph.remove_node(obj)
+                self.trees.pop(obj, None)
+                for tree in self.trees.values():
+                    tree.node_removed(obj)
+            else:
+                weight = obj.weight if kind == "set" else None
+                for u, v, old, new in self.graph.set_edge(obj.id, obj.source, obj.target, weight):
+                    for tree in self.trees.values():
+                        tree.node_added(u)
+                        tree.node_added(v)
+                        tree.arc_changed(u, v, old, new)
+        return {s: [tree.route(t) for t in tree.drain_changes()] for s, tree in self.trees.items()}
@@ -0,0 +1,305 @@
+# backend/app/executor.py
+"""
+Process-pool execution of CPU-bound route computations.
+
+Handlers await :meth:`ComputeExecutor.run`, which keeps the event loop free
+while a search runs in a worker process. Each job holds one admission slot
+until it finishes, and a request that finds every slot taken is rejected with
+:class:`Overloaded` before it queues. Inside the worker a CPU-time interval
+timer (``ITIMER_PROF``) fires every ``TICK_S`` of CPU time and aborts the job
+once its budget is spent, or once the client has disconnected: the job's slot
+in a shared byte array is set from the server process. Inputs below
+``INLINE_EDGES`` run on the threadpool instead, where the round trip to a
+worker would cost more than the search.
+
+:meth:`ComputeExecutor.stream` runs a job the same way and yields what it
+puts on a :class:`Channel` while it runs (e.g. search trace chunks).
+"""
+
+import asyncio
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from .graph import CompiledGraph, cache_put
+
+COMPUTE_WORKERS = int(os.environ.get("COMPUTE_WORKERS", 0)) or (os.cpu_count() or 1)
+COMPUTE_QUEUE_DEPTH = int(os.environ.get("COMPUTE_QUEUE_DEPTH", 0)) or 4 * COMPUTE_WORKERS
+COMPUTE_CPU_BUDGET_S = float(os.environ.get("COMPUTE_CPU_BUDGET_S", 30.0))
+INLINE_EDGES = 2000
+TICK_S = 0.05
+DISCONNECT_POLL_S = 0.1
+# a streaming job gives up once its consumer has taken nothing for this long
+STREAM_STALL_S = 30.0
+
+
+class Overloaded(Exception):
+    """Every admission slot is taken."""
+
+
+class BudgetExceeded(Exception):
+    """The job used up its CPU time budget."""
+
+
+class Cancelled(Exception):
+    """The job was cancelled because its client went away."""
+
+
+_cancel = None  # shared cancel flags, one byte per admission slot
+_job = {"slot": -1, "deadline": 0.0}
+
+
+def _init_worker(flags) -> None:
+    global _cancel
+    _cancel = flags
+    if hasattr(signal, "setitimer"):
+        signal.signal(signal.SIGPROF, _on_tick)
+
+
+def _on_tick(signum, frame) -> None:
+    if _job["slot"] < 0:
+        return
+    if _cancel[_job["slot"]]:
+        raise Cancelled()
+    if time.process_time() > _job["deadline"]:
+        raise BudgetExceeded()
+
+
+def _run_job(slot: int, budget: float, fn: Callable, args: tuple):
+    # intern graphs so structures memoized by earlier jobs on this worker are reused
+    args = tuple(cache_put(a) if isinstance(a, CompiledGraph) else a for a in args)
+    _job["slot"] = slot
+    _job["deadline"] = time.process_time() + budget
+    timed = hasattr(signal, "setitimer")
+    if timed:
+        signal.setitimer(signal.ITIMER_PROF, TICK_S, TICK_S)
+    try:
+        return fn(*args)
+    finally:
+        if timed:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        _job["slot"] = -1
+
+
+class Channel:
+    """
+    Bounded queue from a job to the handler streaming it, usable from worker
+    processes. :meth:`put` blocks while the handler is behind, which pauses
+    the job without spending its CPU budget.
+    """
+
+    def __init__(self, items, closed):
+        self._items = items
+        self._closed = closed
+
+    def put(self, item: Any) -> None:
+        """
+        Raises:
+            Cancelled: once the handler closed the channel, the job was
+                cancelled or nothing was taken for ``STREAM_STALL_S``.
+        """
+        deadline = time.monotonic() + STREAM_STALL_S
+        while True:
+            if self._closed.is_set() or (_job["slot"] >= 0 and _cancel[_job["slot"]]):
+                raise Cancelled()
+            # the budget tick must not interrupt a call into the manager half-way
+            masked = hasattr(signal, "pthread_sigmask")
+            if masked:
+                signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGPROF})
+            try:
+                self._items.put(item, timeout=DISCONNECT_POLL_S)
+                return
+            except queue.Full:
+                if time.monotonic() > deadline:
+                    raise Cancelled()
+            finally:
+                if masked:
+                    signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGPROF})
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """Next item; raises ``queue.Empty`` after ``timeout`` (at once when 0)."""
+        if timeout == 0:
+            return self._items.get_nowait()
+        return self._items.get(timeout=timeout)
+
+    def close(self) -> None:
+        self._closed.set()
+
+
+class ComputeExecutor:
+    """
+    Bounded process pool with admission control, CPU budgets and cancellation.
+
+    Args:
+        workers: Worker processes.
+        queue_depth: Jobs admitted at once (running plus queued).
+        cpu_budget: Default and maximum CPU seconds per job.
+    """
+
+    def __init__(self, workers: int = COMPUTE_WORKERS, queue_depth: int = COMPUTE_QUEUE_DEPTH,
+                 cpu_budget: float = COMPUTE_CPU_BUDGET_S):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.cpu_budget = cpu_budget
+        # spawn: forked workers would inherit the storage index's SQLite connection
+        self._ctx = multiprocessing.get_context("spawn")
+        self._flags = self._ctx.RawArray("b", queue_depth)
+        self._free: List[int] = list(range(queue_depth))
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+
+    @property
+    def in_flight(self) -> int:
+        return self.queue_depth - len(self._free)
+
+    def _acquire(self) -> int:
+        with self._lock:
+            if not self._free:
+                raise Overloaded()
+            slot = self._free.pop()
+        self._flags[slot] = 0
+        return slot
+
+    def _release(self, slot: int) -> None:
+        with self._lock:
+            self._free.append(slot)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=self._ctx,
+                                                 initializer=_init_worker, initargs=(self._flags,))
+            return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+            manager, self._manager = self._manager, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if manager is not None:
+            manager.shutdown()
+
+    def channel(self, max_items: int = 8) -> Channel:
+        """A new :class:`Channel` holding at most ``max_items``; starts the channel manager on first use."""
+        with self._lock:
+            if self._manager is None:
+                self._manager = self._ctx.Manager()
+            manager = self._manager
+        return Channel(manager.Queue(max_items), manager.Event())
+
+    def budget(self, options: Optional[dict] = None) -> float:
+        """CPU budget for a job: ``options["cpu_budget_ms"]`` capped at the server default."""
+        requested = (options or {}).get("cpu_budget_ms")
+        if requested is None:
+            return self.cpu_budget
+        return max(0.0, min(self.cpu_budget, float(requested) / 1000.0))
+
+    async def run(self, request: Optional[Request], fn: Callable, *args: Any,
+                  size: int = INLINE_EDGES, budget: Optional[float] = None) -> Any:
+        """
+        Run ``fn(*args)`` in a worker process and return its result.
+
+        ``fn`` and its arguments must be picklable. ``size`` (edge count) below
+        ``INLINE_EDGES`` runs the call on the threadpool instead.
+
+        Raises:
+            Overloaded: if no admission slot is free.
+            BudgetExceeded: if the job ran past its CPU budget.
+            Cancelled: if ``request`` disconnected before the job finished.
+        """
+        slot = self._acquire()
+        if size < INLINE_EDGES:
+            try:
+                return await run_in_threadpool(fn, *args)
+            finally:
+                self._release(slot)
+        pool = self._get_pool()
+        try:
+            future = pool.submit(_run_job, slot, self.cpu_budget if budget is None else budget, fn, args)
+        except BrokenProcessPool:
+            self._release(slot)
+            self._discard_pool(pool)
+            raise
+        # the slot stays taken until the worker lets go of it
+        future.add_done_callback(lambda _: self._release(slot))
+        waiter = asyncio.wrap_future(future)
+        try:
+            while True:
+                done, _ = await asyncio.wait({waiter}, timeout=DISCONNECT_POLL_S)
+                if done:
+                    break
+                if request is not None and await request.is_disconnected():
+                    self._flags[slot] = 1
+                    future.cancel()
+                    raise Cancelled()
+            return waiter.result()
+        except BrokenProcessPool:
+            self._discard_pool(pool)
+            raise
+        except asyncio.CancelledError:
+            self._flags[slot] = 1
+            future.cancel()
+            raise
+
+
+    async def stream(self, request: Optional[Request], fn: Callable, *args: Any, size: int = INLINE_EDGES,
+                     budget: Optional[float] = None, max_items: int = 8) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Run ``fn(channel, *args)`` like :meth:`run` and yield the items it puts
+        on ``channel``, then ``("result", value)``.
+
+        The first item is ``("started", None)``, yielded once the job holds its
+        admission slot, so a handler can await it before it starts a response.
+        Closing the iterator cancels the job.
+
+        Raises:
+            Overloaded, BudgetExceeded, Cancelled: as :meth:`run`, along with
+                whatever ``fn`` raises.
+        """
+        channel = await run_in_threadpool(self.channel, max_items)
+        job = asyncio.ensure_future(self.run(request, fn, channel, *args, size=size, budget=budget))
+        try:
+            # run() takes its slot before its first await
+            await asyncio.sleep(0)
+            if job.done():
+                job.result()
+            yield "started", None
+            while not job.done():
+                try:
+                    item = await run_in_threadpool(channel.get, DISCONNECT_POLL_S)
+                except queue.Empty:
+                    continue
+                yield item
+            while True:
+                try:
+                    item = await run_in_threadpool(channel.get, 0)
+                except queue.Empty:
+                    break
+                yield item
+            yield "result", job.result()
+        finally:
+            channel.close()
+            job.cancel()
+            if job.done() and not job.cancelled():
+                # retrieved, so an unread failure is not reported as lost
+                job.exception()
+
+
+compute = ComputeExecutor()
@@ -0,0 +1,288 @@
+# backend/app/failures.py
+"""
+Single-failure what-if analysis.
+
+For every source one shortest-path tree is built. A failed edge or node only
+changes the routes to the nodes below it in that tree, so for each tree
+element only that subtree is re-solved. The subtree's distances are seeded
+from the arcs entering it from the rest of the tree, whose distances cannot
+change, and then settled with a Dijkstra confined to the subtree. Elements no
+tree uses are never evaluated. :func:`run_failure_sweep` spreads the sources
+over jobs of the shared compute executor, so a sweep takes admission slots
+and CPU budget like any other search.
+
+Per element the sweep reports how many routes it carries, how many of them
+get disconnected or longer, and their stretch (new / old distance).
+"""
+
+import asyncio
+import heapq
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from starlette.requests import Request
+
+from .algorithms import dijkstra_tree
+from .executor import compute
+from .graph import CompiledGraph
+
+ELEMENTS = ("edges", "nodes", "both")
+RANKINGS = ("disconnected", "stretch", "routes")
+MAX_SWEEP_SOURCES = 5000
+# new distances within this relative margin of the old one are not degradations
+STRETCH_RTOL = 1e-9
+
+# per element: routes, disconnected, degraded, stretch sum, stretch max, added distance
+_ROUTES, _DISCONNECTED, _DEGRADED, _STRETCH_SUM, _STRETCH_MAX, _ADDED = range(6)
+
+
+def _subtrees(prev: List[int], order: List[int], s: int) -> Tuple[List[int], List[int], List[int]]:
+    """Preorder of the tree rooted at ``s`` and each node's ``[tin, tout)`` span in it."""
+    n = len(prev)
+    children: Dict[int, List[int]] = {}
+    for v in order:
+        if v != s:
+            children.setdefault(prev[v], []).append(v)
+    pre: List[int] = []
+    tin = [0]*n
+    tout = [0]*n
+    stack = [(s, False)]
+    while stack:
+        u, done = stack.pop()
+        if done:
+            tout[u] = len(pre)
+            continue
+        tin[u] = len(pre)
+        pre.append(u)
+        stack.append((u, True))
+        for v in children.get(u, ()):
+            stack.append((v, False))
+    return pre, tin, tout
+
+
+def sweep_sources(graph: CompiledGraph, sources: Sequence[int], targets: Optional[Sequence[int]],
+                  elements: str = "both", directed: bool = False) -> Dict[Tuple[str, int], List[float]]:
+    """Failure statistics accumulated over the trees of ``sources``, keyed by ("edge" | "node", index)."""
+    n = graph.n
+    offsets, heads, weights = graph.csr(directed).lists()
+    out_edges = graph.arc_edges(directed).tolist()
+    r_offsets, tails, r_weights = graph.reverse_csr(directed).lists()
+    in_edges = graph.arc_edges(directed, reverse=True).tolist()
+    wanted = [True]*n if targets is None else [False]*n
+    for t in targets or ():
+        wanted[t] = True
+    new = [math.inf]*n
+    stats: Dict[Tuple[str, int], List[float]] = {}
+
+    def reroute(dist, tin, sub: List[int], lo: int, hi: int, seeds: List[Tuple[float, int]],
+                dead_node: int, dead_edge: int) -> None:
+        """Settle ``sub`` (preorder span ``[lo, hi)``) from the boundary ``seeds`` into ``new``."""
+        for b in sub:
+            new[b] = math.inf
+        pq = []
+        for d, b in seeds:
+            if d < new[b]:
+                new[b] = d
+                pq.append((d, b))
+        heapq.heapify(pq)
+        while pq:
+            d, u = heapq.heappop(pq)
+            if d > new[u]:
+                continue
+            for j in range(offsets[u], offsets[u+1]):
+                v = heads[j]
+                if not lo <= tin[v] < hi or v == dead_node or out_edges[j] == dead_edge:
+                    continue
+                nd = d + weights[j]
+                if nd < new[v]:
+                    new[v] = nd
+                    heapq.heappush(pq, (nd, v))
+
+    def account(key: Tuple[str, int], dist, sub: List[int], dead_node: int) -> None:
+        row = stats.get(key)
+        if row is None:
+            row = stats[key] = [0, 0, 0, 0.0, 0.0, 0.0]
+        for x in sub:
+            if x == dead_node or not wanted[x]:
+                continue
+            row[_ROUTES] += 1
+            old, nd = dist[x], new[x]
+            if nd == math.inf:
+                row[_DISCONNECTED] += 1
+            elif nd > old + STRETCH_RTOL * max(1.0, abs(old)):
+                row[_DEGRADED] += 1
+                row[_ADDED] += nd - old
+                if old > 0:
+                    stretch = nd / old
+                    row[_STRETCH_SUM] += stretch
+                    row[_STRETCH_MAX] = max(row[_STRETCH_MAX], stretch)
+
+    for s in sources:
+        dist, prev, order = dijkstra_tree(graph, s, directed)
+        pre, tin, tout = _subtrees(prev, order, s)
+        for v in order:
+            if v == s:
+                continue
+            lo, hi = tin[v], tout[v]
+            sub = pre[lo:hi]
+            if not any(wanted[x] for x in sub):
+                continue
+            # arcs entering the subtree from the rest of the tree, whose distances stay put;
+            # those into v itself are kept apart, as they differ per failed edge
+            seeds = []
+            for b in sub:
+                if b == v:
+                    continue
+                for j in range(r_offsets[b], r_offsets[b+1]):
+                    a = tails[j]
+                    if not lo <= tin[a] < hi and dist[a] < math.inf:
+                        seeds.append((dist[a] + r_weights[j], b))
+            if elements != "nodes":
+                # every edge carrying the tree arc prev[v] -> v: parallel copies as short as it
+                # (a tie costs nothing to lose); longer ones carry no route and only serve as detours
+                u = prev[v]
+                tight = dist[v] + STRETCH_RTOL * max(1.0, abs(dist[v]))
+                entries = [(tails[j], in_edges[j], dist[tails[j]] + r_weights[j])
+                           for j in range(r_offsets[v], r_offsets[v+1])
+                           if not lo <= tin[tails[j]] < hi and dist[tails[j]] < math.inf]
+                for a, e, d in entries:
+                    if a != u or d > tight:
+                        continue
+                    into_v = [(d, v) for _, f, d in entries if f != e]
+                    reroute(dist, tin, sub, lo, hi, seeds + into_v, -1, e)
+                    account(("edge", e), dist, sub, -1)
+            if elements != "edges" and hi - lo > 1:
+                reroute(dist, tin, sub, lo, hi, seeds, v, -1)
+                account(("node", v), dist, sub, v)
+    return stats
+
+
+def _merge(into: Dict[Tuple[str, int], List[float]], part: Dict[Tuple[str, int], List[float]]) -> None:
+    for key, row in part.items():
+        acc = into.get(key)
+        if acc is None:
+            into[key] = row
+            continue
+        for i in (_ROUTES, _DISCONNECTED, _DEGRADED, _STRETCH_SUM, _ADDED):
+            acc[i] += row[i]
+        acc[_STRETCH_MAX] = max(acc[_STRETCH_MAX], row[_STRETCH_MAX])
+
+
+def plan_sweep(graph: CompiledGraph, sources: Optional[Sequence[str]], targets: Optional[Sequence[str]],
+               elements: str, rank_by: str) -> Tuple[List[int], Optional[List[int]]]:
+    """
+    Validate a sweep and resolve its source and target indexes (targets None = every node).
+
+    Raises:
+        ValueError: for unknown node IDs or options, negative weights or too many sources.
+    """
+    if elements not in ELEMENTS:
+        raise ValueError(f"elements must be one of {', '.join(ELEMENTS)}")
+    if rank_by not in RANKINGS:
+        raise ValueError(f"rank_by must be one of {', '.join(RANKINGS)}")
+    if graph.m and float(graph.weights.min()) < 0:
+        raise ValueError("failure analysis requires non-negative weights")
+    index = graph.index
+    unknown = [nid for nid in list(sources or ()) + list(targets or ()) if nid not in index]
+    if unknown:
+        raise ValueError(f"unknown nodes: {unknown[:5]}")
+    src = list(range(graph.n)) if sources is None else list(dict.fromkeys(index[nid] for nid in sources))
+    if len(src) > MAX_SWEEP_SOURCES:
+        raise ValueError(f"at most {MAX_SWEEP_SOURCES} sources per sweep")
+    dst = None if targets is None else sorted({index[nid] for nid in targets})
+    return src, dst
+
+
+def rank_sweep(graph: CompiledGraph, stats: Dict[Tuple[str, int], List[float]], sources: int,
+               rank_by: str = "disconnected", top: Optional[int] = 20) -> Dict[str, Any]:
+    """Rankings and totals of merged :func:`sweep_sources` statistics over ``sources`` sources."""
+    ids = graph.ids
+    ranked: Dict[str, List[Dict[str, Any]]] = {"edges": [], "nodes": []}
+    # sorted so ties rank the same however the sources were split into jobs
+    for (kind, i), row in sorted(stats.items()):
+        if not row[_ROUTES]:
+            continue
+        degraded = row[_DEGRADED]
+        entry = {
+            "routes": row[_ROUTES],
+            "disconnected": row[_DISCONNECTED],
+            "degraded": degraded,
+            "mean_stretch": round(row[_STRETCH_SUM] / degraded, 6) if degraded else None,
+            "max_stretch": round(row[_STRETCH_MAX], 6) if degraded else None,
+            "added_distance": row[_ADDED],
+        }
+        if kind == "edge":
+            ranked["edges"].append({"index": i, "source": ids[int(graph.src[i])], "target": ids[int(graph.dst[i])],
+                                    "weight": float(graph.weights[i]), **entry})
+        else:
+            ranked["nodes"].append({"node": ids[i], **entry})
+    if rank_by == "disconnected":
+        key = lambda r: (r["disconnected"], r["added_distance"], r["routes"])
+    elif rank_by == "stretch":
+        key = lambda r: (r["mean_stretch"] or 0.0, r["disconnected"], r["routes"])
+    else:
+        key = lambda r: (r["routes"], r["disconnected"], r["added_distance"])
+    out: Dict[str, Any] = {}
+    for kind, rows in ranked.items():
+        rows.sort(key=key, reverse=True)
+        out[kind] = rows if top is None else rows[:top]
+    out["totals"] = {"sources": sources, "edges_affecting_routes": len(ranked["edges"]),
+                     "nodes_affecting_routes": len(ranked["nodes"])}
+    return out
+
+
+def failure_sweep(graph: CompiledGraph, sources: Optional[Sequence[str]] = None,
+                  targets: Optional[Sequence[str]] = None, elements: str = "both", directed: bool = False,
+                  rank_by: str = "disconnected", top: Optional[int] = 20) -> Dict[str, Any]:
+    """
+    Impact of every single edge and node failure on the routes from ``sources`` to ``targets``, in-process.
+
+    Args:
+        graph: Compiled topology with non-negative weights.
+        sources: Source node IDs (all nodes when None).
+        targets: Target node IDs (all nodes when None).
+        elements: ``edges``, ``nodes`` or ``both``.
+        directed: Follow edges one way only.
+        rank_by: ``disconnected`` (then added distance), ``stretch`` (mean) or ``routes``.
+        top: Number of ranked elements to return per kind (all when None).
+
+    Returns:
+        ``edges`` and ``nodes`` rankings plus sweep totals; elements that
+        carry no route are omitted.
+
+    Raises:
+        ValueError: for unknown node IDs or options, negative weights or too many sources.
+    """
+    src, dst = plan_sweep(graph, sources, targets, elements, rank_by)
+    return rank_sweep(graph, sweep_sources(graph, src, dst, elements, directed), len(src), rank_by, top)
+
+
+async def run_failure_sweep(request: Optional[Request], graph: CompiledGraph, sources: Optional[Sequence[str]] = None,
+                            targets: Optional[Sequence[str]] = None, elements: str = "both", directed: bool = False,
+                            rank_by: str = "disconnected", top: Optional[int] = 20, workers: Optional[int] = None,
+                            budget: Optional[float] = None) -> Dict[str, Any]:
+    """
+    :func:`failure_sweep` with the sources spread over ``workers`` compute
+    jobs (one per compute worker when None). Each job takes an admission slot
+    and runs under ``budget``.
+
+    Raises:
+        ValueError: as :func:`failure_sweep`.
+        Overloaded, BudgetExceeded, Cancelled: from the executor; the other
+            jobs of the sweep are cancelled.
+    """
+    src, dst = plan_sweep(graph, sources, targets, elements, rank_by)
+    jobs = max(1, min(compute.workers if workers is None else workers, compute.workers, len(src)))
+    tasks = [asyncio.ensure_future(compute.run(request, sweep_sources, graph, src[i::jobs], dst, elements, directed,
+                                               size=graph.m, budget=budget))
+             for i in range(jobs)]
+    try:
+        parts = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    stats: Dict[Tuple[str, int], List[float]] = {}
+    for part in parts:
+        _merge(stats, part)
+    return rank_sweep(graph, stats, len(src), rank_by, top)
@@ -0,0 +1,298 @@
+# backend/app/generators.py
+"""
+Random topology generators for stress tests.
+
+Every model is NumPy-vectorized and driven by a single seeded
+``numpy.random.Generator``, so the same request always yields the same
+topology. Generators return flat arrays; :func:`to_topology` and
+:func:`iter_ndjson` turn them into the JSON shape (the latter chunk by chunk,
+without materializing per-node or per-edge objects).
+
+Models:
+    gnp: Erdős–Rényi over ordered pairs, each arc kept with probability
+        ``density``; positions are drawn by geometric skip sampling, so the
+        cost is proportional to the number of arcs rather than ``n**2``.
+    gnm: exactly ``edges`` arcs drawn uniformly without replacement.
+    geometric: undirected edge between nodes closer than ``radius``, weighted
+        by their Euclidean distance (rounded up, so coordinates stay an
+        admissible A* heuristic).
+    barabasi-albert: preferential attachment, ``attach`` edges per new node
+        (Batagelj–Brandes, with the copy chains resolved vectorially).
+    grid: 4-neighbour lattice.
+    fat-tree: k-ary fat tree (core, aggregation, edge switches and hosts);
+        the node count follows from ``arity``.
+"""
+
+import math
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+MODELS = ("gnp", "gnm", "geometric", "barabasi-albert", "grid", "fat-tree")
+MAX_GENERATED_NODES = 2_000_000
+MAX_GENERATED_EDGES = 20_000_000
+WIDTH = (50.0, 900.0)
+HEIGHT = (50.0, 600.0)
+CHUNK = 1 << 16
+_SAMPLE_CHUNK = 1 << 20
+
+
+class GeneratedTopology:
+    """Nodes ``n0..n{n-1}`` with coordinates, and arcs as parallel arrays."""
+
+    def __init__(self, x: np.ndarray, y: np.ndarray, src: np.ndarray, dst: np.ndarray,
+                 weights: np.ndarray, seed: int, model: str):
+        self.x = x
+        self.y = y
+        self.src = src
+        self.dst = dst
+        self.weights = weights
+        self.seed = seed
+        self.model = model
+
+    @property
+    def n(self) -> int:
+        return int(self.x.shape[0])
+
+    @property
+    def m(self) -> int:
+        return int(self.src.shape[0])
+
+    def ids(self) -> List[str]:
+        return [f"n{i}" for i in range(self.n)]
+
+
+def _check_edges(count: float) -> None:
+    if count > MAX_GENERATED_EDGES:
+        raise ValueError(f"would generate about {int(count)} edges (limit {MAX_GENERATED_EDGES})")
+
+
+def _uniform_points(rng: np.random.Generator, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    return rng.uniform(*WIDTH, size=n), rng.uniform(*HEIGHT, size=n)
+
+
+def _pair_index(k: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Map ``k`` in ``[0, n*(n-1))`` to the ordered pair ``(i, j)``, ``i != j``."""
+    i = k // (n - 1)
+    j = k % (n - 1)
+    return i, j + (j >= i)
+
+
+def gnp_arcs(rng: np.random.Generator, n: int, p: float) -> Tuple[np.ndarray, np.ndarray]:
+    if not 0.0 <= p <= 1.0:
+        raise ValueError("density must be between 0 and 1")
+    total = n * (n - 1)
+    if p == 0.0 or total == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    _check_edges(p * total)
+    chunks = []
+    pos = -1
+    while True:
+        # gap to the next kept pair is geometric: skip the pairs that are rejected
+        k = pos + np.cumsum(rng.geometric(p, size=_SAMPLE_CHUNK))
+        if k[-1] >= total:
+            chunks.append(k[k < total])
+            break
+        chunks.append(k)
+        pos = int(k[-1])
+    return _pair_index(np.concatenate(chunks), n)
+
+
+def gnm_arcs(rng: np.random.Generator, n: int, m: int) -> Tuple[np.ndarray, np.ndarray]:
+    total = n * (n - 1)
+    if not 0 <= m <= total:
+        raise ValueError(f"edges must be between 0 and {total}")
+    _check_edges(m)
+    if not m:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return _pair_index(np.sort(rng.choice(total, size=m, replace=False)), n)
+
+
+def geometric_edges(x: np.ndarray, y: np.ndarray, radius: float) -> Tuple[np.ndarray, np.ndarray]:
+    """All pairs ``i < j`` closer than ``radius``, found through a uniform cell grid."""
+    if radius <= 0:
+        raise ValueError("radius must be positive")
+    n = len(x)
+    area = (WIDTH[1] - WIDTH[0]) * (HEIGHT[1] - HEIGHT[0])
+    _check_edges(n * n * math.pi * radius * radius / area / 2)
+    # cells at least ``radius`` wide, and not many more cells than points
+    cell = max(radius, math.sqrt(area / max(n, 1)))
+    cx = ((x - WIDTH[0]) // cell).astype(np.int64)
+    cy = ((y - HEIGHT[0]) // cell).astype(np.int64)
+    ncx, ncy = int(cx.max(initial=0)) + 1, int(cy.max(initial=0)) + 1
+    cid = cx * ncy + cy
+    order = np.argsort(cid, kind="stable")
+    counts = np.bincount(cid, minlength=ncx * ncy)
+    starts = np.zeros(ncx * ncy + 1, dtype=np.int64)
+    np.cumsum(counts, out=starts[1:])
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+    r2 = radius * radius
+    srcs, dsts = [], []
+    # half of the 3x3 neighbourhood, so each cell pair is visited once
+    for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+        for lo in range(0, n, CHUNK):
+            a = order[lo:lo + CHUNK]
+            bx, by = cx[a] + dx, cy[a] + dy
+            ok = (bx < ncx) & (by >= 0) & (by < ncy)
+            a = a[ok]
+            b = bx[ok] * ncy + by[ok]
+            reps = counts[b]
+            total = int(reps.sum())
+            if not total:
+                continue
+            first = np.repeat(starts[b] - (np.cumsum(reps) - reps), reps)
+            j = order[first + np.arange(total)]
+            i = np.repeat(a, reps)
+            keep = (x[i] - x[j]) ** 2 + (y[i] - y[j]) ** 2 < r2
+            if dx == 0 and dy == 0:
+                keep &= rank[j] > rank[i]
+            srcs.append(i[keep])
+            dsts.append(j[keep])
+    if not srcs:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(srcs), np.concatenate(dsts)
+
+
+def barabasi_albert_edges(rng: np.random.Generator, n: int, attach: int) -> Tuple[np.ndarray, np.ndarray]:
+    if attach < 1:
+        raise ValueError("attach must be at least 1")
+    _check_edges(n * attach)
+    slots = 2 * n * attach
+    # even slot 2e holds the new node of edge e; odd slot 2e+1 copies a uniformly
+    # chosen earlier slot, which picks existing nodes proportionally to degree
+    ref = (rng.random(n * attach) * (np.arange(0, slots, 2) + 1)).astype(np.int64)
+    odd = ref % 2 == 1
+    while odd.any():
+        ref[odd] = ref[ref[odd] // 2]
+        odd = ref % 2 == 1
+    src = np.arange(n * attach, dtype=np.int64) // attach
+    dst = (ref // 2) // attach
+    keep = src != dst
+    return src[keep], dst[keep]
+
+
+def grid_edges(n: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    cols = max(1, math.ceil(math.sqrt(n)))
+    rows = max(1, math.ceil(n / cols))
+    idx = np.arange(n, dtype=np.int64)
+    right = idx[(idx % cols < cols - 1) & (idx + 1 < n)]
+    down = idx[idx + cols < n]
+    x = WIDTH[0] + (idx % cols) * ((WIDTH[1] - WIDTH[0]) / max(cols - 1, 1))
+    y = HEIGHT[0] + (idx // cols) * ((HEIGHT[1] - HEIGHT[0]) / max(rows - 1, 1))
+    return x, y, np.concatenate([right, down]), np.concatenate([right + 1, down + cols])
+
+
+def fat_tree_edges(k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    if k < 2 or k % 2:
+        raise ValueError("arity must be an even number >= 2")
+    half = k // 2
+    core, agg, edge, hosts = half * half, k * half, k * half, k * half * half
+    n = core + agg + edge + hosts
+    if n > MAX_GENERATED_NODES:
+        raise ValueError(f"fat tree would have {n} nodes (limit {MAX_GENERATED_NODES})")
+    # node layout: cores, then aggregation, edge and host layers pod by pod
+    pod = np.arange(k)
+    a = np.arange(agg)  # aggregation switch a sits in pod a // half
+    # aggregation switch i of a pod links to cores i*half .. i*half + half - 1
+    core_src = np.repeat(core + a, half)
+    core_dst = ((a % half)[:, None] * half + np.arange(half)).ravel()
+    # full bipartite aggregation <-> edge inside each pod
+    pa = (pod[:, None, None] * half + np.arange(half)[None, :, None]).repeat(half, axis=2)
+    pe = (pod[:, None, None] * half + np.arange(half)[None, None, :]).repeat(half, axis=1)
+    agg_src, agg_dst = core + pa.ravel(), core + agg + pe.ravel()
+    e = np.arange(edge)
+    host_src = np.repeat(core + agg + e, half)
+    host_dst = core + agg + edge + np.arange(hosts)
+    src = np.concatenate([core_src, agg_src, host_src]).astype(np.int64)
+    dst = np.concatenate([core_dst, agg_dst, host_dst]).astype(np.int64)
+
+    def spread(count: int) -> np.ndarray:
+        return WIDTH[0] + (np.arange(count) + 0.5) * ((WIDTH[1] - WIDTH[0]) / count)
+
+    x = np.concatenate([spread(core), spread(agg), spread(edge), spread(hosts)])
+    levels = np.linspace(*HEIGHT, 4)
+    y = np.concatenate([np.full(c, lvl) for c, lvl in zip((core, agg, edge, hosts), levels)])
+    return x, y, src, dst
+
+
+def generate(model: str = "gnp", nodes: int = 20, density: float = 0.1, max_weight: float = 10.0,
+             seed: Optional[int] = None, edges: Optional[int] = None, radius: Optional[float] = None,
+             attach: int = 2, arity: int = 4) -> GeneratedTopology:
+    """
+    Generate a topology with the given model (see the module docstring).
+
+    Weights are uniform in ``[1, max_weight]`` rounded to two decimals, except
+    for ``geometric``. When ``seed`` is None a fresh one is drawn and recorded
+    on the result so the topology can be reproduced.
+
+    Raises:
+        ValueError: on unknown models, invalid parameters, or requests beyond
+            ``MAX_GENERATED_NODES`` / ``MAX_GENERATED_EDGES``.
+    """
+    model = model.lower()
+    if model not in MODELS:
+        raise ValueError(f"unknown model {model!r}; expected one of {', '.join(MODELS)}")
+    if model != "fat-tree" and not 0 <= nodes <= MAX_GENERATED_NODES:
+        raise ValueError(f"nodes must be between 0 and {MAX_GENERATED_NODES}")
+    if max_weight < 1.0:
+        raise ValueError("max_weight must be at least 1")
+    if seed is None:
+        seed = int(np.random.SeedSequence().generate_state(1)[0])
+    rng = np.random.default_rng(seed)
+    weights = None
+    if model == "grid":
+        x, y, src, dst = grid_edges(nodes)
+    elif model == "fat-tree":
+        x, y, src, dst = fat_tree_edges(arity)
+    else:
+        x, y = (np.round(c, 2) for c in _uniform_points(rng, nodes))
+        if model == "gnp":
+            src, dst = gnp_arcs(rng, nodes, density)
+        elif model == "gnm":
+            src, dst = gnm_arcs(rng, nodes, min(nodes, nodes * (nodes - 1)) if edges is None else edges)
+        elif model == "barabasi-albert":
+            src, dst = barabasi_albert_edges(rng, nodes, attach)
+        else:
+            if radius is None:
+                # about six neighbours per node on average
+                area = (WIDTH[1] - WIDTH[0]) * (HEIGHT[1] - HEIGHT[0])
+                radius = math.sqrt(6.0 * area / (math.pi * max(nodes, 1)))
+            src, dst = geometric_edges(x, y, radius)
+            dist = np.hypot(x[src] - x[dst], y[src] - y[dst])
+            weights = np.maximum(np.ceil(dist * 100) / 100, 0.01)
+    if weights is None:
+        weights = np.round(rng.uniform(1.0, max_weight, size=len(src)), 2)
+    return GeneratedTopology(np.round(x, 2), np.round(y, 2), src.astype(np.int64), dst.astype(np.int64),
+                             weights.astype(np.float64), seed, model)
+
+
+def to_topology(gen: GeneratedTopology) -> Dict[str, Any]:
+    """The ``{"nodes": [...], "edges": [...]}`` form of a generated topology."""
+    ids = gen.ids()
+    nodes = [{"id": nid, "label": nid, "x": x, "y": y} for nid, x, y in zip(ids, gen.x.tolist(), gen.y.tolist())]
+    edges = [{"id": f"e{k}", "source": ids[a], "target": ids[b], "weight": w}
+             for k, (a, b, w) in enumerate(zip(gen.src.tolist(), gen.dst.tolist(), gen.weights.tolist()))]
+    return {"nodes": nodes, "edges": edges}
+
+
+def iter_ndjson(gen: GeneratedTopology) -> Iterator[bytes]:
+    """
+    Stream a generated topology as NDJSON: a ``meta`` line, then one ``node``
+    line per node and one ``edge`` line per edge, emitted in chunks.
+    """
+    yield (f'{{"type":"meta","model":"{gen.model}","seed":{gen.seed},'
+           f'"nodes":{gen.n},"edges":{gen.m}}}\n').encode()
+    for lo in range(0, gen.n, CHUNK):
+        xs = gen.x[lo:lo + CHUNK].tolist()
+        ys = gen.y[lo:lo + CHUNK].tolist()
+        yield "".join(
+            f'{{"type":"node","id":"n{i}","label":"n{i}","x":{x!r},"y":{y!r}}}\n'
+            for i, x, y in zip(range(lo, lo + len(xs)), xs, ys)).encode()
+    for lo in range(0, gen.m, CHUNK):
+        src = gen.src[lo:lo + CHUNK].tolist()
+        dst = gen.dst[lo:lo + CHUNK].tolist()
+        ws = gen.weights[lo:lo + CHUNK].tolist()
+        yield "".join(
+            f'{{"type":"edge","id":"e{k}","source":"n{a}","target":"n{b}","weight":{w!r}}}\n'
+            for k, a, b, w in zip(range(lo, lo + len(src)), src, dst, ws)).encode()
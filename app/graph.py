@@ -0,0 +1,280 @@
+# backend/app/graph.py
+"""
+Compiled graph representation shared by every algorithm.
+
+Node IDs are mapped to dense integers and edges are stored as
+compressed-sparse-row (CSR) arrays, so searches index flat lists instead of
+building dict-of-lists adjacencies per request. Compiled graphs are immutable
+and cached by a content hash of the topology.
+"""
+
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+GRAPH_CACHE_SIZE = 32
+
+
+class CSR:
+    """Adjacency in CSR form: the out-neighbours of ``u`` are
+    ``targets[offsets[u]:offsets[u + 1]]`` with matching ``weights``."""
+
+    __slots__ = ("offsets", "targets", "weights", "_lists")
+
+    def __init__(self, offsets: np.ndarray, targets: np.ndarray, weights: np.ndarray):
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self._lists = None
+
+    def lists(self):
+        """Python-list views of the arrays, for interpreter-level loops."""
+        if self._lists is None:
+            self._lists = (self.offsets.tolist(), self.targets.tolist(), self.weights.tolist())
+        return self._lists
+
+
+def build_csr(n: int, src: np.ndarray, dst: np.ndarray, weights: np.ndarray) -> CSR:
+    order = np.argsort(src, kind="stable")
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=offsets[1:])
+    return CSR(offsets, dst[order], weights[order])
+
+
+class EdgeIndex:
+    """Sorted ``(u, v)`` arc keys for vectorized weight lookups; parallel edges keep the lightest weight."""
+
+    __slots__ = ("n", "keys", "weights")
+
+    def __init__(self, n: int, src: np.ndarray, dst: np.ndarray, weights: np.ndarray):
+        keys = src * n + dst
+        order = np.lexsort((weights, keys))
+        keys, weights = keys[order], weights[order]
+        first = np.ones(keys.shape[0], dtype=bool)
+        first[1:] = keys[1:] != keys[:-1]
+        self.n = n
+        self.keys = keys[first]
+        self.weights = weights[first]
+
+    def lookup(self, us, vs) -> np.ndarray:
+        """Weight of each arc ``us[i] -> vs[i]``; NaN where there is no such arc."""
+        q = np.asarray(us, dtype=np.int64) * self.n + np.asarray(vs, dtype=np.int64)
+        if not self.keys.size:
+            return np.full(q.shape, np.nan)
+        pos = np.minimum(np.searchsorted(self.keys, q), self.keys.size - 1)
+        return np.where(self.keys[pos] == q, self.weights[pos], np.nan)
+
+
+class CompiledGraph:
+    """Immutable integer-indexed graph with lazily built CSR adjacencies."""
+
+    def __init__(self, ids: Sequence[str], src, dst, weights, x=None, y=None,
+                 fingerprint: Optional[str] = None):
+        self.ids: List[str] = list(ids)
+        self.index: Dict[str, int] = {nid: i for i, nid in enumerate(self.ids)}
+        self.n = len(self.ids)
+        self.src = np.asarray(src, dtype=np.int64)
+        self.dst = np.asarray(dst, dtype=np.int64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.x = np.full(self.n, np.nan) if x is None else np.asarray(x, dtype=np.float64)
+        self.y = np.full(self.n, np.nan) if y is None else np.asarray(y, dtype=np.float64)
+        self.fingerprint = fingerprint or fingerprint_arrays(self.ids, self.x, self.y, self.src, self.dst, self.weights)
+        self._csr: Dict[str, CSR] = {}
+        self._derived: Dict[Any, Any] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def m(self) -> int:
+        return int(self.src.shape[0])
+
+    def csr(self, directed: bool = False) -> CSR:
+        """Out-edges when ``directed``, otherwise every edge in both directions."""
+        key = "out" if directed else "both"
+        c = self._csr.get(key)
+        if c is None:
+            with self._lock:
+                c = self._csr.get(key)
+                if c is None:
+                    if directed:
+                        c = build_csr(self.n, self.src, self.dst, self.weights)
+                    else:
+                        c = build_csr(self.n,
+                                      np.concatenate([self.src, self.dst]),
+                                      np.concatenate([self.dst, self.src]),
+                                      np.concatenate([self.weights, self.weights]))
+                    self._csr[key] = c
+        return c
+
+    def reverse_csr(self, directed: bool = False) -> CSR:
+        """In-edges when ``directed``; identical to :meth:`csr` otherwise."""
+        if not directed:
+            return self.csr(False)
+        c = self._csr.get("in")
+        if c is None:
+            with self._lock:
+                c = self._csr.get("in")
+                if c is None:
+                    c = build_csr(self.n, self.dst, self.src, self.weights)
+                    self._csr["in"] = c
+        return c
+
+    def arc_sources(self, directed: bool = False) -> np.ndarray:
+        """Source node of every arc of :meth:`csr`, in CSR order."""
+        def build():
+            offsets = self.csr(directed).offsets
+            return np.repeat(np.arange(self.n, dtype=np.int64), np.diff(offsets))
+        return self.derived(("arc-sources", directed), build)
+
+    def arc_edges(self, directed: bool = False, reverse: bool = False) -> np.ndarray:
+        """Edge (position in ``src``/``dst``) behind every arc of :meth:`csr`, or of
+        :meth:`reverse_csr` with ``reverse``, in CSR order."""
+        reverse = reverse and directed
+        def build():
+            ids = np.arange(self.m, dtype=np.int64)
+            if directed:
+                keys = self.dst if reverse else self.src
+            else:
+                keys, ids = np.concatenate([self.src, self.dst]), np.concatenate([ids, ids])
+            return ids[np.argsort(keys, kind="stable")]
+        return self.derived(("arc-edges", directed, reverse), build)
+
+    def edge_index(self, directed: bool = False) -> EdgeIndex:
+        """Arc lookup over the same arcs as :meth:`csr`."""
+        def build():
+            if directed:
+                return EdgeIndex(self.n, self.src, self.dst, self.weights)
+            return EdgeIndex(self.n, np.concatenate([self.src, self.dst]), np.concatenate([self.dst, self.src]),
+                             np.concatenate([self.weights, self.weights]))
+        return self.derived(("edge-index", directed), build)
+
+    def path_weights(self, path: Sequence[int], directed: bool = False) -> np.ndarray:
+        """Weight of every hop of ``path`` (node indices); NaN for hops that are not arcs."""
+        if len(path) < 2:
+            return np.empty(0)
+        hops = np.asarray(path, dtype=np.int64)
+        return self.edge_index(directed).lookup(hops[:-1], hops[1:])
+
+    def derived(self, key, build: Callable[[], Any]):
+        """Memoize a structure computed from this graph (all-pairs tables, indexes, ...)."""
+        try:
+            return self._derived[key]
+        except KeyError:
+            pass
+        value = build()
+        return self._derived.setdefault(key, value)
+
+    def peek(self, key):
+        """A memoized structure, or None when it has not been built."""
+        return self._derived.get(key)
+
+    def forget(self, key) -> None:
+        self._derived.pop(key, None)
+
+    def labels(self, path: Iterable[int]) -> List[str]:
+        ids = self.ids
+        return [ids[i] for i in path]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_csr"] = {}
+        # connectivity indexes are small, and workers use them to reject unreachable queries
+        state["_derived"] = {k: v for k, v in self._derived.items() if k[0] == "connectivity"}
+        state.pop("_lock", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+def reconstruct(prev: List[int], s: int, t: int) -> List[int]:
+    """Walk a predecessor array back from ``t``; empty when ``s`` is not reached."""
+    path = []
+    cur = t
+    while cur != -1:
+        path.append(cur)
+        cur = prev[cur]
+    path.reverse()
+    if path and path[0] == s:
+        return path
+    return []
+
+
+def fingerprint_arrays(ids, x, y, src, dst, weights) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update("\x1f".join(ids).encode("utf-8"))
+    for arr, dtype in ((x, np.float64), (y, np.float64), (src, np.int64), (dst, np.int64), (weights, np.float64)):
+        h.update(b"\x1e")
+        h.update(np.ascontiguousarray(arr, dtype=dtype).tobytes())
+    return h.hexdigest()
+
+
+def _coord(v) -> float:
+    return math.nan if v is None else float(v)
+
+
+def _extract(nodes, edges):
+    ids = [n.id for n in nodes]
+    index = {nid: i for i, nid in enumerate(ids)}
+    for e in edges:
+        for nid in (e.source, e.target):
+            if nid not in index:
+                index[nid] = len(ids)
+                ids.append(nid)
+    x = np.full(len(ids), np.nan)
+    y = np.full(len(ids), np.nan)
+    x[:len(nodes)] = [_coord(n.x) for n in nodes]
+    y[:len(nodes)] = [_coord(n.y) for n in nodes]
+    src = np.fromiter((index[e.source] for e in edges), dtype=np.int64, count=len(edges))
+    dst = np.fromiter((index[e.target] for e in edges), dtype=np.int64, count=len(edges))
+    w = np.fromiter((e.weight for e in edges), dtype=np.float64, count=len(edges))
+    return ids, x, y, src, dst, w
+
+
+_cache: "OrderedDict[str, CompiledGraph]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def cache_get(fingerprint: str) -> Optional[CompiledGraph]:
+    with _cache_lock:
+        g = _cache.get(fingerprint)
+        if g is not None:
+            _cache.move_to_end(fingerprint)
+        return g
+
+
+def cache_put(graph: CompiledGraph) -> CompiledGraph:
+    with _cache_lock:
+        existing = _cache.get(graph.fingerprint)
+        if existing is not None:
+            _cache.move_to_end(graph.fingerprint)
+            return existing
+        _cache[graph.fingerprint] = graph
+        while len(_cache) > GRAPH_CACHE_SIZE:
+            _cache.popitem(last=False)
+        return graph
+
+
+def build_graph(nodes, edges) -> CompiledGraph:
+    """Compile Node/Edge lists without consulting or filling the shared cache."""
+    ids, x, y, src, dst, w = _extract(nodes, edges)
+    return CompiledGraph(ids, src, dst, w, x=x, y=y)
+
+
+def compile_graph(nodes, edges) -> CompiledGraph:
+    """
+    Compile Node/Edge lists into a :class:`CompiledGraph`, reusing a cached
+    instance when the same topology was compiled before.
+
+    Edge endpoints missing from ``nodes`` are added as coordinate-less nodes.
+    """
+    ids, x, y, src, dst, w = _extract(nodes, edges)
+    fp = fingerprint_arrays(ids, x, y, src, dst, w)
+    g = cache_get(fp)
+    if g is not None:
+        return g
+    return cache_put(CompiledGraph(ids, src, dst, w, x=x, y=y, fingerprint=fp))
@@ -0,0 +1,304 @@
+# backend/app/kpaths.py
+"""
+Multipath routing: the k shortest loopless paths (Yen) and equal-cost
+multipath (ECMP) DAGs.
+
+Both start from the shortest-path tree *into* the target (a reverse Dijkstra),
+whose distances ``h`` are exact lower bounds for every restricted search Yen
+runs:
+
+    * a spur search is A* guided by ``h``; it stops at the first popped node
+      whose tree path to the target avoids the blocked root nodes, since that
+      tree path is then an optimal completion. When the spur node's own tree
+      path is usable no search runs at all.
+    * accepted paths are kept in a prefix trie. A candidate stores only a
+      pointer to its root prefix in the trie plus its spur, and the arcs to
+      ban at a spur node are that trie node's children.
+    * Lawler's rule: a new path only spawns spurs from its deviation point on,
+      as earlier spur searches would repeat ones already done.
+
+The ECMP DAG holds every arc ``u -> v`` with ``ds[u] + w + h[v] == ds[t]``,
+``ds`` being the forward tree from the source.
+"""
+
+import heapq
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .algorithms import dijkstra_tree
+from .graph import CompiledGraph
+
+MAX_K = 1000
+MAX_ECMP_PATHS = 1000
+# relative tolerance for "equal cost"
+ECMP_RTOL = 1e-9
+
+
+def _check_weights(graph: CompiledGraph) -> None:
+    if graph.m and float(graph.weights.min()) < 0:
+        raise ValueError("multipath routing requires non-negative weights")
+
+
+class _Trie:
+    """Prefix trie of accepted paths; entry ``i`` is (node, cost from the source, parent entry)."""
+
+    def __init__(self, s: int):
+        self.node = [s]
+        self.cost = [0.0]
+        self.parent = [-1]
+        self.children: List[Dict[int, int]] = [{}]
+
+    def extend(self, at: int, nodes: List[int], costs: List[float]) -> List[int]:
+        """Insert the continuation ``nodes`` (with absolute costs) below entry ``at``; returns the new entries."""
+        out = []
+        for v, c in zip(nodes, costs):
+            nxt = self.children[at].get(v)
+            if nxt is None:
+                nxt = len(self.node)
+                self.node.append(v)
+                self.cost.append(c)
+                self.parent.append(at)
+                self.children.append({})
+                self.children[at][v] = nxt
+            out.append(nxt)
+            at = nxt
+        return out
+
+
+def k_shortest_paths(graph: CompiledGraph, s: int, t: int, k: int,
+                     directed: bool = False) -> Tuple[List[Tuple[List[int], float]], Dict[str, int]]:
+    """
+    The ``k`` shortest loopless paths from ``s`` to ``t``, in order of cost.
+
+    Args:
+        graph: Compiled topology with non-negative weights.
+        s: Source index.
+        t: Target index.
+        k: Number of paths wanted; fewer are returned when fewer exist.
+        directed: Follow edges one way only.
+
+    Returns:
+        ``([(path, cost), ...], counters)`` with paths as node indices.
+
+    Raises:
+        ValueError: for negative weights or ``k`` outside ``1..MAX_K``.
+    """
+    if not 1 <= k <= MAX_K:
+        raise ValueError(f"k must be between 1 and {MAX_K}")
+    _check_weights(graph)
+    counters = {"spur_searches": 0, "tree_completions": 0, "settled": 0, "candidates": 0}
+    h, nxt, _ = dijkstra_tree(graph, t, directed, reverse=True)
+    if h[s] == math.inf:
+        return [], counters
+    offsets, targets, weights = graph.csr(directed).lists()
+    n = graph.n
+    blocked = [False]*n
+
+    def tree_path(u: int) -> List[int]:
+        path = [u]
+        while u != t:
+            u = nxt[u]
+            path.append(u)
+        return path
+
+    def spur_path(u0: int, banned) -> Optional[Tuple[List[int], List[float]]]:
+        """Cheapest u0 -> t path avoiding blocked nodes and the banned first hops; costs relative to u0."""
+        clean: Dict[int, bool] = {u0: False, t: True}
+
+        def is_clean(u: int) -> bool:
+            # the tree path from u reaches t without touching a blocked node or u0
+            chain = []
+            while u not in clean:
+                if blocked[u]:
+                    clean[u] = False
+                    break
+                chain.append(u)
+                u = nxt[u]
+            ok = clean[u]
+            for v in chain:
+                clean[v] = ok
+            return ok
+
+        first = nxt[u0]
+        if u0 == t or (first not in banned and is_clean(first)):
+            counters["tree_completions"] += 1
+            path = tree_path(u0)
+            return path, [h[u0] - h[v] for v in path]
+        counters["spur_searches"] += 1
+        g = {u0: 0.0}
+        prev = {u0: -1}
+        done = set()
+        pq = [(h[u0], u0)]
+        while pq:
+            f, u = heapq.heappop(pq)
+            if u in done:
+                continue
+            done.add(u)
+            counters["settled"] += 1
+            if u != u0 and is_clean(u):
+                head = []
+                v = u
+                while v != -1:
+                    head.append(v)
+                    v = prev[v]
+                head.reverse()
+                tail = tree_path(u)[1:]
+                if not set(tail).intersection(head):  # zero-weight ties can loop back
+                    gu = g[u]
+                    return head + tail, [g[v] for v in head] + [gu + h[u] - h[v] for v in tail]
+                clean[u] = False
+            gu = g[u]
+            for j in range(offsets[u], offsets[u+1]):
+                v = targets[j]
+                if blocked[v] or v in done or (u == u0 and v in banned) or h[v] == math.inf:
+                    continue
+                nd = gu + weights[j]
+                if nd < g.get(v, math.inf):
+                    g[v] = nd
+                    prev[v] = u
+                    heapq.heappush(pq, (nd + h[v], v))
+        return None
+
+    first_path = tree_path(s)
+    trie = _Trie(s)
+    entries = [0] + trie.extend(0, first_path[1:], [h[s] - h[v] for v in first_path[1:]])
+    accepted = [(first_path, entries, 0)]  # nodes, trie entries, deviation index
+    seen = {tuple(first_path)}
+    heap: List[Tuple[float, int, int, int, List[int], List[float]]] = []
+    seq = 0
+    while len(accepted) < k:
+        path, entries, deviation = accepted[-1]
+        for v in path[:deviation]:
+            blocked[v] = True
+        for i in range(deviation, len(path) - 1):
+            u0, root = path[i], entries[i]
+            found = spur_path(u0, trie.children[root])
+            if found is not None:
+                spur, rel = found
+                full = tuple(path[:i]) + tuple(spur)
+                if full not in seen:
+                    seen.add(full)
+                    base = trie.cost[root]
+                    seq += 1
+                    counters["candidates"] += 1
+                    heapq.heappush(heap, (base + rel[-1], seq, root, i, spur, [base + c for c in rel]))
+            blocked[u0] = True
+        for v in path[:-1]:
+            blocked[v] = False
+        if not heap:
+            break
+        _, _, root, i, spur, costs = heapq.heappop(heap)
+        new = trie.extend(root, spur[1:], costs[1:])
+        prefix = []
+        e = root
+        while e != -1:
+            prefix.append(e)
+            e = trie.parent[e]
+        prefix.reverse()
+        entries = prefix + new
+        accepted.append(([trie.node[e] for e in entries], entries, i))
+    return [(p, trie.cost[e[-1]]) for p, e, _ in accepted], counters
+
+
+def ecmp_dag(graph: CompiledGraph, s: int, t: int, directed: bool = False,
+             limit: int = 0) -> Dict[str, Any]:
+    """
+    Every arc on some shortest ``s -> t`` path.
+
+    Args:
+        graph: Compiled topology with non-negative weights.
+        s: Source index.
+        t: Target index.
+        directed: Follow edges one way only.
+        limit: Also enumerate up to this many of the equal-cost paths.
+
+    Returns:
+        ``distance`` (None if unreachable), ``arcs`` as ``(u, v, w)`` index
+        triples, ``next_hops`` per DAG node, ``path_count`` (None when
+        zero-weight cycles make it unbounded) and ``paths``.
+
+    Raises:
+        ValueError: for negative weights or ``limit`` above MAX_ECMP_PATHS.
+    """
+    if not 0 <= limit <= MAX_ECMP_PATHS:
+        raise ValueError(f"limit must be between 0 and {MAX_ECMP_PATHS}")
+    _check_weights(graph)
+    h, _, _ = dijkstra_tree(graph, t, directed, reverse=True)
+    empty = {"distance": None, "arcs": [], "next_hops": {}, "path_count": 0, "paths": []}
+    if h[s] == math.inf:
+        return empty
+    ds, _, _ = dijkstra_tree(graph, s, directed)
+    total = h[s]
+    csr = graph.csr(directed)
+    src, dst, w = graph.arc_sources(directed), csr.targets, csr.weights
+    ds_arr, h_arr = np.asarray(ds), np.asarray(h)
+    with np.errstate(invalid="ignore"):
+        slack = ds_arr[src] + w + h_arr[dst] - total
+    on = np.abs(slack) <= ECMP_RTOL * max(1.0, abs(total))
+    keys, first = np.unique(src[on] * graph.n + dst[on], return_index=True)
+    us, vs, ws = (keys // graph.n).tolist(), (keys % graph.n).tolist(), w[on][first].tolist()
+    next_hops: Dict[int, List[int]] = {}
+    indegree: Dict[int, int] = {s: 0}
+    for u, v in zip(us, vs):
+        next_hops.setdefault(u, []).append(v)
+        indegree[v] = indegree.get(v, 0) + 1
+        indegree.setdefault(u, 0)
+    # path counts in topological order (Kahn); a leftover node means a zero-weight cycle
+    count = {s: 1}
+    ready = [u for u, d in indegree.items() if d == 0]
+    visited = 0
+    while ready:
+        u = ready.pop()
+        visited += 1
+        for v in next_hops.get(u, ()):
+            count[v] = count.get(v, 0) + count.get(u, 0)
+            indegree[v] -= 1
+            if indegree[v] == 0:
+                ready.append(v)
+    acyclic = visited == len(indegree)
+    paths: List[List[int]] = []
+    if limit:
+        stack = [(s, [s])]
+        while stack and len(paths) < limit:
+            u, path = stack.pop()
+            if u == t:
+                paths.append(path)
+                continue
+            for v in reversed(next_hops.get(u, ())):
+                if v not in path:
+                    stack.append((v, path + [v]))
+    return {"distance": total, "arcs": list(zip(us, vs, ws)), "next_hops": next_hops,
+            "path_count": count.get(t, 0) if acyclic else None, "paths": paths}
+
+
+def _endpoints(graph: CompiledGraph, source: str, target: str) -> Tuple[int, int]:
+    s, t = graph.index.get(source), graph.index.get(target)
+    if s is None or t is None:
+        raise ValueError("source/target must be in topology")
+    return s, t
+
+
+def run_k_shortest(graph: CompiledGraph, source: str, target: str, k: int,
+                   options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """JSON-ready :func:`k_shortest_paths` result for node IDs."""
+    s, t = _endpoints(graph, source, target)
+    paths, counters = k_shortest_paths(graph, s, t, k, (options or {}).get("directed", False))
+    return {"paths": [{"path": graph.labels(p), "distance": cost, "hops": len(p) - 1} for p, cost in paths],
+            "counters": counters}
+
+
+def run_ecmp(graph: CompiledGraph, source: str, target: str, limit: int = 0,
+             options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """JSON-ready :func:`ecmp_dag` result for node IDs."""
+    s, t = _endpoints(graph, source, target)
+    dag = ecmp_dag(graph, s, t, (options or {}).get("directed", False), limit)
+    ids = graph.ids
+    return {
+        "distance": dag["distance"],
+        "edges": [{"source": ids[u], "target": ids[v], "weight": w} for u, v, w in dag["arcs"]],
+        "next_hops": {ids[u]: graph.labels(vs) for u, vs in dag["next_hops"].items()},
+        "path_count": dag["path_count"],
+        "paths": [graph.labels(p) for p in dag["paths"]],
+    }
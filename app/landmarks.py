@@ -0,0 +1,137 @@
+# backend/app/landmarks.py
+"""
+Landmark distance tables for ALT (A*, landmarks, triangle inequality).
+
+For a landmark ``L`` the triangle inequality gives the admissible bounds
+``d(v, t) >= d(L, t) - d(L, v)`` and ``d(v, t) >= d(v, L) - d(t, L)``, which
+hold for any non-negative weights regardless of node coordinates. Tables are
+memoized on the compiled graph and can be persisted next to a saved topology.
+"""
+
+import os
+from typing import List, Optional
+
+import numpy as np
+
+from .algorithms import dijkstra_tree
+from .binfmt import saved_graph
+from .graph import CompiledGraph
+from .storage import artifact_path
+
+DEFAULT_LANDMARKS = 16
+LANDMARK_SUFFIX = ".landmarks.npz"
+LANDMARK_DIRECTED_SUFFIX = ".landmarks-directed.npz"
+
+
+class LandmarkTable:
+    def __init__(self, landmarks: np.ndarray, from_dist: np.ndarray, to_dist: np.ndarray,
+                 directed: bool, fingerprint: str):
+        self.landmarks = landmarks
+        self.from_dist = from_dist  # d(L, v), shape (k, n)
+        self.to_dist = to_dist      # d(v, L), shape (k, n)
+        self.directed = directed
+        self.fingerprint = fingerprint
+
+    def heuristic(self, t: int) -> List[float]:
+        """Lower bound on d(v, t) for every node ``v``."""
+        if not len(self.landmarks):
+            return [0.0] * self.from_dist.shape[1]
+        with np.errstate(invalid="ignore"):
+            bound = self.from_dist[:, t, None] - self.from_dist
+            if self.directed:
+                bound = np.fmax(bound, self.to_dist - self.to_dist[:, t, None])
+            else:
+                bound = np.abs(bound)
+            h = np.fmax.reduce(bound, axis=0)
+        h[np.isnan(h)] = 0.0
+        return np.maximum(h, 0.0).tolist()
+
+    def save(self, path: str) -> None:
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, landmarks=self.landmarks, from_dist=self.from_dist, to_dist=self.to_dist,
+                     directed=np.array(self.directed), fingerprint=np.array(self.fingerprint))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "LandmarkTable":
+        with np.load(path) as data:
+            return cls(data["landmarks"], data["from_dist"], data["to_dist"],
+                       bool(data["directed"]), str(data["fingerprint"]))
+
+
+def build_landmarks(graph: CompiledGraph, k: int = DEFAULT_LANDMARKS, directed: bool = False) -> LandmarkTable:
+    """
+    Pick ``k`` landmarks by farthest-point selection and tabulate their distances.
+
+    Raises:
+        ValueError: if the graph has negative weights.
+    """
+    if graph.m and graph.weights.min() < 0:
+        raise ValueError("landmark heuristics require non-negative weights")
+    k = min(k, graph.n)
+    n = graph.n
+    chosen: List[int] = []
+    from_rows, to_rows = [], []
+    closest = np.full(n, np.inf)
+    reached = np.zeros(n, dtype=bool)
+    degree = np.diff(graph.csr(directed).offsets)
+    nxt = int(np.argmax(degree)) if n else 0
+    while len(chosen) < k:
+        chosen.append(nxt)
+        d_from = np.array(dijkstra_tree(graph, nxt, directed)[0])
+        d_to = np.array(dijkstra_tree(graph, nxt, True, reverse=True)[0]) if directed else d_from
+        from_rows.append(d_from)
+        to_rows.append(d_to)
+        finite = np.isfinite(d_from)
+        reached |= finite
+        closest = np.minimum(closest, np.where(finite, d_from, np.inf))
+        # prefer connected nodes no landmark reaches yet (other components), then the farthest one
+        score = np.where(reached, closest, np.where(degree > 0, np.inf, -1.0))
+        score[chosen] = -1.0
+        if score.max() < 0:
+            break
+        nxt = int(np.argmax(score))
+    shape = (len(chosen), n)
+    return LandmarkTable(np.array(chosen, dtype=np.int64),
+                         np.array(from_rows).reshape(shape), np.array(to_rows).reshape(shape),
+                         directed, graph.fingerprint)
+
+
+def landmark_suffix(directed: bool = False) -> str:
+    return LANDMARK_DIRECTED_SUFFIX if directed else LANDMARK_SUFFIX
+
+
+def landmarks_for(graph: CompiledGraph, directed: bool = False, k: int = DEFAULT_LANDMARKS,
+                  path: Optional[str] = None) -> LandmarkTable:
+    """
+    Memoized landmark table for ``graph``. When ``path`` is given a stored table
+    with a matching fingerprint is reused, and a freshly built one is written there.
+    """
+    def build():
+        if path and os.path.exists(path):
+            try:
+                table = LandmarkTable.load(path)
+                if table.fingerprint == graph.fingerprint and table.directed == directed and len(table.landmarks) >= min(k, graph.n):
+                    return table
+            except (OSError, ValueError, KeyError):
+                pass
+        table = build_landmarks(graph, k, directed)
+        if path:
+            table.save(path)
+        return table
+
+    return graph.derived(("landmarks", bool(directed), k), build)
+
+
+def precompute_landmarks(tid: str) -> None:
+    """Build and persist the binary copy and undirected landmark table of a saved topology."""
+    path = artifact_path(tid, LANDMARK_SUFFIX)
+    graph = saved_graph(tid)
+    if path is None or graph is None:
+        return
+    try:
+        landmarks_for(graph, False, path=path)
+    except ValueError:
+        # negative weights: ALT falls back to building nothing for this topology
+        pass
@@ -0,0 +1,301 @@
+# backend/app/lod.py
+"""
+Level-of-detail views of large topologies.
+
+The bounding square of the node coordinates is split into grids of
+``2^l x 2^l`` cells for ``l = 0, 1, ...``. At level ``l`` every non-empty cell
+becomes one cluster, placed at the centroid of its nodes. Edges between two
+clusters are merged into one aggregated edge, which records how many edges it
+stands for and their lightest weight. Levels are added until the clusters
+stop shrinking the graph (``LEAF_RATIO``). One last level holds the nodes and
+edges themselves.
+
+Each level keeps its items sorted by grid cell, and that ordering is its
+spatial index. A viewport covers one contiguous key range per grid column, so
+the visible items come out of a handful of binary searches instead of a scan.
+Edges are bucketed by the items they touch, in the same order, so a view only
+reads the edges of the items it shows.
+Nodes without coordinates are left out of every level. Edges are drawn as
+lines and are aggregated without direction.
+
+The hierarchy is memoized on the compiled graph, so a saved topology or a
+session builds it once per version.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .graph import CompiledGraph
+
+MAX_DEPTH = 16
+# stop coarsening once a level keeps more than this share of the nodes
+LEAF_RATIO = 0.5
+DEFAULT_MAX_NODES = 5000
+DEFAULT_MAX_EDGES = 20000
+
+
+class LODLevel:
+    """
+    One level: items sorted by cell key ``cx * side + cy``, with positions,
+    sizes (nodes per item) and undirected edges between item positions.
+    ``incident[inc_offsets[i]:inc_offsets[i+1]]`` are the edges touching item ``i``.
+    """
+
+    __slots__ = ("depth", "side", "keys", "x", "y", "size", "nodes", "src", "dst", "count", "weight",
+                 "inc_offsets", "incident")
+
+    def __init__(self, depth: int, keys: np.ndarray, x: np.ndarray, y: np.ndarray, size: np.ndarray,
+                 src: np.ndarray, dst: np.ndarray, count: np.ndarray, weight: np.ndarray,
+                 nodes: Optional[np.ndarray] = None):
+        self.depth = depth
+        self.side = 1 << depth
+        self.keys = keys
+        self.x = x
+        self.y = y
+        self.size = size
+        self.nodes = nodes  # graph node per item on the node level, None for cluster levels
+        self.src = src
+        self.dst = dst
+        self.count = count
+        self.weight = weight
+        ends = np.concatenate([src, dst])
+        self.inc_offsets = np.zeros(keys.size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ends, minlength=keys.size), out=self.inc_offsets[1:])
+        order = np.argsort(ends, kind="stable")
+        self.incident = np.where(order < src.size, order, order - src.size)
+
+    @property
+    def clustered(self) -> bool:
+        return self.nodes is None
+
+    def cell_range(self, lo: Tuple[int, int], hi: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Start and end positions of the items in cells ``lo..hi`` (inclusive), one pair per column."""
+        cols = np.arange(lo[0], hi[0] + 1, dtype=np.int64) * self.side
+        return (np.searchsorted(self.keys, cols + lo[1], side="left"),
+                np.searchsorted(self.keys, cols + hi[1], side="right"))
+
+    def touching(self, items: np.ndarray) -> np.ndarray:
+        """Sorted edges with an endpoint among ``items``."""
+        pos = _concat_ranges(self.inc_offsets[items], self.inc_offsets[items + 1])
+        return np.unique(self.incident[pos])
+
+    def edge_count(self, starts: np.ndarray, ends: np.ndarray, limit: int) -> int:
+        """
+        Edges touching the items in ranges ``starts..ends``, compared against
+        ``limit``: the result is at most ``limit`` exactly when the true count is.
+        """
+        entries = int((self.inc_offsets[ends] - self.inc_offsets[starts]).sum())
+        # each edge has one or two entries, so the count lies in [entries / 2, entries]
+        if entries <= limit or entries > 2 * limit:
+            return entries
+        pos = _concat_ranges(self.inc_offsets[starts], self.inc_offsets[ends])
+        return int(np.unique(self.incident[pos]).size)
+
+
+def _concat_ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64)
+    shift = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+    return shift + np.arange(total, dtype=np.int64)
+
+
+def _member(values: np.ndarray, items: np.ndarray) -> np.ndarray:
+    """Whether each of ``values`` is in the sorted array ``items``."""
+    pos = np.searchsorted(items, values)
+    return (pos < items.size) & (items[np.minimum(pos, items.size - 1)] == values)
+
+
+def _aggregate(a: np.ndarray, b: np.ndarray, w: np.ndarray, k: int) -> Tuple[np.ndarray, ...]:
+    """Merge edges between the same two items (either direction), dropping those inside one item."""
+    lo, hi = np.minimum(a, b), np.maximum(a, b)
+    keep = lo != hi
+    pair = lo[keep] * k + hi[keep]
+    keys, inverse = np.unique(pair, return_inverse=True)
+    count = np.bincount(inverse, minlength=keys.size)
+    weight = np.full(keys.size, np.inf)
+    np.minimum.at(weight, inverse, w[keep])
+    return keys // max(k, 1), keys % max(k, 1), count, weight
+
+
+class LODHierarchy:
+    """
+    Multilevel grid coarsening of one graph; ``levels[0]`` is the coarsest and
+    ``levels[-1]`` the nodes themselves.
+    """
+
+    def __init__(self, graph: CompiledGraph):
+        self.ids = graph.ids
+        placed = np.isfinite(graph.x) & np.isfinite(graph.y)
+        self.unplaced = int(graph.n - placed.sum())
+        node = np.flatnonzero(placed)
+        x, y = graph.x[node], graph.y[node]
+        if node.size:
+            self.origin = (float(x.min()), float(y.min()))
+            self.span = max(float(x.max()) - self.origin[0], float(y.max()) - self.origin[1]) or 1.0
+        else:
+            self.origin, self.span = (0.0, 0.0), 1.0
+        # position of every graph node among the placed ones (-1 = unplaced)
+        at = np.full(graph.n, -1, dtype=np.int64)
+        at[node] = np.arange(node.size)
+        edge = (at[graph.src] >= 0) & (at[graph.dst] >= 0)
+        ea, eb, ew = at[graph.src[edge]], at[graph.dst[edge]], graph.weights[edge]
+        fx, fy = self._fine(x), self._fine(y, axis=1)
+
+        self.levels: List[LODLevel] = []
+        depth = 0
+        while True:
+            shift = MAX_DEPTH - depth
+            key = (fx >> shift) * (1 << depth) + (fy >> shift)
+            keys, cluster = np.unique(key, return_inverse=True)
+            k = keys.size
+            if depth and (k > LEAF_RATIO * node.size or depth == MAX_DEPTH):
+                break
+            if self.levels and k == self.levels[-1].keys.size:
+                # nothing split (e.g. nodes stacked on one point): no new level
+                depth += 1
+                continue
+            size = np.bincount(cluster, minlength=k)
+            cx = np.bincount(cluster, weights=x, minlength=k) / np.maximum(size, 1)
+            cy = np.bincount(cluster, weights=y, minlength=k) / np.maximum(size, 1)
+            a, b, count, weight = _aggregate(cluster[ea], cluster[eb], ew, k)
+            self.levels.append(LODLevel(depth, keys, cx, cy, size, a, b, count, weight))
+            if k == node.size:
+                break
+            depth += 1
+        # node level, indexed on the grid of the level that would have come next
+        depth = min(depth, MAX_DEPTH)
+        shift = MAX_DEPTH - depth
+        key = (fx >> shift) * (1 << depth) + (fy >> shift)
+        order = np.argsort(key, kind="stable")
+        rank = np.empty(node.size, dtype=np.int64)
+        rank[order] = np.arange(node.size)
+        self.levels.append(LODLevel(depth, key[order], x[order], y[order], np.ones(node.size, dtype=np.int64),
+                                    rank[ea], rank[eb], np.ones(ea.size, dtype=np.int64), ew, nodes=node[order]))
+
+    def _fine(self, values: np.ndarray, axis: int = 0) -> np.ndarray:
+        """Cell coordinate of ``values`` on the finest (``2^MAX_DEPTH``) grid."""
+        top = (1 << MAX_DEPTH) - 1
+        return np.clip(((values - self.origin[axis]) / self.span * (1 << MAX_DEPTH)).astype(np.int64), 0, top)
+
+    def _cells(self, level: LODLevel, bounds: Tuple[float, float, float, float]) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        x0, y0, x1, y1 = bounds
+        shift = MAX_DEPTH - level.depth
+        cx = (self._fine(np.array([x0, x1])) >> shift).tolist()
+        cy = (self._fine(np.array([y0, y1]), axis=1) >> shift).tolist()
+        return (cx[0], cy[0]), (cx[1], cy[1])
+
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        return (self.origin[0], self.origin[1], self.origin[0] + self.span, self.origin[1] + self.span)
+
+    def visible(self, zoom: int, bounds: Tuple[float, float, float, float]) -> np.ndarray:
+        """Items of level ``zoom`` whose position lies inside ``bounds``."""
+        level = self.levels[zoom]
+        idx = _concat_ranges(*level.cell_range(*self._cells(level, bounds)))
+        x0, y0, x1, y1 = bounds
+        x, y = level.x[idx], level.y[idx]
+        return idx[(x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)]
+
+    def pick_zoom(self, bounds: Tuple[float, float, float, float], max_nodes: int,
+                  max_edges: Optional[int] = None) -> int:
+        """
+        Finest level with at most ``max_nodes`` items in the cells under
+        ``bounds`` and at most ``max_edges`` edges touching them.
+        """
+        for zoom in range(len(self.levels) - 1, 0, -1):
+            level = self.levels[zoom]
+            starts, ends = level.cell_range(*self._cells(level, bounds))
+            if int((ends - starts).sum()) > max_nodes:
+                continue
+            if max_edges is None or level.edge_count(starts, ends, max_edges) <= max_edges:
+                return zoom
+        return 0
+
+    def view(self, bounds: Optional[Tuple[float, float, float, float]] = None, zoom: Optional[int] = None,
+             max_nodes: int = DEFAULT_MAX_NODES, boundary: bool = True,
+             max_edges: int = DEFAULT_MAX_EDGES) -> Dict[str, Any]:
+        """
+        Items and aggregated edges of one level inside a viewport.
+
+        Args:
+            bounds: ``(x0, y0, x1, y1)``; the whole topology when None.
+            zoom: Level index, 0 = coarsest; picked from ``max_nodes`` and
+                ``max_edges`` when None.
+            max_nodes: Item budget for the automatic level choice.
+            boundary: Also return edges leaving the viewport, with their
+                outside endpoints (``inside`` false).
+            max_edges: Edge budget for the automatic level choice.
+
+        Returns:
+            Columnar ``nodes`` and ``edges`` plus the chosen level and totals.
+            Cluster IDs read ``c<level>:<cell>``.
+
+        Raises:
+            ValueError: for an empty or inverted viewport, an unknown level or
+                a non-positive ``max_nodes`` or ``max_edges``.
+        """
+        if bounds is None:
+            bounds = self.bounds
+        x0, y0, x1, y1 = bounds
+        if not (x0 <= x1 and y0 <= y1):
+            raise ValueError("viewport must have x0 <= x1 and y0 <= y1")
+        if max_nodes <= 0:
+            raise ValueError("max_nodes must be positive")
+        if max_edges <= 0:
+            raise ValueError("max_edges must be positive")
+        if zoom is None:
+            zoom = self.pick_zoom(bounds, max_nodes, max_edges)
+        elif not 0 <= zoom < len(self.levels):
+            raise ValueError(f"zoom must be between 0 and {len(self.levels) - 1}")
+        level = self.levels[zoom]
+        shown = self.visible(zoom, bounds)
+        edges = level.touching(shown)
+        if not boundary:
+            edges = edges[_member(level.src[edges], shown) & _member(level.dst[edges], shown)]
+        outside = np.setdiff1d(np.concatenate([level.src[edges], level.dst[edges]]), shown)
+        items = np.concatenate([shown, outside])
+
+        def labels(items: np.ndarray) -> List[str]:
+            if level.clustered:
+                return [f"c{zoom}:{k}" for k in level.keys[items].tolist()]
+            ids = self.ids
+            return [ids[v] for v in level.nodes[items].tolist()]
+
+        return {
+            "zoom": zoom,
+            "levels": len(self.levels),
+            "clustered": level.clustered,
+            "bounds": list(self.bounds),
+            "viewport": [x0, y0, x1, y1],
+            "nodes": {"id": labels(items), "x": level.x[items].tolist(),
+                      "y": level.y[items].tolist(), "size": level.size[items].tolist(),
+                      "inside": [True] * shown.size + [False] * outside.size},
+            "edges": {"source": labels(level.src[edges]), "target": labels(level.dst[edges]),
+                      "count": level.count[edges].tolist(), "weight": level.weight[edges].tolist()},
+            "totals": {"visible": int(shown.size), "edges": int(edges.size), "unplaced": self.unplaced},
+        }
+
+    def summary(self) -> List[Dict[str, Any]]:
+        return [{"zoom": i, "grid": level.side, "items": int(level.keys.size), "edges": int(level.src.size),
+                 "clustered": level.clustered} for i, level in enumerate(self.levels)]
+
+
+def lod_for(graph: CompiledGraph) -> LODHierarchy:
+    """Level-of-detail hierarchy of ``graph``, memoized on it."""
+    return graph.derived(("lod",), lambda: LODHierarchy(graph))
+
+
+def run_view(graph: CompiledGraph, x0: Optional[float] = None, y0: Optional[float] = None,
+             x1: Optional[float] = None, y1: Optional[float] = None, zoom: Optional[int] = None,
+             max_nodes: int = DEFAULT_MAX_NODES, boundary: bool = True,
+             max_edges: int = DEFAULT_MAX_EDGES) -> Dict[str, Any]:
+    """JSON-ready :meth:`LODHierarchy.view`; missing viewport sides default to the topology bounds."""
+    lod = lod_for(graph)
+    full = lod.bounds
+    bounds = tuple(full[i] if v is None else float(v) for i, v in enumerate((x0, y0, x1, y1)))
+    out = lod.view(bounds, zoom, max_nodes, boundary, max_edges)
+    out["hierarchy"] = lod.summary()
+    return out
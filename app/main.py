@@ -1,12 +1,33 @@
-from fastapi import FastAPI, HTTPException, APIRouter, Response
+from fastapi import FastAPI, HTTPException, APIRouter, Request, Response, BackgroundTasks
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+from concurrent.futures.process import BrokenProcessPool
+import time
 
-from .models import GraphRequest, ShortestPathResponse, SaveRequest, Graph, Node
-from .algorithms import run_algorithm
+from .models import GraphRequest, ShortestPathResponse, SaveRequest, Node, AllPairsRequest, BatchRequest, KPathsRequest, \
+    FailureRequest, ComponentsRequest
+from .algorithms import run_algorithm, stream_algorithm
+from .columnar import FastJSONResponse, read_graph_request
+from .bellman import NegativeCycle
+from .allpairs import all_pairs_table, job_size
+from .batch import run_batch
+from .connectivity import run_components
+from .failures import run_failure_sweep
+from .kpaths import run_ecmp, run_k_shortest
+from .executor import BudgetExceeded, Cancelled, Overloaded, compute
+from .landmarks import precompute_landmarks
+from .graph import compile_graph
+from .binfmt import saved_fingerprint
+from .results import cached_response, remember, result_key, results
+from .metrics import CONTENT_TYPE, PhaseTimer, TimingMiddleware, parse_ms, render, search_response
+from .trace import Trace, trace_line
 from .storage import save_topology, load_topology, list_topologies
+from .routers import network, routing, simulate_websocket, sessions as session_routes
+from .sessions import sessions
 
-app = FastAPI(title="Network Routing Simulator API")
+app = FastAPI(title="Network Routing Simulator API", default_response_class=FastJSONResponse)
 
 origins = [
     "https://netsimulator.vercel.app"
@@ -17,25 +38,232 @@ app.add_middleware(
     allow_origins=origins,   
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "ETag", "X-Cache"],
 )
+app.add_middleware(TimingMiddleware)
+
+
+@app.on_event("shutdown")
+def shutdown_compute():
+    compute.shutdown()
+
+@app.exception_handler(Overloaded)
+def overloaded(request: Request, exc: Overloaded):
+    return JSONResponse({"detail": "server busy, retry later"}, status_code=503, headers={"Retry-After": "1"})
+
+@app.exception_handler(BrokenProcessPool)
+def worker_crashed(request: Request, exc: BrokenProcessPool):
+    # the pool is replaced on the next request
+    return JSONResponse({"detail": "compute worker crashed"}, status_code=503, headers={"Retry-After": "1"})
+
+@app.exception_handler(BudgetExceeded)
+def budget_exceeded(request: Request, exc: BudgetExceeded):
+    return JSONResponse({"detail": "computation exceeded its CPU time budget"}, status_code=504)
+
+@app.exception_handler(Cancelled)
+def cancelled(request: Request, exc: Cancelled):
+    # the client is gone; nobody reads this
+    return Response(status_code=499)
 
 
 @app.head("/health")
 def health_head():
     return Response(status_code=200)
 
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(render(), media_type=CONTENT_TYPE)
+
 
 
 
 @app.post("/api/shortest-path", response_model=ShortestPathResponse)
-def shortest_path(req: GraphRequest):
+async def shortest_path(req: GraphRequest, request: Request):
+    parse = parse_ms(request)
     if req.source is None or req.target is None:
         raise HTTPException(status_code=400, detail="source and target required")
-    return run_algorithm(req.nodes, req.edges, req.algorithm, req.source, req.target, req.options or {})
+    timer = PhaseTimer()
+    # compiled here so the result cache can key on the fingerprint and workers receive arrays, not models
+    with timer("build"):
+        graph = await run_in_threadpool(compile_graph, req.nodes, req.edges)
+    return await _search(request, graph, req.algorithm, req.source, req.target, req.options or {}, parse, timer)
+
+@app.post("/api/shortest-path/columnar")
+async def shortest_path_columnar(request: Request):
+    """Like /api/shortest-path, for a columnar JSON or .ntb binary topology (see app.columnar)."""
+    parse = parse_ms(request)
+    timer = PhaseTimer()
+    try:
+        with timer("build"):
+            graph, params = await read_graph_request(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    source, target = params.get("source"), params.get("target")
+    if source is None or target is None:
+        raise HTTPException(status_code=400, detail="source and target required")
+    return await _search(request, graph, str(params.get("algorithm") or "dijkstra"), str(source), str(target),
+                         params.get("options") or {}, parse, timer)
+
+async def _search(request, graph, algorithm, source, target, options, parse, timer):
+    """Shared tail of the shortest-path endpoints: result cache, then a search in a worker."""
+    key = result_key("shortest-path", graph.fingerprint, algorithm=algorithm.strip().lower(), source=source,
+                     target=target, options=options)
+    timings = bool(options.get("timings"))
+    cached = cached_response(request, "shortest-path", key, replay=not timings)
+    if cached is not None:
+        return cached
+    try:
+        with timer("wall"):
+            result = await compute.run(request, run_algorithm, None, None, algorithm, source, target, options,
+                                       graph, size=graph.m, budget=compute.budget(options))
+    except NegativeCycle as e:
+        raise HTTPException(status_code=400, detail=e.detail())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    phases = timer.ms()
+    response = search_response("shortest-path", result, {"parse": parse, "build": phases["build"]},
+                               phases["wall"], timings)
+    # a profiling request measures real work, so its body is not replayed
+    return remember(key, graph.fingerprint, response, store=not timings)
+
+@app.post("/api/shortest-path/trace")
+async def shortest_path_trace(req: GraphRequest, request: Request):
+    """Run the search as a compute job and stream its trace as NDJSON while it runs."""
+    if req.source is None or req.target is None:
+        raise HTTPException(status_code=400, detail="source and target required")
+    options = {"trace": "full", **(req.options or {}), "trace_format": "columnar"}
+    try:
+        Trace.from_options((), options)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    graph = await run_in_threadpool(compile_graph, req.nodes, req.edges)
+    items = compute.stream(request, stream_algorithm, req.algorithm, req.source, req.target, options, graph,
+                           size=graph.m, budget=compute.budget(options))
+    # takes the admission slot: a full server answers 503 before the stream starts
+    await items.__anext__()
+    return StreamingResponse(_trace_ndjson(items), media_type="application/x-ndjson")
+
+async def _trace_ndjson(items):
+    try:
+        async for kind, item in items:
+            yield trace_line(kind, item)
+    except BudgetExceeded:
+        yield trace_line("error", "computation exceeded its CPU time budget")
+    except Cancelled:
+        return
+    except Exception as e:
+        yield trace_line("error", e)
+
+@app.post("/api/shortest-path/batch")
+async def shortest_path_batch(req: BatchRequest, request: Request):
+    t0 = time.time()
+    graph = await run_in_threadpool(_request_graph, req)
+    pairs = [(q.source, q.target) for q in req.pairs]
+    options = req.options or {}
+    try:
+        results = await run_batch(request, graph, pairs, req.algorithm, options, workers=req.workers,
+                                  budget=compute.budget(options))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    metrics = {"time_ms": round((time.time()-t0)*1000, 3), "pairs": len(pairs),
+               "sources": len({p[0] for p in pairs})}
+    return {"results": results, "metrics": metrics}
+
+@app.post("/api/failures")
+async def failures(req: FailureRequest, request: Request):
+    """Rank every single edge and node failure by its impact on the routes from ``sources`` to ``targets``."""
+    t0 = time.time()
+    graph = await run_in_threadpool(_request_graph, req)
+    options = req.options or {}
+    try:
+        out = await run_failure_sweep(request, graph, req.sources, req.targets, req.elements,
+                                      options.get("directed", False), req.rank_by, req.top, workers=req.workers,
+                                      budget=compute.budget(options))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    out["metrics"] = {"time_ms": round((time.time()-t0)*1000, 3), **out.pop("totals")}
+    return out
+
+@app.post("/api/components")
+def components(req: ComponentsRequest):
+    """Connected components (strongly connected plus the condensation DAG when directed)."""
+    t0 = time.time()
+    graph = _request_graph(req)
+    out = run_components(graph, (req.options or {}).get("directed", False), req.limit)
+    out["metrics"] = {"time_ms": round((time.time()-t0)*1000, 3), "nodes": graph.n}
+    return out
+
+@app.post("/api/k-shortest-paths")
+async def k_shortest(req: KPathsRequest, request: Request):
+    """The k shortest loopless paths (Yen's algorithm on a shared reverse shortest-path tree)."""
+    return await _multipath(request, req, run_k_shortest)
+
+@app.post("/api/ecmp")
+async def ecmp(req: KPathsRequest, request: Request):
+    """Equal-cost multipath DAG between source and target; ``k`` caps the enumerated paths."""
+    return await _multipath(request, req, run_ecmp)
+
+async def _multipath(request, req, fn):
+    t0 = time.time()
+    graph = await run_in_threadpool(_request_graph, req)
+    options = req.options or {}
+    try:
+        out = await compute.run(request, fn, graph, req.source, req.target, req.k, options, size=graph.m,
+                                budget=compute.budget(options))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    out["metrics"] = {"time_ms": round((time.time()-t0)*1000, 3), **out.pop("counters", {})}
+    return out
+
+def _request_graph(req):
+    """Compiled graph for a request that carries either nodes/edges or a session_id."""
+    if req.session_id:
+        session = sessions.get(req.session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="session not found")
+        return session.graph()
+    if req.nodes is None or req.edges is None:
+        raise HTTPException(status_code=400, detail="nodes and edges or session_id required")
+    return compile_graph(req.nodes, req.edges)
+
+@app.post("/api/all-pairs")
+async def all_pairs(req: AllPairsRequest, request: Request):
+    t0 = time.time()
+    graph = await run_in_threadpool(compile_graph, req.nodes, req.edges)
+    options = req.options or {}
+    rows = _select(graph, req.rows, "rows")
+    if req.rows is None:
+        end = graph.n if req.limit is None else req.offset + req.limit
+        rows = rows[req.offset:end]
+    cols = _select(graph, req.cols, "cols")
+    try:
+        table = await compute.run(request, all_pairs_table, graph, options.get("directed", False), req.method,
+                                  rows, cols, req.include_next, size=job_size(graph, req.method),
+                                  budget=compute.budget(options))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    table["metrics"] = {"time_ms": round((time.time()-t0)*1000, 3), "method": table.pop("method"), "nodes": graph.n}
+    return table
+
+def _select(graph, ids, field):
+    if ids is None:
+        return list(range(graph.n))
+    missing = [i for i in ids if i not in graph.index]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"unknown {field}: {missing[:5]}")
+    return [graph.index[i] for i in ids]
 
 @app.post("/api/save")
-def save(req: SaveRequest):
-    save_topology(req.id, req.topology)
+def save(req: SaveRequest, background: BackgroundTasks):
+    if not req.id:
+        raise HTTPException(status_code=400, detail="id required")
+    try:
+        previous = saved_fingerprint(req.id)
+        save_topology(req.id, req.topology.dict())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    results.invalidate(previous)
+    background.add_task(precompute_landmarks, req.id)
     return {"status": "ok", "id": req.id}
 
 @app.get("/api/load/{topo_id}")
@@ -46,17 +274,22 @@ def load(topo_id: str):
     return {"topology": topo}
 
 @app.get("/api/list")
-def list_saved():
-    return {"list": list_topologies()}
+def list_saved(offset: int = 0, limit: Optional[int] = None):
+    return {"list": list_topologies(offset, limit)}
 
 # Router section
 router = APIRouter()
-current_graph: Graph = Graph(nodes=[], edges=[])
 
 @router.get("/fetch-nodes", response_model=List[Node])
-def fetch_nodes():
-    if not current_graph.nodes:
+def fetch_nodes(session_id: Optional[str] = None):
+    # defaults to the most recently edited graph session
+    session = sessions.get(session_id) if session_id else sessions.latest()
+    if session is None or not session.nodes:
         raise HTTPException(status_code=404, detail="No nodes found in the graph")
-    return current_graph.nodes
+    return session.node_list()
 
 app.include_router(router, prefix="/api")
+app.include_router(network.router)
+app.include_router(routing.router)
+app.include_router(simulate_websocket.router)
+app.include_router(session_routes.router)
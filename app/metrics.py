@@ -0,0 +1,221 @@
+# backend/app/metrics.py
+"""
+Latency and work instrumentation.
+
+Request handlers split their time into phases measured with
+``perf_counter_ns``:
+
+    parse        request receipt, JSON decoding and Pydantic validation
+    dispatch     compute queueing and transfer to / from a worker process
+    build        compiling the topology into a CompiledGraph
+    search       the search itself
+    reconstruct  path reconstruction and the path distance
+    serialize    encoding the response body
+
+Searches also report work counters (settled nodes, scanned edges, heap
+pushes, ...). Both are kept as Prometheus histograms, rendered in the text
+exposition format by :func:`render` for the ``/metrics`` endpoint, and sent
+back per response in a ``Server-Timing`` header. The counters are plain
+values in the results, so searches that ran in a worker process are
+recorded by the parent.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from .columnar import FastJSONResponse
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0, 30.0)
+WORK_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+RECEIVED_NS = "received_ns"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a fixed label set."""
+
+    def __init__(self, name: str, doc: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.doc = doc
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}  # per-bucket counts, sum, count
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect.bisect_left(self.buckets, value)  # len(buckets) is the +Inf bucket
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 3)
+            series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        out = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for labels, series in items:
+            pairs = [f'{k}="{_escape(v)}"' for k, v in zip(self.labels, labels)]
+            running = 0.0
+            for bound, n in zip(self.buckets + (float("inf"),), series[:-2]):
+                running += n
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                labels_le = ",".join(pairs + [f'le="{le}"'])
+                out.append(f"{self.name}_bucket{{{labels_le}}} {running:g}")
+            suffix = "{" + ",".join(pairs) + "}" if pairs else ""
+            out.append(f"{self.name}_sum{suffix} {series[-2]!r}")
+            out.append(f"{self.name}_count{suffix} {series[-1]:g}")
+        return out
+
+
+class Counter:
+    """Monotonic counter with a fixed label set."""
+
+    def __init__(self, name: str, doc: str, labels: Sequence[str]):
+        self.name = name
+        self.doc = doc
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        out = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            pairs = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, labels))
+            out.append(f"{self.name}{{{pairs}}} {value:g}" if pairs else f"{self.name} {value:g}")
+        return out
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+REQUEST_SECONDS = Histogram("routing_http_request_duration_seconds", "HTTP request latency.",
+                            ("method", "route", "status"), LATENCY_BUCKETS)
+PHASE_SECONDS = Histogram("routing_phase_duration_seconds", "Time spent per request phase.",
+                          ("endpoint", "phase"), LATENCY_BUCKETS)
+SEARCH_WORK = Histogram("routing_search_work", "Work done per search (settled nodes, scanned edges, ...).",
+                        ("algorithm", "counter"), WORK_BUCKETS)
+RESULT_CACHE = Counter("routing_result_cache_total", "Result cache lookups by outcome (hit, miss, not_modified).",
+                       ("endpoint", "outcome"))
+REGISTRY = (REQUEST_SECONDS, PHASE_SECONDS, SEARCH_WORK, RESULT_CACHE)
+
+
+def render() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+class PhaseTimer:
+    """Accumulates nanoseconds per phase."""
+
+    def __init__(self):
+        self.ns: Dict[str, int] = {}
+
+    @contextmanager
+    def __call__(self, phase: str) -> Iterator[None]:
+        t0 = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter_ns() - t0)
+
+    def add(self, phase: str, ns: int) -> None:
+        self.ns[phase] = self.ns.get(phase, 0) + ns
+
+    def ms(self) -> Dict[str, float]:
+        return {phase: round(ns / 1e6, 4) for phase, ns in self.ns.items()}
+
+
+class TimingMiddleware:
+    """ASGI middleware stamping each request's arrival and recording its total latency."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        t0 = time.perf_counter_ns()
+        scope.setdefault("state", {})[RECEIVED_NS] = t0
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # the route template, not the raw path, keeps the label set bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_SECONDS.observe((time.perf_counter_ns() - t0) / 1e9, scope["method"], route, str(status))
+
+
+def parse_ms(request: Request) -> Optional[float]:
+    """Milliseconds from the request's arrival until now (i.e. the handler starting)."""
+    received = request.scope.get("state", {}).get(RECEIVED_NS)
+    if received is None:
+        return None
+    return round((time.perf_counter_ns() - received) / 1e6, 4)
+
+
+def record_search(algorithm: str, counters: Dict[str, int]) -> None:
+    for name, value in counters.items():
+        SEARCH_WORK.observe(value, algorithm, name)
+
+
+def timed_response(endpoint: str, content, phases: Dict[str, Optional[float]]) -> Response:
+    """
+    Serialize ``content`` as JSON, then record ``phases`` (milliseconds, plus
+    the serialization itself) and report them in a ``Server-Timing`` header.
+    """
+    t0 = time.perf_counter_ns()
+    response = FastJSONResponse(content)
+    serialize = (time.perf_counter_ns() - t0) / 1e6
+    phases = {**phases, "serialize": round((phases.get("serialize") or 0.0) + serialize, 4)}
+    timing = []
+    for phase, ms in phases.items():
+        if ms is None:
+            continue
+        PHASE_SECONDS.observe(ms / 1000.0, endpoint, phase)
+        timing.append(f"{phase};dur={ms}")
+    response.headers["Server-Timing"] = ", ".join(timing)
+    return response
+
+
+def search_response(endpoint: str, result: Dict[str, Any], phases: Dict[str, Optional[float]],
+                    wall_ms: float, timings: bool = False) -> Response:
+    """
+    Response for a ``run_algorithm`` result computed in ``wall_ms``. The
+    search's own phases are merged into ``phases`` (those measured by the
+    handler) and the rest of the wall time is counted as ``dispatch``. The
+    breakdown stays in the body's ``metrics`` only when ``timings`` is set.
+    """
+    metrics = result["metrics"]
+    searched = metrics.pop("phases")
+    record_search(metrics["algorithm"], metrics["counters"])
+    merged = dict(phases)
+    merged["dispatch"] = round(max(0.0, wall_ms - sum(searched.values())), 4)
+    for phase, ms in searched.items():
+        merged[phase] = round((merged.get(phase) or 0.0) + ms, 4)
+    if timings:
+        metrics["phases"] = {k: v for k, v in merged.items() if v is not None}
+    return timed_response(endpoint, result, merged)
@@ -9,6 +9,7 @@ class Node(BaseModel):
     label: Optional[str] = None
 
 class Edge(BaseModel):
+    id: Optional[str] = None
     source: str
     target: str
     weight: float = 1.0
@@ -17,6 +18,8 @@ class Graph(BaseModel):
     nodes: List[Node]
     edges: List[Edge]
 
+Topology = Graph
+
 class GraphRequest(BaseModel):
     nodes: List[Node]
     edges: List[Edge]
@@ -25,11 +28,135 @@ class GraphRequest(BaseModel):
     target: str
     options: Optional[Dict[str, Any]] = None
 
+class AllPairsRequest(BaseModel):
+    nodes: List[Node]
+    edges: List[Edge]
+    options: Optional[Dict[str, Any]] = None
+    method: str = "auto"
+    rows: Optional[List[str]] = None
+    cols: Optional[List[str]] = None
+    offset: int = 0
+    limit: Optional[int] = 100
+    include_next: bool = True
+
+class EdgeWeight(BaseModel):
+    id: str
+    weight: float
+
+class SessionDelta(BaseModel):
+    add_nodes: List[Node] = []
+    remove_nodes: List[str] = []
+    add_edges: List[Edge] = []
+    remove_edges: List[str] = []
+    reweight_edges: List[EdgeWeight] = []
+
+class TrackRequest(BaseModel):
+    sources: List[str]
+    directed: bool = False
+
+class SessionQuery(BaseModel):
+    algorithm: str = "dijkstra"
+    source: str
+    target: str
+    options: Optional[Dict[str, Any]] = None
+
+class PathQuery(BaseModel):
+    source: str
+    target: str
+
+class BatchRequest(BaseModel):
+    nodes: Optional[List[Node]] = None
+    edges: Optional[List[Edge]] = None
+    session_id: Optional[str] = None
+    algorithm: str = "dijkstra"
+    pairs: List[PathQuery]
+    options: Optional[Dict[str, Any]] = None
+    workers: int = 0  # compute jobs; 0 = one
+
+class KPathsRequest(BaseModel):
+    nodes: Optional[List[Node]] = None
+    edges: Optional[List[Edge]] = None
+    session_id: Optional[str] = None
+    source: str
+    target: str
+    k: int = 3  # paths for k-shortest; enumerated paths for ECMP
+    options: Optional[Dict[str, Any]] = None
+
+class FailureRequest(BaseModel):
+    nodes: Optional[List[Node]] = None
+    edges: Optional[List[Edge]] = None
+    session_id: Optional[str] = None
+    sources: Optional[List[str]] = None  # None = every node
+    targets: Optional[List[str]] = None
+    elements: str = "both"  # edges | nodes | both
+    rank_by: str = "disconnected"
+    top: Optional[int] = 20
+    options: Optional[Dict[str, Any]] = None
+    workers: Optional[int] = None  # compute jobs; None = one per compute worker
+
+class ComponentsRequest(BaseModel):
+    nodes: Optional[List[Node]] = None
+    edges: Optional[List[Edge]] = None
+    session_id: Optional[str] = None
+    options: Optional[Dict[str, Any]] = None
+    limit: Optional[int] = 100  # components listed, largest first
+
 class ShortestPathResponse(BaseModel):
     path: List[str]
     steps: Optional[List[Dict[str, Any]]] = None
     metrics: Optional[Dict[str, Any]] = None
+    trace: Optional[Dict[str, Any]] = None
 
 class SaveRequest(BaseModel):
-    id: str
+    id: Optional[str] = None
+    name: Optional[str] = None
     topology: Graph
+
+class RouteRequest(BaseModel):
+    topology: Optional[Topology] = None
+    session_id: Optional[str] = None
+    source: str
+    target: str
+    algorithm: Optional[str] = "dijkstra"
+
+class GenerateRequest(BaseModel):
+    model: str = "gnp"  # gnp | gnm | geometric | barabasi-albert | grid | fat-tree
+    nodes: int = 20
+    density: float = 0.1
+    max_weight: float = 10.0
+    seed: Optional[int] = None
+    edges: Optional[int] = None  # gnm
+    radius: Optional[float] = None  # geometric
+    attach: int = 2  # barabasi-albert
+    arity: int = 4  # fat-tree
+
+class FlowSpec(BaseModel):
+    source: str
+    target: str
+    packets: int = 100
+    rate_pps: float = 1000.0
+    start_ms: float = 0.0
+
+class RandomFlows(BaseModel):
+    count: int = 1000
+    packets: int = 100
+    rate_pps: float = 1000.0
+    spread_ms: float = 100.0
+    seed: Optional[int] = None
+
+class SimulationRequest(BaseModel):
+    nodes: Optional[List[Node]] = None
+    edges: Optional[List[Edge]] = None
+    session_id: Optional[str] = None
+    topology_id: Optional[str] = None
+    flows: List[FlowSpec] = []
+    random_flows: Optional[RandomFlows] = None
+    algorithm: str = "dijkstra"
+    directed: bool = False
+    bandwidth_mbps: float = 100.0
+    packet_bytes: int = 1500
+    queue_packets: int = 64
+    delay_per_weight_ms: float = 1.0
+    tick_ms: float = 10.0
+    duration_ms: Optional[float] = None
+    speed: float = 0.0  # simulated/wall time ratio for pacing frames; 0 streams as fast as possible
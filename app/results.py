@@ -0,0 +1,155 @@
+# backend/app/results.py
+"""
+Memoized route query responses.
+
+A query's key hashes the topology fingerprint, the endpoint and the query
+parameters (algorithm, endpoints, options). The fingerprint covers the whole
+topology, so an edited graph can never hit an old entry. Sessions and saved
+topologies still drop their old entries when they change, to free the space
+early.
+
+Entries hold the serialized response body. They are evicted LRU-first, by
+count and by total bytes, and expire after a TTL. The key doubles as a weak
+``ETag``. A client revalidating with ``If-None-Match`` gets a ``304`` without
+a search, even after its entry was evicted. Requests sent with
+``Cache-Control: no-cache`` skip the lookup; the fresh result is still stored.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from .metrics import RESULT_CACHE
+
+RESULT_CACHE_SIZE = 1024
+RESULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+RESULT_TTL_S = 900
+
+
+class ResultCache:
+    """
+    Thread-safe LRU of response bodies with TTL expiry.
+
+    Args:
+        max_entries: Maximum number of entries.
+        max_bytes: Budget for the stored bodies; larger bodies are not stored.
+        ttl_s: Seconds an entry stays valid.
+    """
+
+    def __init__(self, max_entries: int = RESULT_CACHE_SIZE, max_bytes: int = RESULT_CACHE_MAX_BYTES,
+                 ttl_s: float = RESULT_TTL_S):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[str, Tuple[bytes, str, float]]" = OrderedDict()  # body, fingerprint, expiry
+        self._by_fingerprint: Dict[str, Set[str]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop(self, key: str) -> None:
+        body, fingerprint, _ = self._entries.pop(key)
+        self._bytes -= len(body)
+        keys = self._by_fingerprint.get(fingerprint)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_fingerprint[fingerprint]
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] < time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: str, fingerprint: str, body: bytes) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if len(body) > self.max_bytes:
+                return
+            self._entries[key] = (body, fingerprint, time.monotonic() + self.ttl_s)
+            self._by_fingerprint.setdefault(fingerprint, set()).add(key)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, fingerprint: Optional[str]) -> int:
+        """Drop every entry computed on the topology with this fingerprint; returns how many."""
+        with self._lock:
+            keys = list(self._by_fingerprint.get(fingerprint, ()))
+            for key in keys:
+                self._drop(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_fingerprint.clear()
+            self._bytes = 0
+
+
+results = ResultCache()
+
+
+def result_key(endpoint: str, fingerprint: str, **params: Any) -> str:
+    """Stable key of a query; ``params`` must be JSON-serializable (options included)."""
+    blob = json.dumps([endpoint, fingerprint, params], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(blob.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _etag(key: str) -> str:
+    # weak: repeated runs of a query agree on the result but not on its timings
+    return f'W/"{key}"'
+
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    # only an exact tag names this query; "*" would revalidate any query at all
+    return etag in tags or etag[2:] in tags
+
+
+def cached_response(request: Request, endpoint: str, key: str, replay: bool = True) -> Optional[Response]:
+    """
+    A ``304`` or a stored response for ``key``, or None when the query has to
+    run. With ``replay`` false (a profiling request) the query always runs.
+    """
+    etag = _etag(key)
+    if not replay:
+        RESULT_CACHE.inc(endpoint, "miss")
+        return None
+    if _matches(request, etag):
+        RESULT_CACHE.inc(endpoint, "not_modified")
+        return Response(status_code=304, headers={"ETag": etag})
+    if "no-cache" not in request.headers.get("cache-control", ""):
+        body = results.get(key)
+        if body is not None:
+            RESULT_CACHE.inc(endpoint, "hit")
+            return Response(body, media_type="application/json", headers={"ETag": etag, "X-Cache": "hit"})
+    RESULT_CACHE.inc(endpoint, "miss")
+    return None
+
+
+def remember(key: str, fingerprint: str, response: Response, store: bool = True) -> Response:
+    """Tag a freshly computed response with its ETag and store its body unless ``store`` is false."""
+    response.headers["ETag"] = _etag(key)
+    response.headers["X-Cache"] = "miss"
+    if store:
+        results.put(key, fingerprint, bytes(response.body))
+    return response
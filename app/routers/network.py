@@ -1,11 +1,18 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from ..models import GenerateRequest, SaveRequest
-from ..utils import generate_random_topology
-import os, json, time, uuid
+from ..generators import generate as generate_topology, iter_ndjson, to_topology
+from ..storage import artifact_path, network_store
+from ..binfmt import BINARY_SUFFIX, BinaryTopology, export_binary, saved_graph, saved_topology
+from ..contraction import build_hierarchy, ch_suffix
+from ..executor import compute
+from ..landmarks import precompute_landmarks
+from ..lod import DEFAULT_MAX_EDGES, DEFAULT_MAX_NODES, run_view
+from typing import Optional
+import os, tempfile, time, uuid
 
 router = APIRouter(prefix="/network", tags=["network"])
-SAVED_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data", "saved_topologies")
-os.makedirs(SAVED_DIR, exist_ok=True)
 
 @router.get("/health")
 def health():
@@ -13,38 +20,108 @@ def health():
 
 @router.post("/generate")
 def generate(req: GenerateRequest):
-    topo = generate_random_topology(req.nodes, req.density, req.max_weight)
-    return {"topology": topo.dict()}
+    try:
+        gen = generate_topology(**req.dict())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"topology": to_topology(gen), "seed": gen.seed}
+
+@router.post("/generate/stream")
+def generate_stream(req: GenerateRequest):
+    try:
+        gen = generate_topology(**req.dict())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(iter_ndjson(gen), media_type="application/x-ndjson")
 
 @router.post("/save")
-def save(req: SaveRequest):
+def save(req: SaveRequest, background: BackgroundTasks):
     if not req.topology:
         raise HTTPException(status_code=400, detail="topology required")
     tid = str(uuid.uuid4())
     entry = {"id": tid, "name": req.name or f"topo-{tid[:6]}", "topology": req.topology.dict(), "created_at": int(time.time())}
-    path = os.path.join(SAVED_DIR, f"{tid}.json")
-    with open(path, "w") as f:
-        json.dump(entry, f, indent=2)
+    network_store.save(tid, entry)
+    background.add_task(precompute_landmarks, tid)
     return {"id": tid}
 
 @router.get("/list")
-def list_topologies():
-    files = os.listdir(SAVED_DIR)
-    out = []
-    for fname in files:
-        try:
-            with open(os.path.join(SAVED_DIR, fname), "r") as f:
-                entry = json.load(f)
-                out.append({"id": entry["id"], "name": entry.get("name"), "created_at": entry.get("created_at")})
-        except:
-            continue
-    return {"list": out}
+def list_topologies(offset: int = 0, limit: Optional[int] = None):
+    return {"list": network_store.list(offset, limit), "total": network_store.count()}
 
 @router.get("/load/{tid}")
 def load_topology(tid: str):
-    path = os.path.join(SAVED_DIR, f"{tid}.json")
-    if not os.path.exists(path):
+    entry = network_store.load(tid)
+    topology = None if entry is None else saved_topology(tid)
+    if topology is None:
+        raise HTTPException(status_code=404, detail="not found")
+    return {"topology": topology, "id": entry["id"], "name": entry.get("name")}
+
+@router.get("/lod/{tid}")
+def level_of_detail(tid: str, x0: Optional[float] = None, y0: Optional[float] = None, x1: Optional[float] = None,
+                    y1: Optional[float] = None, zoom: Optional[int] = None, max_nodes: int = DEFAULT_MAX_NODES,
+                    boundary: bool = True, max_edges: int = DEFAULT_MAX_EDGES):
+    """Clusters or nodes, with aggregated edges, inside a viewport; omitted sides span the whole topology."""
+    graph = saved_graph(tid)
+    if graph is None:
+        raise HTTPException(status_code=404, detail="not found")
+    try:
+        return {"id": tid, **run_view(graph, x0, y0, x1, y1, zoom, max_nodes, boundary, max_edges)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/preprocess/{tid}")
+async def preprocess(request: Request, tid: str, directed: bool = False):
+    graph = await run_in_threadpool(saved_graph, tid)
+    if graph is None:
         raise HTTPException(status_code=404, detail="not found")
-    with open(path, "r") as f:
-        entry = json.load(f)
-    return {"topology": entry["topology"], "id": entry["id"], "name": entry.get("name")}
+    start = time.time()
+    try:
+        ch = await compute.run(request, build_hierarchy, graph, directed, size=graph.m, budget=compute.budget())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    path = artifact_path(tid, ch_suffix(directed))
+    await run_in_threadpool(ch.save, path)
+    graph.forget(("ch", directed, path))
+    return {"id": tid, "directed": directed, "nodes": graph.n, "shortcuts": ch.shortcuts,
+            "build_ms": int((time.time() - start) * 1000)}
+
+@router.get("/export/{tid}")
+def export_topology(tid: str):
+    path = export_binary(tid)
+    if path is None:
+        raise HTTPException(status_code=404, detail="not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{tid}.ntb")
+
+def _store_import(tmp: str, tid: str, name: Optional[str]) -> dict:
+    """Validate an uploaded ``.ntb`` and keep it as the topology's only copy; JSON is derived on load."""
+    with BinaryTopology(tmp) as b:
+        b.validate()
+        n, m = b.n, b.m
+    entry = {"id": tid, "name": name or f"topo-{tid[:6]}", "nodes": n, "edges": m, "created_at": int(time.time())}
+    # file first, index second: an indexed entry never points at a missing .ntb
+    path = os.path.join(network_store.directory, f"{tid}{BINARY_SUFFIX}")
+    os.replace(tmp, path)
+    try:
+        network_store.save(tid, entry)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return {"id": tid, "nodes": n, "edges": m}
+
+@router.post("/import")
+async def import_topology(request: Request, background: BackgroundTasks, name: Optional[str] = None):
+    tid = str(uuid.uuid4())
+    fd, tmp = tempfile.mkstemp(dir=network_store.directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in request.stream():
+                await run_in_threadpool(f.write, chunk)
+        try:
+            out = await run_in_threadpool(_store_import, tmp, tid, name)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    background.add_task(precompute_landmarks, tid)
+    return out
@@ -1,7 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
 from ..models import RouteRequest
 from ..utils import dijkstra, bellman_ford, astar, bfs
-import time
+from ..bellman import NegativeCycle
+from ..sessions import sessions
+from ..executor import compute
+from ..graph import compile_graph
+from ..columnar import read_graph_request
+from ..kpaths import run_ecmp, run_k_shortest
+from ..metrics import PhaseTimer, parse_ms, timed_response
+from ..results import cached_response, remember, result_key
 
 router = APIRouter(prefix="/route", tags=["route"])
 
@@ -14,21 +22,83 @@ ALGO_MAP = {
     "bfs": bfs
 }
 
-@router.post("/shortest")
-def shortest(req: RouteRequest):
+def _topology(req: RouteRequest):
+    if req.session_id:
+        session = sessions.get(req.session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="session not found")
+        return session.graph()
     if not req.topology or not req.topology.nodes:
         raise HTTPException(status_code=400, detail="topology required")
-    node_ids = {n.id for n in req.topology.nodes}
-    if req.source not in node_ids or req.target not in node_ids:
+    return compile_graph(req.topology.nodes, req.topology.edges)
+
+@router.post("/shortest")
+async def shortest(req: RouteRequest, request: Request, timings: bool = False):
+    parse = parse_ms(request)
+    timer = PhaseTimer()
+    # compiled here so the build is timed on its own and workers receive arrays, not models
+    with timer("build"):
+        topology = await run_in_threadpool(_topology, req)
+    return await _route(request, topology, req.source, req.target, req.algorithm, timer, parse, timings)
+
+@router.post("/k-shortest")
+async def k_shortest(req: RouteRequest, request: Request, k: int = 3, directed: bool = False):
+    return await _multipath(req, request, run_k_shortest, k, directed)
+
+@router.post("/ecmp")
+async def ecmp(req: RouteRequest, request: Request, limit: int = 0, directed: bool = False):
+    return await _multipath(req, request, run_ecmp, limit, directed)
+
+async def _multipath(req, request, fn, k, directed):
+    timer = PhaseTimer()
+    with timer("build"):
+        topology = await run_in_threadpool(_topology, req)
+    try:
+        with timer("search"):
+            res = await compute.run(request, fn, topology, req.source, req.target, k, {"directed": directed},
+                                    size=topology.m)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    phases = timer.ms()
+    res.pop("counters", None)
+    return timed_response("route-multipath", {"time_ms": round(phases["build"] + phases["search"], 3),
+                                              "result": res}, phases)
+
+@router.post("/shortest/columnar")
+async def shortest_columnar(request: Request, timings: bool = False):
+    """Like /route/shortest, for a columnar JSON or .ntb binary topology (see app.columnar)."""
+    parse = parse_ms(request)
+    timer = PhaseTimer()
+    try:
+        with timer("build"):
+            topology, params = await read_graph_request(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await _route(request, topology, params.get("source"), params.get("target"), params.get("algorithm"),
+                        timer, parse, timings)
+
+async def _route(request, topology, source, target, algorithm, timer, parse, timings):
+    if not isinstance(source, str) or not isinstance(target, str) \
+            or source not in topology.index or target not in topology.index:
         raise HTTPException(status_code=400, detail="source/target must be in topology")
-    algorithm = (req.algorithm or "dijkstra").lower()
+    algorithm = str(algorithm or "dijkstra").lower()
     fn = ALGO_MAP.get(algorithm)
     if not fn:
         raise HTTPException(status_code=400, detail=f"unknown algorithm {algorithm}")
-    start = time.time()
+    key = result_key("route-shortest", topology.fingerprint, algorithm=algorithm, source=source, target=target,
+                     timings=timings)
+    cached = cached_response(request, "route-shortest", key, replay=not timings)
+    if cached is not None:
+        return cached
     try:
-        res = fn(req.topology, req.source, req.target)
+        with timer("search"):
+            res = await compute.run(request, fn, topology, source, target, size=topology.m)
+    except NegativeCycle as e:
+        raise HTTPException(status_code=400, detail=e.detail())
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    elapsed_ms = int((time.time() - start) * 1000)
-    return {"algorithm": algorithm, "time_ms": elapsed_ms, "result": res}
+    phases = {"parse": parse, **timer.ms()}
+    out = {"algorithm": algorithm, "time_ms": round(phases["build"] + phases["search"], 3), "result": res}
+    if timings:
+        out["phases"] = {k: v for k, v in phases.items() if v is not None}
+    return remember(key, topology.fingerprint, timed_response("route-shortest", out, phases), store=not timings)
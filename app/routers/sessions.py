@@ -0,0 +1,110 @@
+from fastapi import APIRouter, HTTPException, Request
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
+from ..models import Graph, SessionDelta, SessionQuery, ShortestPathResponse, TrackRequest
+from ..algorithms import run_algorithm
+from ..bellman import NegativeCycle
+from ..executor import compute
+from ..lod import DEFAULT_MAX_EDGES, DEFAULT_MAX_NODES, run_view
+from ..metrics import PhaseTimer, parse_ms, search_response
+from ..results import cached_response, remember, result_key
+from ..sessions import GraphSession, sessions
+
+router = APIRouter(prefix="/api/sessions", tags=["sessions"])
+
+def get_session(sid: str) -> GraphSession:
+    session = sessions.get(sid)
+    if session is None:
+        raise HTTPException(status_code=404, detail="session not found")
+    return session
+
+@router.post("")
+def create_session(topology: Graph):
+    return sessions.create(topology.nodes, topology.edges).summary()
+
+@router.get("/{sid}")
+def get_session_info(sid: str, full: bool = False):
+    session = get_session(sid)
+    out = session.summary()
+    if full:
+        with session.lock:
+            out["topology"] = {"nodes": session.node_list(), "edges": session.edge_list()}
+    return out
+
+@router.patch("/{sid}")
+def apply_delta(sid: str, delta: SessionDelta):
+    session = get_session(sid)
+    try:
+        changes = session.apply(delta)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {**session.summary(), **changes}
+
+@router.delete("/{sid}")
+def delete_session(sid: str):
+    if not sessions.delete(sid):
+        raise HTTPException(status_code=404, detail="session not found")
+    return {"status": "ok"}
+
+@router.post("/{sid}/shortest-path", response_model=ShortestPathResponse)
+async def session_shortest_path(sid: str, req: SessionQuery, request: Request):
+    parse = parse_ms(request)
+    session = get_session(sid)
+    timer = PhaseTimer()
+    with timer("build"):
+        graph = await run_in_threadpool(session.graph)
+    options = req.options or {}
+    key = result_key("session-shortest-path", graph.fingerprint, algorithm=req.algorithm.strip().lower(),
+                     source=req.source, target=req.target, options=options)
+    timings = bool(options.get("timings"))
+    cached = cached_response(request, "session-shortest-path", key, replay=not timings)
+    if cached is not None:
+        return cached
+    try:
+        with timer("wall"):
+            result = await compute.run(request, run_algorithm, None, None, req.algorithm, req.source, req.target,
+                                       options, graph, size=graph.m, budget=compute.budget(options))
+    except NegativeCycle as e:
+        raise HTTPException(status_code=400, detail=e.detail())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    ms = timer.ms()
+    response = search_response("session-shortest-path", result, {"parse": parse, "build": ms["build"]}, ms["wall"],
+                               timings)
+    return remember(key, graph.fingerprint, response, store=not timings)
+
+@router.get("/{sid}/lod")
+def session_level_of_detail(sid: str, x0: Optional[float] = None, y0: Optional[float] = None,
+                            x1: Optional[float] = None, y1: Optional[float] = None, zoom: Optional[int] = None,
+                            max_nodes: int = DEFAULT_MAX_NODES, boundary: bool = True,
+                            max_edges: int = DEFAULT_MAX_EDGES):
+    session = get_session(sid)
+    try:
+        return {**session.summary(),
+                **run_view(session.graph(), x0, y0, x1, y1, zoom, max_nodes, boundary, max_edges)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/{sid}/track")
+def track_sources(sid: str, req: TrackRequest):
+    session = get_session(sid)
+    try:
+        routing = session.track(req.sources, req.directed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {**session.summary(), "tracked": sorted(routing.trees), "directed": routing.directed}
+
+@router.delete("/{sid}/track")
+def untrack_sources(sid: str):
+    get_session(sid).untrack()
+    return {"status": "ok"}
+
+@router.get("/{sid}/routes/{source}")
+def tracked_routes(sid: str, source: str, target: Optional[str] = None):
+    session = get_session(sid)
+    with session.lock:
+        tree = session.routing.trees.get(source) if session.routing else None
+        if tree is None:
+            raise HTTPException(status_code=404, detail="source is not tracked")
+        targets = [target] if target else list(tree.dist)
+        return {"source": source, "routes": [tree.route(t) for t in targets]}
@@ -1,5 +1,16 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-import asyncio
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Dict, List, Optional
+import asyncio, json, time
+from ..models import GraphRequest, SimulationRequest
+from ..algorithms import run_algorithm, stream_algorithm
+from ..executor import BudgetExceeded, Overloaded, compute
+from ..graph import compile_graph
+from ..binfmt import saved_graph
+from ..sessions import sessions
+from ..simulation import Flow, random_flows, simulation_size, stream_simulation
+from ..trace import Trace
 
 router = APIRouter()
 
@@ -8,8 +19,12 @@ async def ws_simulate(websocket: WebSocket):
     await websocket.accept()
     try:
         data = await websocket.receive_json()
+        if data.get("type") == "simulate-network":
+            await simulate_network(websocket, data)
+            await websocket.close()
+            return
         if data.get("type") != "simulate":
-            await websocket.send_json({"error": "expected type=simulate"})
+            await websocket.send_json({"error": "expected type=simulate or type=simulate-network"})
             await websocket.close()
             return
         path = data.get("path", [])
@@ -27,3 +42,318 @@ async def ws_simulate(websocket: WebSocket):
             await websocket.close()
         except:
             pass
+
+def _sim_graph(req: SimulationRequest):
+    if req.session_id:
+        session = sessions.get(req.session_id)
+        if session is None:
+            raise ValueError("session not found")
+        return session.graph()
+    if req.topology_id:
+        graph = saved_graph(req.topology_id)
+        if graph is None:
+            raise ValueError("topology not found")
+        return graph
+    if req.nodes is None or req.edges is None:
+        raise ValueError("nodes and edges, session_id or topology_id required")
+    return compile_graph(req.nodes, req.edges)
+
+def _sim_flows(req: SimulationRequest):
+    """The request's graph and its flows in node indices; the simulator itself is built in the compute job."""
+    if req.tick_ms <= 0:
+        raise ValueError("tick_ms must be positive")
+    graph = _sim_graph(req)
+    flows = []
+    for f in req.flows:
+        if f.source not in graph.index or f.target not in graph.index:
+            raise ValueError(f"unknown flow endpoint {f.source}->{f.target}")
+        if f.rate_pps <= 0:
+            raise ValueError("rate_pps must be positive")
+        flows.append(Flow(graph.index[f.source], graph.index[f.target], f.packets, 1.0 / f.rate_pps, f.start_ms / 1000.0))
+    if req.random_flows:
+        r = req.random_flows
+        flows += random_flows(graph, r.count, r.packets, r.rate_pps, r.spread_ms, r.seed)
+    return graph, flows
+
+async def _simulate(req: SimulationRequest, send, done: str) -> None:
+    """Run the simulation as a compute job and ``send`` its start, tick and ``done`` (summary) messages."""
+    graph, flows = await run_in_threadpool(_sim_flows, req)
+    options = {"directed": req.directed, "bandwidth_mbps": req.bandwidth_mbps, "packet_bytes": req.packet_bytes,
+               "queue_packets": req.queue_packets, "delay_per_weight_ms": req.delay_per_weight_ms,
+               "algorithm": req.algorithm}
+    duration = None if req.duration_ms is None else req.duration_ms / 1000.0
+    # paced runs take frames one by one, so the job never waits long on a full channel
+    chunk_s = SIM_CHUNK_S if req.speed <= 0 else 0.0
+    items = compute.stream(None, stream_simulation, graph, flows, options, req.tick_ms / 1000.0, duration, chunk_s,
+                           size=simulation_size(graph, flows), budget=compute.budget())
+    t0 = time.perf_counter()
+    try:
+        async for kind, item in items:
+            if kind == "start":
+                t0 = time.perf_counter()
+                await send({"type": "start", **item})
+            elif kind == "ticks":
+                for tick in item:
+                    if req.speed > 0:
+                        ahead = tick["t_ms"] / 1000.0 / req.speed - (time.perf_counter() - t0)
+                        if ahead > 0:
+                            await asyncio.sleep(ahead)
+                    # blocks while the client is behind, which pauses the simulation
+                    await send({"type": "tick", **tick})
+            elif kind == "result":
+                await send({"type": done, **item, "wall_ms": round((time.perf_counter() - t0) * 1000, 3)})
+    finally:
+        await items.aclose()
+
+async def simulate_network(websocket: WebSocket, data: dict):
+    """Stream per-tick aggregates of a discrete-event simulation, then a summary."""
+    try:
+        req = SimulationRequest(**{k: v for k, v in data.items() if k != "type"})
+        await _simulate(req, websocket.send_json, "done")
+    except (ValidationError, ValueError) as e:
+        await websocket.send_json({"error": str(e)})
+    except Overloaded:
+        await websocket.send_json({"error": "server busy, retry later"})
+    except BudgetExceeded:
+        await websocket.send_json({"error": "computation exceeded its CPU time budget"})
+
+
+# Multiplexed streaming: /route/ws/stream
+#
+# Client -> server:
+#   {"op": "subscribe", "id": "<sub>", "kind": "path" | "steps" | "trace" | "simulate-network", ...params}
+#   {"op": "unsubscribe", "id": "<sub>"}
+#   {"op": "ack", "seq": <n>}  -- every batch up to and including seq was processed
+# Server -> client:
+#   {"type": "batch", "seq": <n>, "events": [{"sub": "<sub>", "type": ..., ...}, ...]}
+# Each subscription ends with an {"type": "end"} or {"type": "error"} event.
+
+SLICE_MS = 50
+WINDOW = 4  # unacknowledged batches before the writer stops draining
+SUB_QUEUE = 256  # buffered events per subscription before its producer pauses
+MAX_BATCH_EVENTS = 2048
+MAX_SUBSCRIPTIONS = 64
+SIM_CHUNK_S = 0.02
+
+
+class StreamConnection:
+    """
+    One websocket carrying many subscriptions. Producers put events into
+    bounded per-subscription queues; a single writer drains them round-robin
+    once per time slice into one batch frame. When ``window`` batches are
+    unacknowledged (or the socket itself blocks) the writer stops draining,
+    the queues fill up and producers pause on ``put``.
+    """
+
+    def __init__(self, websocket: WebSocket, slice_ms: float = SLICE_MS, window: int = WINDOW):
+        self.websocket = websocket
+        self.slice = max(slice_ms, 1.0) / 1000.0
+        self.window = window
+        self.queues: Dict[str, asyncio.Queue] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.control: List[Dict[str, Any]] = []  # protocol errors (at most SUB_QUEUE), sent ahead of stream events
+        self.seq = 0
+        self.acked = 0
+        self.credit = asyncio.Event()
+        self.credit.set()
+
+    async def emit(self, sub: str, event: Dict[str, Any]) -> None:
+        queue = self.queues.get(sub)
+        if queue is not None:
+            await queue.put({"sub": sub, **event})
+
+    def subscribe(self, sub: str, kind: str, params: Dict[str, Any]) -> Optional[str]:
+        if sub in self.queues:
+            return "subscription id in use"
+        if len(self.queues) >= MAX_SUBSCRIPTIONS:
+            return f"at most {MAX_SUBSCRIPTIONS} subscriptions per connection"
+        producer = PRODUCERS.get(kind)
+        if producer is None:
+            return f"unknown kind {kind!r}; expected one of {sorted(PRODUCERS)}"
+        self.queues[sub] = asyncio.Queue(maxsize=SUB_QUEUE)
+        self.tasks[sub] = asyncio.create_task(self._produce(sub, producer, params))
+        return None
+
+    async def _produce(self, sub: str, producer, params: Dict[str, Any]) -> None:
+        try:
+            await producer(self, sub, params)
+            await self.emit(sub, {"type": "end"})
+        except asyncio.CancelledError:
+            raise
+        except (ValidationError, ValueError) as e:
+            await self.emit(sub, {"type": "error", "error": str(e)})
+        except Overloaded:
+            await self.emit(sub, {"type": "error", "error": "server busy, retry later"})
+        except BudgetExceeded:
+            await self.emit(sub, {"type": "error", "error": "computation exceeded its CPU time budget"})
+        except Exception:
+            await self.emit(sub, {"type": "error", "error": "server error"})
+
+    def protocol_error(self, event: Dict[str, Any]) -> bool:
+        """Queue a protocol error for the next batch; False once ``SUB_QUEUE`` are already waiting."""
+        if len(self.control) >= SUB_QUEUE:
+            return False
+        self.control.append(event)
+        return True
+
+    def unsubscribe(self, sub: str) -> None:
+        task = self.tasks.pop(sub, None)
+        if task is not None:
+            task.cancel()
+        self.queues.pop(sub, None)
+
+    def ack(self, seq: int) -> None:
+        self.acked = max(self.acked, min(seq, self.seq))
+        if self.seq - self.acked < self.window:
+            self.credit.set()
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        events, self.control = self.control, []
+        active = list(self.queues.items())
+        while active and len(events) < MAX_BATCH_EVENTS:
+            still = []
+            for sub, queue in active:
+                if queue.empty():
+                    continue
+                event = queue.get_nowait()
+                events.append(event)
+                if event["type"] in ("end", "error"):
+                    # finished; the producer task is done
+                    self.queues.pop(sub, None)
+                    self.tasks.pop(sub, None)
+                else:
+                    still.append((sub, queue))
+            active = still
+        return events
+
+    async def writer(self) -> None:
+        while True:
+            await asyncio.sleep(self.slice)
+            if self.window:
+                await self.credit.wait()
+            events = self._drain()
+            if not events:
+                continue
+            self.seq += 1
+            if self.window and self.seq - self.acked >= self.window:
+                self.credit.clear()
+            await self.websocket.send_text(json.dumps({"type": "batch", "seq": self.seq, "events": events},
+                                                      separators=(",", ":")))
+
+    def close(self) -> None:
+        for sub in list(self.tasks):
+            self.unsubscribe(sub)
+
+
+async def _produce_path(conn: StreamConnection, sub: str, params: Dict[str, Any]) -> None:
+    path = params.get("path", [])
+    delay = float(params.get("delay_ms", 300)) / 1000.0
+    for idx, nid in enumerate(path):
+        await conn.emit(sub, {"type": "step", "step": idx, "node": nid, "total": len(path)})
+        if delay:
+            await asyncio.sleep(delay)
+
+
+async def _produce_steps(conn: StreamConnection, sub: str, params: Dict[str, Any]) -> None:
+    req = GraphRequest(**params)
+    options = req.options or {}
+    # workers receive the compiled arrays, not the request models
+    graph = await run_in_threadpool(compile_graph, req.nodes, req.edges)
+    result = await compute.run(None, run_algorithm, None, None, req.algorithm, req.source, req.target,
+                               options, graph, size=graph.m, budget=compute.budget(options))
+    delay = float(params.get("delay_ms", 0)) / 1000.0
+    steps = result.get("steps") or []
+    for idx, step in enumerate(steps):
+        await conn.emit(sub, {"type": "step", "step": idx, "total": len(steps), "data": step})
+        if delay:
+            await asyncio.sleep(delay)
+    await conn.emit(sub, {"type": "result", "path": result["path"], "metrics": result["metrics"],
+                          "trace": result.get("trace")})
+
+
+async def _produce_trace(conn: StreamConnection, sub: str, params: Dict[str, Any]) -> None:
+    req = GraphRequest(**params)
+    options = {"trace": "full", **(req.options or {}), "trace_format": "columnar"}
+    Trace.from_options((), options)
+    graph = await run_in_threadpool(compile_graph, req.nodes, req.edges)
+    items = compute.stream(None, stream_algorithm, req.algorithm, req.source, req.target, options, graph,
+                           size=graph.m, budget=compute.budget(options))
+    try:
+        async for kind, item in items:
+            if kind == "trace":
+                # blocks while the client is behind, which pauses the search
+                await conn.emit(sub, {"type": "trace", **item})
+            elif kind == "result":
+                await conn.emit(sub, {"type": "result", **item})
+    finally:
+        await items.aclose()
+
+
+async def _produce_simulation(conn: StreamConnection, sub: str, params: Dict[str, Any]) -> None:
+    req = SimulationRequest(**params)
+    await _simulate(req, lambda event: conn.emit(sub, event), "summary")
+
+
+PRODUCERS = {
+    "path": _produce_path,
+    "steps": _produce_steps,
+    "trace": _produce_trace,
+    "simulate-network": _produce_simulation,
+}
+
+
+def _handle(conn: StreamConnection, text: str) -> Optional[Dict[str, Any]]:
+    """Apply one client frame; returns the protocol error to report, if any."""
+    try:
+        msg = json.loads(text)
+        op = msg.get("op")
+    except (ValueError, AttributeError):
+        return {"type": "error", "error": "expected a JSON object"}
+    if op == "ack":
+        if not isinstance(msg.get("seq"), int):
+            return {"type": "error", "error": "ack needs an integer seq"}
+        conn.ack(msg["seq"])
+    elif op == "subscribe":
+        sub = str(msg.get("id", ""))
+        params = {k: v for k, v in msg.items() if k not in ("op", "id", "kind")}
+        error = conn.subscribe(sub, msg.get("kind", ""), params) if sub else "subscription id required"
+        if error:
+            return {"type": "error", "sub": sub or None, "error": error}
+    elif op == "unsubscribe":
+        conn.unsubscribe(str(msg.get("id", "")))
+    else:
+        return {"type": "error", "error": "expected op=subscribe, unsubscribe or ack"}
+    return None
+
+
+async def _receive(conn: StreamConnection, websocket: WebSocket) -> None:
+    try:
+        while True:
+            error = _handle(conn, await websocket.receive_text())
+            if error is not None and not conn.protocol_error(error):
+                # a client that keeps sending bad frames without reading them back is cut off
+                await websocket.close(code=1008)
+                return
+    except WebSocketDisconnect:
+        pass
+
+
+@router.websocket("/route/ws/stream")
+async def ws_stream(websocket: WebSocket, slice_ms: float = SLICE_MS, window: int = WINDOW):
+    await websocket.accept()
+    conn = StreamConnection(websocket, slice_ms, max(window, 0))
+    writer = asyncio.create_task(conn.writer())
+    reader = asyncio.create_task(_receive(conn, websocket))
+    try:
+        # whichever side ends first (disconnect, failed send) ends the connection
+        done, _ = await asyncio.wait({reader, writer}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        conn.close()
+        reader.cancel()
+        writer.cancel()
+    failed = [task.exception() for task in done if not task.cancelled() and task.exception() is not None]
+    if failed:
+        try:
+            await websocket.close(code=1011)
+        except Exception:
+            pass
@@ -0,0 +1,244 @@
+# backend/app/sessions.py
+"""
+Server-held graph sessions.
+
+A topology is uploaded once and then edited with node/edge deltas addressed by
+ID; queries run against the session's compiled graph, which is rebuilt lazily
+only after the session changed. When a delta only added nodes and edges, the
+connectivity indexes of the previous graph are carried over to the new one
+instead of being rebuilt. Graphs large enough to be searched in compute
+workers get their indexes built here, so the workers receive them with the
+graph.
+"""
+
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .connectivity import carry_over, connectivity
+from .dynamic import DynamicRouting
+from .executor import INLINE_EDGES
+from .graph import CompiledGraph, build_graph
+from .models import Edge, Node, SessionDelta
+from .results import results
+
+MAX_SESSIONS = 64
+SESSION_TTL_S = 3600
+
+
+class GraphSession:
+    def __init__(self, sid: str, nodes: List[Node], edges: List[Edge]):
+        self.id = sid
+        self.version = 0
+        self.updated_at = self.last_used = time.time()
+        self.nodes: Dict[str, Node] = {n.id: n for n in nodes}
+        self.edges: Dict[str, Edge] = {}
+        self.incident: Dict[str, set] = {nid: set() for nid in self.nodes}
+        self._graph: Optional[CompiledGraph] = None
+        self.routing: Optional[DynamicRouting] = None
+        self._events: List = []
+        # graph built before the pending deltas, and what they inserted, for carry_over
+        self._previous: Optional[CompiledGraph] = None
+        self._added: List[Tuple[str, str]] = []
+        self._shrunk = False
+        self.lock = threading.RLock()
+        for e in edges:
+            self._insert_edge(e)
+        self._added = []
+
+    def _edge_id(self, e: Edge) -> str:
+        if e.id:
+            return e.id
+        base = f"{e.source}->{e.target}"
+        eid, k = base, 1
+        while eid in self.edges:
+            k += 1
+            eid = f"{base}#{k}"
+        return eid
+
+    def _insert_edge(self, e: Edge) -> str:
+        eid = self._edge_id(e)
+        if e.id != eid:
+            e = e.model_copy(update={"id": eid})
+        old = self.edges.get(eid)
+        if old is not None:
+            self._drop_edge(eid)
+        self.edges[eid] = e
+        self._added.append((e.source, e.target))
+        self._events.append(("set", e))
+        self.incident.setdefault(e.source, set()).add(eid)
+        self.incident.setdefault(e.target, set()).add(eid)
+        return eid
+
+    def _drop_edge(self, eid: str) -> Edge:
+        e = self.edges.pop(eid)
+        self._events.append(("del", e))
+        self._shrunk = True
+        self.incident.get(e.source, set()).discard(eid)
+        self.incident.get(e.target, set()).discard(eid)
+        return e
+
+    def _validate(self, delta: SessionDelta) -> None:
+        for kind, ids in (("edges", delta.remove_edges), ("nodes", delta.remove_nodes)):
+            repeated = [x for x, k in Counter(ids).items() if k > 1]
+            if repeated:
+                raise ValueError(f"{kind} removed more than once: {repeated[:5]}")
+        missing = [eid for eid in delta.remove_edges if eid not in self.edges]
+        if missing:
+            raise ValueError(f"unknown edges: {missing[:5]}")
+        missing = [nid for nid in delta.remove_nodes if nid not in self.nodes]
+        if missing:
+            raise ValueError(f"unknown nodes: {missing[:5]}")
+        removed_nodes = set(delta.remove_nodes)
+        added_nodes = {n.id for n in delta.add_nodes}
+        for e in delta.add_edges:
+            for nid in (e.source, e.target):
+                if nid in added_nodes:
+                    continue
+                if nid not in self.nodes or nid in removed_nodes:
+                    raise ValueError(f"edge endpoint {nid} is not in the session")
+        gone = set(delta.remove_edges)
+        for nid in removed_nodes:
+            gone |= self.incident.get(nid, set())
+        added_edges = {e.id for e in delta.add_edges if e.id}
+        for rw in delta.reweight_edges:
+            if rw.id not in added_edges and (rw.id not in self.edges or rw.id in gone):
+                raise ValueError(f"unknown edge {rw.id}")
+        if self.routing is not None:
+            if any(e.weight < 0 for e in delta.add_edges) or any(rw.weight < 0 for rw in delta.reweight_edges):
+                raise ValueError("dynamic routing requires non-negative weights")
+
+    def apply(self, delta: SessionDelta) -> Dict[str, Any]:
+        """
+        Apply a delta atomically: edge removals, node removals (with their
+        incident edges), node upserts, edge upserts, then reweights.
+
+        When sources are tracked, their shortest-path trees are repaired
+        incrementally and the changed routes are returned under ``changed_routes``.
+
+        Raises:
+            ValueError: if the delta references unknown nodes or edges.
+        """
+        with self.lock:
+            self._validate(delta)
+            self._events = []
+            removed_edges = [self._drop_edge(eid).id for eid in delta.remove_edges]
+            for nid in delta.remove_nodes:
+                for eid in list(self.incident.pop(nid, ())):
+                    removed_edges.append(self._drop_edge(eid).id)
+                del self.nodes[nid]
+                self._events.append(("remove_node", nid))
+                self._shrunk = True
+            for n in delta.add_nodes:
+                if n.id not in self.nodes:
+                    self._events.append(("add_node", n.id))
+                self.nodes[n.id] = n
+                self.incident.setdefault(n.id, set())
+            added_edges = [self._insert_edge(e) for e in delta.add_edges]
+            for rw in delta.reweight_edges:
+                self.edges[rw.id] = e = self.edges[rw.id].model_copy(update={"weight": rw.weight})
+                self._events.append(("set", e))
+            self.version += 1
+            self.updated_at = time.time()
+            if self._graph is not None:
+                self._previous = self._graph
+            elif self._previous is None:
+                self._added = []
+            self.forget_graph()
+            out: Dict[str, Any] = {"added_edges": added_edges, "removed_edges": removed_edges}
+            if self.routing is not None:
+                out["changed_routes"] = self.routing.apply(self._events)
+            self._events = []
+            return out
+
+    def track(self, sources: List[str], directed: bool = False) -> DynamicRouting:
+        """Start maintaining shortest-path trees for ``sources`` across later deltas."""
+        with self.lock:
+            self.routing = DynamicRouting(self.nodes, self.edges.values(), sources, directed)
+            return self.routing
+
+    def untrack(self) -> None:
+        with self.lock:
+            self.routing = None
+
+    def graph(self) -> CompiledGraph:
+        with self.lock:
+            if self._graph is None:
+                graph = build_graph(list(self.nodes.values()), list(self.edges.values()))
+                if self._previous is not None and not self._shrunk:
+                    carry_over(self._previous, graph, self._added)
+                if graph.m >= INLINE_EDGES:
+                    # searched in compute workers, which only get the indexes built here
+                    for directed in (False, True):
+                        connectivity(graph, directed)
+                self._previous, self._added, self._shrunk = None, [], False
+                self._graph = graph
+            return self._graph
+
+    def forget_graph(self) -> None:
+        """Drop the compiled graph and the cached query results computed on it."""
+        with self.lock:
+            if self._graph is not None:
+                results.invalidate(self._graph.fingerprint)
+                self._graph = None
+
+    def node_list(self) -> List[Node]:
+        return list(self.nodes.values())
+
+    def edge_list(self) -> List[Edge]:
+        return list(self.edges.values())
+
+    def summary(self) -> Dict:
+        return {"session_id": self.id, "version": self.version,
+                "nodes": len(self.nodes), "edges": len(self.edges)}
+
+
+class SessionStore:
+    """Bounded in-memory session registry with idle expiry."""
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, ttl_s: float = SESSION_TTL_S):
+        self.max_sessions = max_sessions
+        self.ttl_s = ttl_s
+        self._sessions: "OrderedDict[str, GraphSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl_s
+        for sid in [sid for sid, s in self._sessions.items() if s.last_used < cutoff]:
+            del self._sessions[sid]
+
+    def create(self, nodes: List[Node], edges: List[Edge]) -> GraphSession:
+        session = GraphSession(str(uuid.uuid4()), nodes, edges)
+        with self._lock:
+            self._expire()
+            self._sessions[session.id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, sid: str) -> Optional[GraphSession]:
+        with self._lock:
+            session = self._sessions.get(sid)
+            if session is not None:
+                session.last_used = time.time()
+                self._sessions.move_to_end(sid)
+            return session
+
+    def latest(self) -> Optional[GraphSession]:
+        with self._lock:
+            if not self._sessions:
+                return None
+            return max(self._sessions.values(), key=lambda s: s.updated_at)
+
+    def delete(self, sid: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(sid, None)
+        if session is None:
+            return False
+        session.forget_graph()
+        return True
+
+
+sessions = SessionStore()
@@ -0,0 +1,281 @@
+# backend/app/simulation.py
+"""
+Discrete-event packet simulation.
+
+Every directed link is a FIFO drop-tail queue in front of a transmitter with
+a fixed bandwidth, followed by a propagation delay. Because service is FIFO
+and deterministic, a packet's departure time is fixed the moment it joins a
+queue (``max(arrival, link busy until) + transmission time``). Each link only
+keeps the departure times of the packets still on it, and a hop costs a
+single heap event. Flows are routed once per distinct source with the
+shortest-path trees used by the batch endpoint. The clock is simulated time,
+so a run takes as long as its events take to process, not the simulated
+duration. :func:`stream_simulation` runs one as a compute job and streams its
+frames back.
+"""
+
+import heapq
+import math
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .batch import BATCH_ALGORITHMS, solve_sources
+from .graph import CompiledGraph
+
+MAX_SIM_PACKETS = 2_000_000
+MAX_SIM_FLOWS = 100_000
+HOT_LINKS = 10
+
+
+class Flow:
+    """``count`` packets from ``source`` to ``target``, one every ``interval`` seconds from ``start``."""
+
+    __slots__ = ("source", "target", "count", "interval", "start")
+
+    def __init__(self, source: int, target: int, count: int, interval: float, start: float = 0.0):
+        self.source = source
+        self.target = target
+        self.count = count
+        self.interval = interval
+        self.start = start
+
+
+class Simulator:
+    """
+    Packet-level simulation of ``flows`` over ``graph``.
+
+    Args:
+        graph: Topology; undirected graphs get one link per direction.
+        flows: Traffic to inject.
+        directed: Treat edges as one-way links.
+        bandwidth_mbps: Link bandwidth.
+        packet_bytes: Size of every packet.
+        queue_packets: Packets a link can hold waiting for the transmitter.
+        delay_per_weight_ms: Propagation delay per unit of edge weight.
+        algorithm: Routing algorithm name from ``BATCH_ALGORITHMS``.
+
+    Raises:
+        ValueError: on unsupported algorithms, invalid link parameters or
+            traffic beyond ``MAX_SIM_FLOWS`` / ``MAX_SIM_PACKETS``.
+    """
+
+    def __init__(self, graph: CompiledGraph, flows: Sequence[Flow], directed: bool = False,
+                 bandwidth_mbps: float = 100.0, packet_bytes: int = 1500, queue_packets: int = 64,
+                 delay_per_weight_ms: float = 1.0, algorithm: str = "dijkstra"):
+        algorithm = algorithm.strip().lower()
+        if algorithm not in BATCH_ALGORITHMS:
+            raise ValueError(f"simulation routes with {sorted(BATCH_ALGORITHMS)}")
+        if bandwidth_mbps <= 0 or packet_bytes <= 0 or queue_packets < 0 or delay_per_weight_ms < 0:
+            raise ValueError("link parameters must be positive")
+        if len(flows) > MAX_SIM_FLOWS:
+            raise ValueError(f"at most {MAX_SIM_FLOWS} flows")
+        if sum(f.count for f in flows) > MAX_SIM_PACKETS:
+            raise ValueError(f"at most {MAX_SIM_PACKETS} packets")
+        if graph.m and graph.weights.min() < 0:
+            raise ValueError("simulation requires non-negative weights")
+        self.graph = graph
+        self.flows = list(flows)
+        if directed:
+            src, dst, w = graph.src, graph.dst, graph.weights
+        else:
+            src = np.concatenate([graph.src, graph.dst])
+            dst = np.concatenate([graph.dst, graph.src])
+            w = np.concatenate([graph.weights, graph.weights])
+        # parallel edges: route over the lightest one, as the searches do
+        order = np.lexsort((w, dst, src))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (src[order][1:] != src[order][:-1]) | (dst[order][1:] != dst[order][:-1])
+        keep = order[first & (src[order] != dst[order])]
+        self.link_src = src[keep]
+        self.link_dst = dst[keep]
+        self.links = len(keep)
+        self.link_index: Dict[Tuple[int, int], int] = dict(zip(
+            zip(self.link_src.tolist(), self.link_dst.tolist()), range(self.links)))
+        self.tx = packet_bytes * 8 / (bandwidth_mbps * 1e6)
+        self.prop = (w[keep] * delay_per_weight_ms / 1000.0).tolist()
+        self.capacity = queue_packets
+        self.paths = self._route(algorithm, directed)
+
+    def _route(self, algorithm: str, directed: bool) -> List[Optional[List[int]]]:
+        """Link sequence per flow (None when the target is unreachable)."""
+        groups: Dict[int, List[int]] = {}
+        for f in self.flows:
+            groups.setdefault(f.source, []).append(f.target)
+        jobs = [(s, sorted(set(ts))) for s, ts in groups.items()]
+        routes: Dict[Tuple[int, int], Optional[List[int]]] = {}
+        for (s, targets), answers in zip(jobs, solve_sources(self.graph, jobs, algorithm, directed)):
+            for t, (path, _) in zip(targets, answers):
+                if not path:
+                    routes[(s, t)] = None
+                else:
+                    routes[(s, t)] = [self.link_index[(a, b)] for a, b in zip(path, path[1:])]
+        return [routes[(f.source, f.target)] for f in self.flows]
+
+    def run(self, tick: float = 0.01, duration: Optional[float] = None,
+            hot_links: int = HOT_LINKS) -> Iterator[Dict[str, Any]]:
+        """
+        Simulate until every packet is delivered or dropped (or ``duration``
+        seconds have passed), yielding one aggregate frame per ``tick`` of
+        simulated time that saw activity.
+        """
+        if tick <= 0:
+            raise ValueError("tick must be positive")
+        paths = self.paths
+        born: List[float] = []
+        pflow: List[int] = []
+        events: List[Tuple[float, int, int]] = []
+        for fi, f in enumerate(self.flows):
+            if paths[fi] is None:
+                continue
+            for k in range(f.count):
+                t = f.start + k * f.interval
+                events.append((t, len(born), 0))
+                born.append(t)
+                pflow.append(fi)
+        heapq.heapify(events)
+        heappush, heappop = heapq.heappush, heapq.heappop
+        tx, prop, capacity = self.tx, self.prop, self.capacity + 1  # waiting plus in service
+        free_at = [0.0] * self.links
+        queues = [deque() for _ in range(self.links)]
+        link_src, link_dst, ids = self.link_src.tolist(), self.link_dst.tolist(), self.graph.ids
+
+        total = {"injected": len(born), "delivered": 0, "dropped": 0, "latency_sum": 0.0, "latency_max": 0.0}
+        in_flight = 0
+        tick_end = tick
+        delivered, dropped, injected, latencies = 0, 0, 0, []
+        peak: Dict[int, int] = {}
+        busy: Dict[int, float] = {}
+        drops: Dict[int, int] = {}
+
+        def frame(t_end: float) -> Dict[str, Any]:
+            hot = sorted(peak, key=peak.get, reverse=True)[:hot_links]
+            lat = np.array(latencies) if latencies else None
+            return {
+                "t_ms": round(t_end * 1000, 3),
+                "injected": injected,
+                "delivered": delivered,
+                "dropped": dropped,
+                "in_flight": in_flight,
+                "latency_ms": None if lat is None else {
+                    "mean": round(float(lat.mean()) * 1000, 3),
+                    "p95": round(float(np.percentile(lat, 95)) * 1000, 3),
+                    "max": round(float(lat.max()) * 1000, 3),
+                },
+                "active_links": len(peak),
+                "hot_links": [{"source": ids[link_src[a]], "target": ids[link_dst[a]], "queue": peak[a],
+                               "utilization": round(min(1.0, busy[a] / tick), 3), "drops": drops.get(a, 0)}
+                              for a in hot],
+            }
+
+        while events:
+            t, pid, hop = events[0]
+            if duration is not None and t > duration:
+                break
+            if t >= tick_end:
+                if delivered or dropped or injected or peak:
+                    yield frame(tick_end)
+                    delivered, dropped, injected, latencies = 0, 0, 0, []
+                    peak, busy, drops = {}, {}, {}
+                # skip idle ticks in one step
+                tick_end = (math.floor(t / tick) + 1) * tick
+            heappop(events)
+            path = paths[pflow[pid]]
+            if hop == 0:
+                injected += 1
+                in_flight += 1
+            if hop == len(path):
+                latency = t - born[pid]
+                delivered += 1
+                in_flight -= 1
+                latencies.append(latency)
+                total["delivered"] += 1
+                total["latency_sum"] += latency
+                if latency > total["latency_max"]:
+                    total["latency_max"] = latency
+                continue
+            a = path[hop]
+            q = queues[a]
+            while q and q[0] <= t:
+                q.popleft()
+            if len(q) >= capacity:
+                dropped += 1
+                in_flight -= 1
+                total["dropped"] += 1
+                drops[a] = drops.get(a, 0) + 1
+                peak.setdefault(a, len(q))
+                busy.setdefault(a, 0.0)
+                continue
+            start = free_at[a]
+            if start < t:
+                start = t
+            departs = start + tx
+            free_at[a] = departs
+            q.append(departs)
+            if len(q) > peak.get(a, -1):
+                peak[a] = len(q)
+            busy[a] = busy.get(a, 0.0) + tx
+            heappush(events, (departs + prop[a], pid, hop + 1))
+        if delivered or dropped or injected or peak:
+            yield frame(tick_end)
+        self.summary = {
+            "flows": len(self.flows),
+            "routed_flows": sum(p is not None for p in paths),
+            "links": self.links,
+            "injected": total["injected"],
+            "delivered": total["delivered"],
+            "dropped": total["dropped"],
+            "unfinished": len(events),
+            "latency_ms": None if not total["delivered"] else {
+                "mean": round(total["latency_sum"] / total["delivered"] * 1000, 3),
+                "max": round(total["latency_max"] * 1000, 3),
+            },
+        }
+
+
+def simulation_size(graph: CompiledGraph, flows: Sequence[Flow]) -> int:
+    """Cost of a run in the edge units of :meth:`~app.executor.ComputeExecutor.run`'s ``size``."""
+    return graph.m + sum(f.count for f in flows)
+
+
+def stream_simulation(channel, graph: CompiledGraph, flows: Sequence[Flow], options: Dict[str, Any],
+                      tick: float, duration: Optional[float] = None, chunk_s: float = 0.0) -> Dict[str, Any]:
+    """
+    Build a :class:`Simulator` (``options`` are its keyword arguments) and run
+    it, putting ``("start", info)`` and then ``("ticks", frames)`` on
+    ``channel``, one item per ``chunk_s`` of work (per frame when 0).
+    Returns the summary.
+    """
+    sim = Simulator(graph, flows, **options)
+    channel.put(("start", {"links": sim.links, "flows": len(sim.flows),
+                           "routed_flows": sum(p is not None for p in sim.paths)}))
+    chunk: List[Dict[str, Any]] = []
+    deadline = time.perf_counter() + chunk_s
+    for frame in sim.run(tick, duration):
+        chunk.append(frame)
+        if time.perf_counter() >= deadline:
+            channel.put(("ticks", chunk))
+            chunk = []
+            deadline = time.perf_counter() + chunk_s
+    if chunk:
+        channel.put(("ticks", chunk))
+    return sim.summary
+
+
+def random_flows(graph: CompiledGraph, count: int, packets: int, rate_pps: float,
+                 spread_ms: float = 0.0, seed: Optional[int] = None) -> List[Flow]:
+    """``count`` flows between distinct random node pairs, starting uniformly within ``spread_ms``."""
+    if graph.n < 2:
+        raise ValueError("need at least two nodes for random flows")
+    if count > MAX_SIM_FLOWS:
+        raise ValueError(f"at most {MAX_SIM_FLOWS} flows")
+    if rate_pps <= 0:
+        raise ValueError("rate_pps must be positive")
+    rng = np.random.default_rng(seed)
+    src = rng.integers(0, graph.n, size=count)
+    dst = (src + rng.integers(1, graph.n, size=count)) % graph.n
+    start = rng.uniform(0, spread_ms / 1000.0, size=count)
+    return [Flow(s, t, packets, 1.0 / rate_pps, st)
+            for s, t, st in zip(src.tolist(), dst.tolist(), start.tolist())]
@@ -2,11 +2,202 @@
 
 import json
 import os
-from typing import Any, Dict, List, Optional
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 
 BASE_DIR = os.path.dirname(__file__)
 SAVE_DIR = os.path.join(BASE_DIR, "..", "saved_topologies")
 os.makedirs(SAVE_DIR, exist_ok=True)
+# named topologies saved through /network/save
+NETWORK_SAVE_DIR = os.path.join(BASE_DIR, "..", "data", "saved_topologies")
+os.makedirs(NETWORK_SAVE_DIR, exist_ok=True)
+
+INDEX_FILE = "index.sqlite3"
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+_TID_RE = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_.-]*$")
+
+
+class TopologyStore:
+    """
+    One-JSON-file-per-topology directory with a SQLite metadata index and an
+    LRU cache of parsed documents bounded by their on-disk size.
+
+    Listing and pagination only read the index. Writes go to a temporary file
+    that is atomically renamed into place before the index row is updated;
+    on start-up the index is reconciled with the files actually present.
+
+    Args:
+        directory: Directory holding ``<id>.json`` files.
+        wrapped: Whether documents are ``{"id", "name", "created_at",
+            "topology"}`` entries (True) or bare topologies (False). Entries
+            of imported binaries carry ``"nodes"``/``"edges"`` counts instead
+            of a topology.
+        cache_max_bytes: Cache budget, measured in serialized bytes.
+    """
+
+    def __init__(self, directory: str, wrapped: bool, cache_max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = directory
+        self.wrapped = wrapped
+        self.cache_max_bytes = cache_max_bytes
+        self._cache: "OrderedDict[str, Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(directory, INDEX_FILE), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS topologies ("
+            " id TEXT PRIMARY KEY, name TEXT, created_at INTEGER,"
+            " nodes INTEGER, edges INTEGER, size INTEGER, mtime REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS topologies_created ON topologies (created_at, id)")
+        self._db.commit()
+        self.reconcile()
+
+    def path(self, tid: str) -> str:
+        if not _TID_RE.match(tid):
+            raise ValueError(f"invalid topology id {tid!r}")
+        return os.path.join(self.directory, f"{tid}.json")
+
+    def _metadata(self, tid: str, doc: Dict[str, Any], size: int, mtime: float) -> Tuple:
+        topo = doc.get("topology", {}) if self.wrapped else doc
+        name = doc.get("name") if self.wrapped else None
+        created_at = doc.get("created_at") if self.wrapped else None
+        if self.wrapped and "topology" not in doc:
+            # an imported binary: the entry only records the counts, the .ntb file holds the body
+            nodes, edges = doc.get("nodes", 0), doc.get("edges", 0)
+        else:
+            nodes, edges = len(topo.get("nodes", [])), len(topo.get("edges", []))
+        return (tid, name, int(created_at if created_at is not None else mtime), nodes, edges, size, mtime)
+
+    def reconcile(self) -> None:
+        """Index files added or changed behind the store's back and drop rows for deleted ones."""
+        with self._lock:
+            known = {row[0]: (row[1], row[2]) for row in self._db.execute("SELECT id, size, mtime FROM topologies")}
+            present = set()
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(".json") or not _TID_RE.match(entry.name[:-5]):
+                    continue
+                tid = entry.name[:-5]
+                st = entry.stat()
+                present.add(tid)
+                if known.get(tid) == (st.st_size, st.st_mtime):
+                    continue
+                try:
+                    with open(entry.path, "r", encoding="utf-8") as f:
+                        doc = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if not isinstance(doc, dict):
+                    continue
+                self._db.execute("INSERT OR REPLACE INTO topologies VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                 self._metadata(tid, doc, st.st_size, st.st_mtime))
+            gone = [(tid,) for tid in known if tid not in present]
+            self._db.executemany("DELETE FROM topologies WHERE id = ?", gone)
+            self._db.commit()
+
+    def _cache_put(self, tid: str, doc: Dict[str, Any], size: int) -> None:
+        old = self._cache.pop(tid, None)
+        if old is not None:
+            self._cache_bytes -= old[1]
+        if size > self.cache_max_bytes:
+            return
+        self._cache[tid] = (doc, size)
+        self._cache_bytes += size
+        while self._cache_bytes > self.cache_max_bytes:
+            _, (_, evicted) = self._cache.popitem(last=False)
+            self._cache_bytes -= evicted
+
+    def save(self, tid: str, doc: Dict[str, Any]) -> None:
+        """
+        Atomically write a document and index it.
+
+        Raises:
+            ValueError: if ``tid`` is not a safe file name.
+        """
+        path = self.path(tid)
+        data = json.dumps(doc, separators=(",", ":")).encode("utf-8")
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=f".{tid}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        mtime = os.stat(path).st_mtime
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO topologies VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             self._metadata(tid, doc, len(data), mtime))
+            self._db.commit()
+            self._cache_put(tid, doc, len(data))
+
+    def load(self, tid: str) -> Optional[Dict[str, Any]]:
+        """Parsed document for ``tid`` (shared, do not mutate) or None."""
+        with self._lock:
+            hit = self._cache.get(tid)
+            if hit is not None:
+                self._cache.move_to_end(tid)
+                return hit[0]
+        try:
+            path = self.path(tid)
+        except ValueError:
+            return None
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            data = f.read()
+        doc = json.loads(data)
+        with self._lock:
+            self._cache_put(tid, doc, len(data))
+        return doc
+
+    def exists(self, tid: str) -> bool:
+        with self._lock:
+            row = self._db.execute("SELECT 1 FROM topologies WHERE id = ?", (tid,)).fetchone()
+        return row is not None
+
+    def list(self, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Index rows ordered by creation time, without touching topology bodies."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, name, created_at, nodes, edges FROM topologies"
+                " ORDER BY created_at, id LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset)).fetchall()
+        return [{"id": r[0], "name": r[1], "created_at": r[2], "nodes": r[3], "edges": r[4]} for r in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM topologies").fetchone()[0]
+
+
+legacy_store = TopologyStore(SAVE_DIR, wrapped=False)
+network_store = TopologyStore(NETWORK_SAVE_DIR, wrapped=True)
+
+
+def artifact_path(tid: str, suffix: str) -> Optional[str]:
+    """
+    Path of a file stored next to a saved topology (e.g. precomputed indexes).
+
+    Args:
+        tid: Topology ID.
+        suffix: Artifact suffix such as ``.landmarks.npz``.
+
+    Returns:
+        The artifact path in the directory holding the topology, or None if
+        no topology with this ID is saved.
+    """
+    for store in (network_store, legacy_store):
+        if store.exists(tid):
+            return os.path.join(store.directory, f"{tid}{suffix}")
+    return None
 
 
 def save_topology(tid: str, topology: Dict[str, Any]) -> None:
@@ -16,10 +207,11 @@ def save_topology(tid: str, topology: Dict[str, Any]) -> None:
     Args:
         tid: Topology ID (used as filename).
         topology: Dictionary representing the topology.
+
+    Raises:
+        ValueError: if ``tid`` is not a safe file name.
     """
-    path = os.path.join(SAVE_DIR, f"{tid}.json")
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(topology, f, indent=2)
+    legacy_store.save(tid, topology)
 
 
 def load_topology(tid: str) -> Optional[Dict[str, Any]]:
@@ -32,23 +224,42 @@ def load_topology(tid: str) -> Optional[Dict[str, Any]]:
     Returns:
         The topology dictionary if found, otherwise None.
     """
-    path = os.path.join(SAVE_DIR, f"{tid}.json")
-    if not os.path.exists(path):
-        return None
-
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return legacy_store.load(tid)
 
 
-def list_topologies() -> List[str]:
+def list_topologies(offset: int = 0, limit: Optional[int] = None) -> List[str]:
     """
-    List all saved topology IDs.
+    List saved topology IDs from the index.
+
+    Args:
+        offset: Number of IDs to skip.
+        limit: Maximum number of IDs to return (all when None).
 
     Returns:
         A list of topology IDs (filenames without .json).
     """
-    return [
-        fname[:-5]
-        for fname in os.listdir(SAVE_DIR)
-        if fname.endswith(".json")
-    ]
+    return [row["id"] for row in legacy_store.list(offset, limit)]
+
+
+def load_saved_graph(tid: str) -> Optional[Dict[str, Any]]:
+    """
+    Load the ``{"nodes": [...], "edges": [...]}`` body of a saved topology,
+    whichever endpoint saved it.
+
+    Args:
+        tid: Topology ID.
+
+    Returns:
+        The topology dictionary if found, otherwise None. Imported binaries
+        have no JSON body (see :func:`binary_only`) and also give None.
+    """
+    entry = network_store.load(tid)
+    if entry is not None:
+        return entry.get("topology")
+    return load_topology(tid)
+
+
+def binary_only(tid: str) -> bool:
+    """Whether a saved topology's body lives only in its ``.ntb`` copy (an import)."""
+    entry = network_store.load(tid)
+    return entry is not None and "topology" not in entry
@@ -0,0 +1,198 @@
+# backend/app/trace.py
+"""
+Search traces.
+
+Algorithms report each pop / visit / relaxation to a :class:`Trace`, which
+keeps it in parallel columns (event kind, node index, value, search side)
+rather than one dict per event. The mode decides what is kept:
+
+    full     every event
+    capped   the first ``limit`` events
+    sampled  every ``every``-th event, or (without ``every``) an evenly spread
+             sample of at most ``limit`` events: when the buffer overflows,
+             every other event is dropped and the stride doubles
+    off      nothing, only the event count
+
+With a ``sink`` the trace is handed over in columnar chunks while the search
+runs instead of being retained, which is what the streaming endpoints use.
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+VISIT, POP, POP_F, UPDATE = range(4)
+KINDS = ("visit", "pop", "pop-f", "update")
+_VALUE_KEY = (None, "dist", "f", "dist")
+MODES = ("full", "capped", "sampled", "off")
+DEFAULT_TRACE_MODE = "capped"
+DEFAULT_TRACE_LIMIT = 100_000
+DEFAULT_SAMPLE_EVERY = 10
+TRACE_CHUNK = 4096
+FORMATS = ("objects", "columnar")
+
+
+class Trace:
+    """Columnar event recorder; call :meth:`record` from the search loop."""
+
+    def __init__(self, ids: Sequence[str], mode: str = "full", limit: int = DEFAULT_TRACE_LIMIT,
+                 every: Optional[int] = None, sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 chunk: int = TRACE_CHUNK):
+        if mode not in MODES:
+            raise ValueError(f"unknown trace mode {mode!r}; expected one of {', '.join(MODES)}")
+        if limit < 1 or (every is not None and every < 1):
+            raise ValueError("trace limits must be positive")
+        self.ids = ids
+        self.mode = mode
+        self.limit = limit
+        self.sink = sink
+        self.chunk = chunk
+        self.total = 0
+        self.recorded = 0
+        self.sided = False
+        self.notes: List[Dict[str, Any]] = []
+        self.counters: Dict[str, int] = {}
+        self.kind: List[int] = []
+        self.node: List[int] = []
+        self.value: List[Optional[float]] = []
+        self.side: List[int] = []
+        if mode == "sampled" and every is None and sink is not None:
+            # adaptive sampling needs the whole buffer; streams use a fixed stride
+            every = DEFAULT_SAMPLE_EVERY
+        self.every = every
+        self.stride = every or 1
+        self.record = {"full": self._full, "capped": self._capped, "off": self._off,
+                       "sampled": self._sampled_fixed if every else self._sampled}[mode]
+
+    @classmethod
+    def from_options(cls, ids: Sequence[str], options: Dict[str, Any],
+                     sink: Optional[Callable[[Dict[str, Any]], None]] = None) -> "Trace":
+        """Trace configured by ``options["trace"]``, ``["trace_limit"]`` and ``["trace_every"]``."""
+        every = options.get("trace_every")
+        return cls(ids, str(options.get("trace", DEFAULT_TRACE_MODE)).lower(),
+                   int(options.get("trace_limit", DEFAULT_TRACE_LIMIT)),
+                   None if every is None else int(every), sink)
+
+    def _append(self, kind: int, node: int, value, side: int) -> None:
+        self.kind.append(kind)
+        self.node.append(node)
+        self.value.append(value)
+        self.side.append(side)
+        self.recorded += 1
+        if side:
+            self.sided = True
+        if self.sink is not None and len(self.kind) >= self.chunk:
+            self.flush()
+
+    def _full(self, kind: int, node: int, value=None, side: int = 0) -> None:
+        self.total += 1
+        self._append(kind, node, value, side)
+
+    def _capped(self, kind: int, node: int, value=None, side: int = 0) -> None:
+        self.total += 1
+        if self.recorded < self.limit:
+            self._append(kind, node, value, side)
+
+    def _off(self, kind: int, node: int, value=None, side: int = 0) -> None:
+        self.total += 1
+
+    def _sampled_fixed(self, kind: int, node: int, value=None, side: int = 0) -> None:
+        self.total += 1
+        if (self.total - 1) % self.stride == 0:
+            self._append(kind, node, value, side)
+
+    def _sampled(self, kind: int, node: int, value=None, side: int = 0) -> None:
+        self.total += 1
+        if (self.total - 1) % self.stride:
+            return
+        self._append(kind, node, value, side)
+        if len(self.kind) > self.limit:
+            for col in (self.kind, self.node, self.value, self.side):
+                del col[1::2]
+            self.recorded = len(self.kind)
+            self.stride *= 2
+
+    def record_many(self, kind: int, nodes: Sequence[int], values: Sequence[Any]) -> None:
+        """:meth:`record` for a batch of events of one kind (e.g. a vectorized pass)."""
+        if self.mode == "off":
+            self.total += len(nodes)
+        elif self.mode == "capped":
+            room = max(0, self.limit - self.recorded)
+            self.total += len(nodes)
+            for u, value in zip(nodes[:room], values[:room]):
+                self._append(kind, u, value, 0)
+        else:
+            record = self.record
+            for u, value in zip(nodes, values):
+                record(kind, u, value)
+
+    def count(self, **counters: int) -> None:
+        """Search work counters (settled nodes, scanned edges, ...), reported as metrics."""
+        self.counters.update(counters)
+
+    def note(self, **fields: Any) -> None:
+        """Free-form event outside the columns (e.g. a hierarchy query summary)."""
+        self.notes.append(fields)
+
+    def summary(self) -> Dict[str, Any]:
+        out = {"mode": self.mode, "total": self.total, "recorded": self.recorded,
+               "truncated": self.recorded < self.total}
+        if self.mode == "sampled":
+            out["stride"] = self.stride
+        elif self.mode == "capped":
+            out["limit"] = self.limit
+        return out
+
+    def columns(self) -> Dict[str, Any]:
+        """The buffered events in columnar form: parallel arrays plus a kind legend."""
+        ids = self.ids
+        out: Dict[str, Any] = {"legend": list(KINDS), "kind": self.kind, "node": [ids[u] for u in self.node],
+                               "value": self.value}
+        if self.sided:
+            out["direction"] = self.side
+        if self.notes:
+            out["notes"] = self.notes
+        return out
+
+    def objects(self) -> List[Dict[str, Any]]:
+        """The buffered events as one dict per event (the original ``steps`` shape)."""
+        ids = self.ids
+        out: List[Dict[str, Any]] = []
+        for kind, u, value, side in zip(self.kind, self.node, self.value, self.side):
+            step = {KINDS[kind].split("-")[0]: ids[u]}
+            key = _VALUE_KEY[kind]
+            if key is not None:
+                step[key] = value
+            if self.sided:
+                step["direction"] = "backward" if side else "forward"
+            out.append(step)
+        return out + self.notes
+
+    def flush(self) -> None:
+        """Hand buffered events to the sink as one columnar chunk."""
+        if self.sink is None or not (self.kind or self.notes):
+            return
+        chunk = self.columns()
+        self.kind, self.node, self.value, self.side, self.notes = [], [], [], [], []
+        self.sink(chunk)
+
+    def encode(self, fmt: str = "objects") -> Tuple[Optional[List[Dict[str, Any]]], Dict[str, Any]]:
+        """``(steps, trace)`` response fields for the requested format."""
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown trace format {fmt!r}; expected one of {', '.join(FORMATS)}")
+        if self.sink is not None:
+            # the events went to the sink already
+            return None, self.summary()
+        if fmt == "columnar":
+            return None, {**self.summary(), **self.columns()}
+        return self.objects(), self.summary()
+
+
+def trace_line(kind: str, item: Any) -> bytes:
+    """NDJSON line for a streamed search item: a ``trace`` chunk, the ``result`` or an ``error``."""
+    if kind == "trace":
+        line = {"type": "trace", **item}
+    elif kind == "result":
+        line = {"type": "result", **item}
+    else:
+        line = {"type": "error", "detail": str(item)}
+    return (json.dumps(line, separators=(",", ":")) + "\n").encode()
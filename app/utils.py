@@ -3,150 +3,126 @@ graph_utils.py
 Graph algorithms & helpers: Dijkstra, Bellman-Ford, A*, BFS, random generator.
 """
 
-import random, time, math
-from typing import Dict, List, Tuple, Optional
+import heapq, math
+from collections import deque
+from typing import List, Tuple, Optional
+import numpy as np
 from .models import Topology, Node, Edge
+from .generators import generate, to_topology
+from .bellman import bellman_ford_tree
+from .graph import CompiledGraph, compile_graph, reconstruct
+
+def _as_result(graph: CompiledGraph, s: int, t: int, dist: List[float], prev: List[int], visited_order: List[int], with_dist: bool = True):
+    ids = graph.ids
+    path = reconstruct(prev, s, t)
+    return {
+        "path": graph.labels(path) if path else None,
+        "dist": {ids[v]: (d if d != math.inf else None) for v, d in enumerate(dist)} if with_dist else {},
+        "prev": {ids[v]: (ids[u] if u != -1 else None) for v, u in enumerate(prev)},
+        "visited_order": graph.labels(visited_order),
+    }
 
-def topology_to_adj(topology: Topology) -> Dict[str, List[Tuple[str, float, Optional[str]]]]:
-    adj: Dict[str, List[Tuple[str, float, Optional[str]]]] = {}
-    for n in topology.nodes:
-        adj[n.id] = []
-    for e in topology.edges:
-        if e.source not in adj:
-            adj[e.source] = []
-        adj[e.source].append((e.target, float(e.weight), e.id))
-    return adj
+def as_graph(topology) -> CompiledGraph:
+    """Accept either a Topology model or an already compiled graph (e.g. a session's)."""
+    if isinstance(topology, CompiledGraph):
+        return topology
+    return compile_graph(topology.nodes, topology.edges)
 
-def reconstruct_path(prev: Dict[str, Optional[str]], source: str, target: str) -> Optional[List[str]]:
-    path = []
-    cur = target
-    while cur is not None:
-        path.append(cur)
-        cur = prev.get(cur, None)
-    path.reverse()
-    if not path or path[0] != source:
-        return None
-    return path
+def _endpoints(graph: CompiledGraph, source: str, target: str) -> Tuple[int, int]:
+    if source not in graph.index or target not in graph.index:
+        raise ValueError("source/target must be in topology")
+    return graph.index[source], graph.index[target]
 
 # Dijkstra
 def dijkstra(topology: Topology, source: str, target: str):
-    adj = topology_to_adj(topology)
-    nodes = list(adj.keys())
-    import heapq
-    dist = {v: float("inf") for v in nodes}
-    prev: Dict[str, Optional[str]] = {v: None for v in nodes}
-    dist[source] = 0.0
-    heap = [(0.0, source)]
+    graph = as_graph(topology)
+    offsets, targets, weights = graph.csr(directed=True).lists()
+    s, t = _endpoints(graph, source, target)
+    dist = [float("inf")] * graph.n
+    prev = [-1] * graph.n
+    dist[s] = 0.0
+    heap = [(0.0, s)]
     visited_order = []
     while heap:
         d, u = heapq.heappop(heap)
         if d > dist[u]:
             continue
         visited_order.append(u)
-        if u == target:
+        if u == t:
             break
-        for (v, w, eid) in adj.get(u, []):
-            alt = dist[u] + w
-            if alt < dist.get(v, float("inf")):
+        for k in range(offsets[u], offsets[u + 1]):
+            v = targets[k]
+            alt = d + weights[k]
+            if alt < dist[v]:
                 dist[v] = alt
                 prev[v] = u
                 heapq.heappush(heap, (alt, v))
-    path = reconstruct_path(prev, source, target)
-    return {"path": path, "dist": dist, "prev": prev, "visited_order": visited_order}
+    return _as_result(graph, s, t, dist, prev, visited_order)
 
 # Bellman-Ford
 def bellman_ford(topology: Topology, source: str, target: str):
-    adj = topology_to_adj(topology)
-    nodes = list(adj.keys())
-    dist = {v: float("inf") for v in nodes}
-    prev: Dict[str, Optional[str]] = {v: None for v in nodes}
-    dist[source] = 0.0
-    edges_list: List[Tuple[str, str, float]] = []
-    for u in adj:
-        for v, w, eid in adj[u]:
-            edges_list.append((u, v, float(w)))
-    for _ in range(len(nodes) - 1):
-        changed = False
-        for (u, v, w) in edges_list:
-            if dist[u] != float("inf") and dist[u] + w < dist[v]:
-                dist[v] = dist[u] + w
-                prev[v] = u
-                changed = True
-        if not changed:
-            break
-    for (u, v, w) in edges_list:
-        if dist[u] != float("inf") and dist[u] + w < dist[v]:
-            raise ValueError("Negative weight cycle detected")
-    path = reconstruct_path(prev, source, target)
-    return {"path": path, "dist": dist, "prev": prev, "visited_order": []}
+    graph = as_graph(topology)
+    s, t = _endpoints(graph, source, target)
+    dist, prev, _ = bellman_ford_tree(graph, s, directed=True)
+    return _as_result(graph, s, t, dist, prev, [])
 
 # BFS (unweighted)
-from collections import deque
 def bfs(topology: Topology, source: str, target: str):
-    adj = topology_to_adj(topology)
-    prev: Dict[str, Optional[str]] = {v: None for v in adj}
-    q = deque([source])
-    visited = set([source])
+    graph = as_graph(topology)
+    offsets, targets, _ = graph.csr(directed=True).lists()
+    s, t = _endpoints(graph, source, target)
+    prev = [-1] * graph.n
+    visited = [False] * graph.n
+    visited[s] = True
+    q = deque([s])
     visited_order = []
     while q:
         u = q.popleft()
         visited_order.append(u)
-        if u == target:
+        if u == t:
             break
-        for (v, w, eid) in adj.get(u, []):
-            if v not in visited:
-                visited.add(v)
+        for k in range(offsets[u], offsets[u + 1]):
+            v = targets[k]
+            if not visited[v]:
+                visited[v] = True
                 prev[v] = u
                 q.append(v)
-    path = reconstruct_path(prev, source, target)
-    return {"path": path, "dist": {}, "prev": prev, "visited_order": visited_order}
+    return _as_result(graph, s, t, [], prev, visited_order, with_dist=False)
 
 # A* (Euclidean heuristic if x,y present)
-def heuristic(a: str, b: str, topology: Topology) -> float:
-    pos = {n.id: (n.x, n.y) for n in topology.nodes}
-    pa = pos.get(a); pb = pos.get(b)
-    if not pa or not pb or pa[0] is None or pb[0] is None:
-        return 0.0
-    dx = pa[0] - pb[0]; dy = pa[1] - pb[1]
-    return math.hypot(dx, dy)
+def heuristic(graph: CompiledGraph, target: int) -> List[float]:
+    """Euclidean distance of every node to ``target``; 0 where coordinates are missing."""
+    h = np.hypot(graph.x - graph.x[target], graph.y - graph.y[target])
+    return np.nan_to_num(h, nan=0.0).tolist()
 
 def astar(topology: Topology, source: str, target: str):
-    adj = topology_to_adj(topology)
-    nodes = list(adj.keys())
-    import heapq
-    gscore = {v: float("inf") for v in nodes}
-    fscore = {v: float("inf") for v in nodes}
-    prev: Dict[str, Optional[str]] = {v: None for v in nodes}
-    gscore[source] = 0.0
-    fscore[source] = heuristic(source, target, topology)
-    heap = [(fscore[source], source)]
+    graph = as_graph(topology)
+    offsets, targets, weights = graph.csr(directed=True).lists()
+    s, t = _endpoints(graph, source, target)
+    h = heuristic(graph, t)
+    gscore = [float("inf")] * graph.n
+    prev = [-1] * graph.n
+    gscore[s] = 0.0
+    heap = [(h[s], s)]
     visited_order = []
     while heap:
         f, u = heapq.heappop(heap)
+        if f > gscore[u] + h[u]:
+            continue
         visited_order.append(u)
-        if u == target:
+        if u == t:
             break
-        for (v, w, eid) in adj.get(u, []):
-            tentative_g = gscore[u] + w
-            if tentative_g < gscore.get(v, float("inf")):
+        for k in range(offsets[u], offsets[u + 1]):
+            v = targets[k]
+            tentative_g = gscore[u] + weights[k]
+            if tentative_g < gscore[v]:
                 prev[v] = u
                 gscore[v] = tentative_g
-                fscore[v] = tentative_g + heuristic(v, target, topology)
-                heapq.heappush(heap, (fscore[v], v))
-    path = reconstruct_path(prev, source, target)
-    return {"path": path, "dist": gscore, "prev": prev, "visited_order": visited_order}
+                heapq.heappush(heap, (tentative_g + h[v], v))
+    return _as_result(graph, s, t, gscore, prev, visited_order)
 
 # Random generator
-def generate_random_topology(num_nodes: int = 20, density: float = 0.1, max_weight: float = 10.0) -> Topology:
-    nodes: List[Node] = []
-    edges: List[Edge] = []
-    for i in range(num_nodes):
-        nid = f"n{i}"
-        nodes.append(Node(id=nid, label=nid, x=random.uniform(50, 900), y=random.uniform(50, 600)))
-    for i in range(num_nodes):
-        for j in range(num_nodes):
-            if i == j: continue
-            if random.random() < density:
-                weight = round(random.uniform(1.0, max_weight), 2)
-                edges.append(Edge(id=f"e{i}_{j}_{int(time.time()*1000)}_{random.randint(0,999)}", source=f"n{i}", target=f"n{j}", weight=weight))
-    return Topology(nodes=nodes, edges=edges)
+def generate_random_topology(num_nodes: int = 20, density: float = 0.1, max_weight: float = 10.0,
+                             seed: Optional[int] = None) -> Topology:
+    topo = to_topology(generate("gnp", num_nodes, density, max_weight, seed=seed))
+    return Topology(nodes=[Node(**n) for n in topo["nodes"]], edges=[Edge(**e) for e in topo["edges"]])
@@ -0,0 +1,5 @@
+"""
+Reproducible benchmarks for the routing algorithms and HTTP endpoints.
+
+Run ``python -m benchmarks.run --help`` from the backend directory.
+"""
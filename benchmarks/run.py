@@ -0,0 +1,356 @@
+# backend/benchmarks/run.py
+"""
+Benchmark harness.
+
+Builds seeded graph families (sparse, dense, grid, scale-free) at increasing
+sizes and times three groups of cases:
+
+    algorithm  every search dispatched by ``run_algorithm``, on a precompiled graph
+    route      every function in ``routers.routing.ALGO_MAP``
+    http       end-to-end requests through an in-process ASGI client
+
+Each case runs the same seeded (source, target) queries ``--repeat`` times
+after one warm-up pass and records the median and minimum time per query,
+the peak memory traced in this process during one pass, and the number of
+nodes the search settled. Runs are appended to a JSON history; cases whose
+median grew by more than ``--threshold`` against the baseline run are
+flagged as regressions.
+
+    python -m benchmarks.run --sizes 250,1000,4000
+    python -m benchmarks.run --set-baseline
+    python -m benchmarks.run --groups algorithm --fail-on-regression
+
+ALT computes its landmarks on the warm-up pass and CH falls back to
+Dijkstra, since the generated graphs are not saved topologies.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.algorithms import run_algorithm
+from app.generators import generate, to_topology
+from app.graph import CompiledGraph, compile_graph
+from app.models import Edge, Node
+from app.routers.routing import ALGO_MAP
+
+FAMILIES = {
+    # average degree about four
+    "sparse": lambda n, seed: generate("gnm", n, edges=2 * n, seed=seed),
+    "dense": lambda n, seed: generate("gnp", n, density=0.1, seed=seed),
+    "grid": lambda n, seed: generate("grid", n, seed=seed),
+    "scale-free": lambda n, seed: generate("barabasi-albert", n, attach=2, seed=seed),
+}
+FAMILY_MAX_NODES = {"dense": 2000}
+ALGORITHMS = ("bfs", "dijkstra", "bellman-ford", "a*", "floyd-warshall", "bidirectional", "alt", "ch")
+HTTP_ALGORITHMS = ("dijkstra", "bfs", "a*")
+# cases that are too slow to be worth timing beyond these sizes
+ALGORITHM_MAX_NODES = {"bellman-ford": 2000, "floyd-warshall": 500}
+GROUPS = ("algorithm", "route", "http")
+
+DEFAULT_SIZES = (250, 1000, 4000)
+DEFAULT_HISTORY = os.path.join(os.path.dirname(__file__), "history.json")
+MAX_HISTORY_RUNS = 200
+NOISE_FLOOR_MS = 0.05  # smaller slowdowns are never reported
+
+
+class Workload:
+    """One generated graph plus its seeded queries, in every shape the cases need."""
+
+    def __init__(self, family: str, nodes: int, seed: int, queries: int):
+        gen = FAMILIES[family](nodes, seed)
+        topo = to_topology(gen)
+        self.family = family
+        self.nodes = [Node(**n) for n in topo["nodes"]]
+        self.edges = [Edge(**e) for e in topo["edges"]]
+        self.graph: CompiledGraph = compile_graph(self.nodes, self.edges)
+        self.topology = topo
+        rng = np.random.default_rng(seed + gen.n)
+        src = rng.integers(0, gen.n, size=queries)
+        dst = (src + rng.integers(1, max(gen.n, 2), size=queries)) % max(gen.n, 1)
+        ids = self.graph.ids
+        self.pairs = [(ids[s], ids[t]) for s, t in zip(src.tolist(), dst.tolist())]
+
+    @property
+    def n(self) -> int:
+        return self.graph.n
+
+    @property
+    def m(self) -> int:
+        return self.graph.m
+
+
+Query = Callable[[str, str], Optional[int]]  # runs one query, returns settled nodes if known
+
+
+def algorithm_cases(w: Workload, trace: str) -> List[Tuple[str, Query]]:
+    options = {"trace": trace}
+
+    def case(alg: str) -> Query:
+        def query(s: str, t: str) -> Optional[int]:
+            res = run_algorithm(w.nodes, w.edges, alg, s, t, options, graph=w.graph)
+            return res["trace"]["total"] or None
+        return query
+
+    return [(alg, case(alg)) for alg in ALGORITHMS]
+
+
+def route_cases(w: Workload) -> List[Tuple[str, Query]]:
+    seen: Dict[Any, str] = {}
+    for name, fn in ALGO_MAP.items():
+        seen.setdefault(fn, name)
+
+    def case(fn) -> Query:
+        def query(s: str, t: str) -> Optional[int]:
+            return len(fn(w.graph, s, t)["visited_order"]) or None
+        return query
+
+    return [(name, case(fn)) for fn, name in seen.items()]
+
+
+def http_cases(w: Workload, client) -> List[Tuple[str, Query]]:
+    base = {"nodes": w.topology["nodes"], "edges": w.topology["edges"]}
+    nodes, edges = w.topology["nodes"], w.topology["edges"]
+    columns = {"nodes": {"id": [n["id"] for n in nodes], "x": [n.get("x") for n in nodes],
+                         "y": [n.get("y") for n in nodes]},
+               "edges": {"source": [e["source"] for e in edges], "target": [e["target"] for e in edges],
+                         "weight": [e.get("weight", 1.0) for e in edges]}}
+    # no-cache: the result cache would otherwise answer every repeat
+    cached_headers = {"content-type": "application/json"}
+    headers = {**cached_headers, "cache-control": "no-cache"}
+
+    def post(url: str, body: Dict[str, Any], cache: bool = False) -> Dict[str, Any]:
+        r = client.post(url, content=json.dumps(body), headers=cached_headers if cache else headers)
+        if r.status_code != 200:
+            raise RuntimeError(f"{url} returned {r.status_code}: {r.text[:200]}")
+        return r.json()
+
+    def shortest(alg: str) -> Query:
+        def query(s: str, t: str) -> Optional[int]:
+            res = post("/api/shortest-path", {**base, "algorithm": alg, "source": s, "target": t})
+            return (res.get("trace") or {}).get("total")
+        return query
+
+    def columnar(s: str, t: str) -> Optional[int]:
+        res = post("/api/shortest-path/columnar", {**columns, "algorithm": "dijkstra", "source": s, "target": t})
+        return (res.get("trace") or {}).get("total")
+
+    def cached(s: str, t: str) -> Optional[int]:
+        res = post("/api/shortest-path", {**base, "algorithm": "dijkstra", "source": s, "target": t}, cache=True)
+        return (res.get("trace") or {}).get("total")
+
+    def route(s: str, t: str) -> Optional[int]:
+        res = post("/route/shortest", {"topology": base, "algorithm": "dijkstra", "source": s, "target": t})
+        return len(res["result"]["visited_order"]) or None
+
+    def batch(s: str, t: str) -> Optional[int]:
+        post("/api/shortest-path/batch", {**base, "pairs": [{"source": s, "target": t}]})
+        return None
+
+    cases = [(f"shortest-path/{alg}", shortest(alg)) for alg in HTTP_ALGORITHMS]
+    return cases + [("shortest-path-columnar/dijkstra", columnar), ("shortest-path-cached/dijkstra", cached),
+                    ("route/dijkstra", route), ("batch/dijkstra", batch)]
+
+
+def measure(query: Query, pairs: List[Tuple[str, str]], repeat: int) -> Dict[str, Any]:
+    """Median/min milliseconds per query, peak traced KiB and mean settled nodes."""
+    settled = [query(s, t) for s, t in pairs]  # warm-up
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter_ns()
+        for s, t in pairs:
+            query(s, t)
+        samples.append((time.perf_counter_ns() - t0) / 1e6 / len(pairs))
+    tracemalloc.start()
+    try:
+        for s, t in pairs:
+            query(s, t)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    known = [k for k in settled if k is not None]
+    return {
+        "median_ms": round(statistics.median(samples), 4),
+        "min_ms": round(min(samples), 4),
+        "peak_kib": round(peak / 1024, 1),
+        "settled": round(sum(known) / len(known), 1) if known else None,
+    }
+
+
+def run_suite(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    client = None
+    if "http" in args.groups:
+        try:
+            from fastapi.testclient import TestClient
+        except ImportError:
+            sys.exit("the http group needs httpx (pip install httpx)")
+        from app.main import app
+        client = TestClient(app)
+        client.__enter__()
+    results = []
+    try:
+        for family in args.families:
+            for size in args.sizes:
+                if size > FAMILY_MAX_NODES.get(family, size):
+                    continue
+                w = Workload(family, size, args.seed, args.queries)
+                cases: List[Tuple[str, str, Query]] = []
+                if "algorithm" in args.groups:
+                    cases += [("algorithm", name, q) for name, q in algorithm_cases(w, args.trace)]
+                if "route" in args.groups:
+                    cases += [("route", name, q) for name, q in route_cases(w)]
+                if client is not None:
+                    cases += [("http", name, q) for name, q in http_cases(w, client)]
+                for group, name, query in cases:
+                    alg = name.rsplit("/", 1)[-1]
+                    if w.n > ALGORITHM_MAX_NODES.get(alg, w.n):
+                        continue
+                    if args.only and not any(o in f"{group}/{name}" for o in args.only):
+                        continue
+                    key = f"{group}/{name}/{family}/{size}"
+                    row = {"case": key, "group": group, "name": name, "family": family, "size": size,
+                           "nodes": w.n, "edges": w.m, "queries": len(w.pairs),
+                           **measure(query, w.pairs, args.repeat)}
+                    results.append(row)
+                    print(f"{key:48} {row['median_ms']:10.3f} ms  min {row['min_ms']:10.3f}  "
+                          f"peak {row['peak_kib']:10.1f} KiB  settled {row['settled']}", flush=True)
+    finally:
+        if client is not None:
+            client.__exit__(None, None, None)
+    return results
+
+
+def _commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def load_history(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {"baseline": None, "runs": []}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_history(path: str, history: Dict[str, Any]) -> None:
+    history["runs"] = history["runs"][-MAX_HISTORY_RUNS:]
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=1)
+    os.replace(tmp, path)
+
+
+def baseline_run(history: Dict[str, Any], run_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    """The requested run, else the marked baseline, else the most recent run."""
+    runs = history["runs"]
+    wanted = run_id or history.get("baseline")
+    if wanted:
+        for run in runs:
+            if run["id"] == wanted:
+                return run
+        if run_id:
+            sys.exit(f"no run {run_id!r} in the history")
+    return runs[-1] if runs else None
+
+
+def compare(results: List[Dict[str, Any]], base: Dict[str, Any], threshold: float) -> Dict[str, List[Dict[str, Any]]]:
+    """Cases whose median moved by more than ``threshold`` (a fraction) against ``base``."""
+    before = {r["case"]: r for r in base["results"]}
+    out: Dict[str, List[Dict[str, Any]]] = {"regressions": [], "improvements": []}
+    for r in results:
+        b = before.get(r["case"])
+        if b is None or not b["median_ms"]:
+            continue
+        ratio = r["median_ms"] / b["median_ms"]
+        change = {"case": r["case"], "baseline_ms": b["median_ms"], "median_ms": r["median_ms"],
+                  "ratio": round(ratio, 3)}
+        if ratio > 1 + threshold and r["median_ms"] - b["median_ms"] > NOISE_FLOOR_MS:
+            out["regressions"].append(change)
+        elif ratio < 1 / (1 + threshold):
+            out["improvements"].append(change)
+    return out
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Routing benchmarks.")
+    csv = lambda s: [x.strip() for x in s.split(",") if x.strip()]
+    p.add_argument("--families", type=csv, default=list(FAMILIES), help="comma-separated graph families")
+    p.add_argument("--sizes", type=lambda s: [int(x) for x in csv(s)], default=list(DEFAULT_SIZES),
+                   help="comma-separated node counts")
+    p.add_argument("--groups", type=csv, default=list(GROUPS), help="algorithm, route and/or http")
+    p.add_argument("--only", type=csv, default=[], help="run only cases whose name contains one of these")
+    p.add_argument("--queries", type=int, default=5, help="seeded queries per case")
+    p.add_argument("--repeat", type=int, default=5, help="timed passes over the queries")
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--trace", default="off", help="trace mode for the algorithm group")
+    p.add_argument("--history", default=DEFAULT_HISTORY, help="JSON history file")
+    p.add_argument("--baseline", default=None, help="run id to compare against (default: marked baseline or last run)")
+    p.add_argument("--set-baseline", action="store_true", help="mark this run as the baseline")
+    p.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown as a fraction of the baseline")
+    p.add_argument("--no-save", action="store_true", help="do not append this run to the history")
+    p.add_argument("--fail-on-regression", action="store_true", help="exit with status 1 on regressions")
+    args = p.parse_args(argv)
+    unknown = set(args.families) - set(FAMILIES) or set(args.groups) - set(GROUPS)
+    if unknown:
+        p.error(f"unknown families or groups: {', '.join(sorted(unknown))}")
+    if args.queries < 1 or args.repeat < 1:
+        p.error("--queries and --repeat must be positive")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    history = load_history(args.history)
+    base = baseline_run(history, args.baseline)
+    started = time.time()
+    results = run_suite(args)
+    run = {
+        "id": time.strftime("%Y%m%dT%H%M%S", time.gmtime(started)),
+        "timestamp": int(started),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": {k: getattr(args, k) for k in ("families", "sizes", "groups", "only", "queries", "repeat",
+                                               "seed", "trace")},
+        "results": results,
+    }
+    regressions = []
+    if base is not None:
+        if (base.get("platform"), base.get("python")) != (run["platform"], run["python"]):
+            print(f"note: baseline {base['id']} ran on {base.get('platform')} / Python {base.get('python')}")
+        changes = compare(results, base, args.threshold)
+        regressions = changes["regressions"]
+        run["baseline"] = base["id"]
+        run["regressions"] = regressions
+        for label, rows in (("improvements", changes["improvements"]), ("REGRESSIONS", regressions)):
+            if rows:
+                print(f"\n{label} vs {base['id']} (threshold {args.threshold:.0%}):")
+                for c in rows:
+                    print(f"  {c['case']:48} {c['baseline_ms']:10.3f} -> {c['median_ms']:10.3f} ms  x{c['ratio']}")
+        if not regressions:
+            print(f"\nno regressions vs {base['id']}")
+    if not args.no_save:
+        history["runs"].append(run)
+        if args.set_baseline or history.get("baseline") is None:
+            history["baseline"] = run["id"]
+        save_history(args.history, history)
+        print(f"saved run {run['id']} to {args.history}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
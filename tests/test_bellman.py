@@ -0,0 +1,75 @@
+# backend/tests/test_bellman.py
+"""Bellman-Ford (both relaxation strategies) on random graphs with negative weights."""
+
+import math
+import random
+
+import pytest
+
+from app.bellman import NegativeCycle, bellman_ford_tree
+from app.graph import CompiledGraph, reconstruct
+
+from .conftest import path_cost, random_graph, reference_distances
+
+NEGATIVE_WEIGHTS = (-3.0, -1.0, 0.0, 1.0, 2.0, 4.0, 6.0)
+
+
+def _has_negative_cycle(graph, s, directed):
+    """Whether one more relaxation round after the reference run still improves something."""
+    dist = reference_distances(graph, s, directed)
+    for u, v, w in zip(graph.src.tolist(), graph.dst.tolist(), graph.weights.tolist()):
+        if dist[u] + w < dist[v] or (not directed and dist[v] + w < dist[u]):
+            return True
+    return False
+
+
+@pytest.mark.parametrize("method", ("spfa", "vectorized"))
+def test_bellman_ford_distances_and_cycles(method):
+    rng = random.Random(f"bellman-{method}")
+    cycles = 0
+    for _ in range(300):
+        graph = random_graph(rng, max_nodes=10, max_edges=16, weights=NEGATIVE_WEIGHTS)
+        directed = rng.random() < 0.8
+        s = rng.randrange(graph.n)
+        if _has_negative_cycle(graph, s, directed):
+            cycles += 1
+            with pytest.raises(NegativeCycle) as info:
+                bellman_ford_tree(graph, s, directed, method)
+            cycle = [int(v) for v in info.value.cycle]
+            assert cycle[0] == cycle[-1]
+            assert info.value.weight < 0
+            assert path_cost(graph, cycle, directed) == pytest.approx(info.value.weight)
+            continue
+        dist, prev, _ = bellman_ford_tree(graph, s, directed, method)
+        expected = reference_distances(graph, s, directed)
+        for t in range(graph.n):
+            if expected[t] == math.inf:
+                assert dist[t] == math.inf
+                continue
+            assert dist[t] == pytest.approx(expected[t])
+            path = reconstruct(prev, s, t)
+            assert path[0] == s and path[-1] == t
+            assert path_cost(graph, path, directed) == pytest.approx(expected[t])
+    assert cycles > 0
+
+
+@pytest.mark.parametrize("method", ("spfa", "vectorized"))
+def test_cycle_behind_zero_weight_arc(method):
+    # s -0-> a -(-2)-> b -1-> a: the cycle is only reachable through the zero-weight arc
+    graph = CompiledGraph(["s", "a", "b", "x"], [0, 1, 2, 3], [1, 2, 1, 0], [0.0, -2.0, 1.0, 5.0])
+    with pytest.raises(NegativeCycle) as info:
+        bellman_ford_tree(graph, 0, True, method)
+    assert set(info.value.cycle) == {"a", "b"} and info.value.weight == -1.0
+    # without the zero-weight arc x reaches s but not the cycle
+    graph = CompiledGraph(["s", "a", "b", "x"], [1, 2, 3], [2, 1, 0], [-2.0, 1.0, 5.0])
+    dist, _, _ = bellman_ford_tree(graph, 3, True, method)
+    assert dist == [5.0, math.inf, math.inf, 0.0]
+
+
+@pytest.mark.parametrize("method", ("spfa", "vectorized"))
+def test_negative_undirected_edge_is_a_cycle(method):
+    graph = CompiledGraph(["a", "b", "c"], [0, 1], [1, 2], [1.0, -1.0])
+    assert bellman_ford_tree(graph, 0, True, method)[0] == [0.0, 1.0, 0.0]
+    with pytest.raises(NegativeCycle) as info:
+        bellman_ford_tree(graph, 0, False, method)
+    assert info.value.weight == -2.0
@@ -0,0 +1,154 @@
+# backend/tests/test_connectivity.py
+"""Connectivity index, fresh and carried over across insertions, against BFS reachability."""
+
+import asyncio
+import random
+
+from app import connectivity as conn
+from app.algorithms import run_algorithm
+from app.connectivity import build_components, carry_over, connectivity
+from app.executor import INLINE_EDGES, ComputeExecutor
+from app.graph import CompiledGraph
+from app.models import Edge, Node, SessionDelta
+from app.sessions import GraphSession
+
+from .conftest import random_graph
+
+
+def _reachable(graph, s, directed):
+    out = {v: [] for v in range(graph.n)}
+    for u, v in zip(graph.src.tolist(), graph.dst.tolist()):
+        out[u].append(v)
+        if not directed:
+            out[v].append(u)
+    seen, stack = {s}, [s]
+    while stack:
+        for v in out[stack.pop()]:
+            if v not in seen:
+                seen.add(v)
+                stack.append(v)
+    return seen
+
+
+def _check(graph, comps, directed):
+    for s in range(graph.n):
+        seen = _reachable(graph, s, directed)
+        for t in range(graph.n):
+            answer = comps.reaches(s, t)
+            if comps.exact:
+                assert answer is (t in seen)
+            elif t in seen:
+                assert comps.may_reach(s, t)
+            if not directed or s in _reachable(graph, t, directed):
+                assert bool(comps.labels[s] == comps.labels[t]) is (t in seen)
+
+
+def test_components_match_bfs(monkeypatch):
+    rng = random.Random("components")
+    for trial in range(200):
+        # every other directed index goes without reachability bitsets
+        monkeypatch.setattr(conn, "MAX_REACH_COMPONENTS", 2048 if trial % 2 else 0)
+        graph = random_graph(rng, max_nodes=12, max_edges=14)
+        for directed in (False, True):
+            _check(graph, build_components(graph, directed), directed)
+
+
+def test_carry_over_matches_rebuild():
+    rng = random.Random("carry-over")
+    carried = {False: 0, True: 0}
+    for _ in range(200):
+        old = random_graph(rng, max_nodes=10, max_edges=10)
+        for directed in (False, True):
+            connectivity(old, directed)
+        extra = rng.randint(0, 3)
+        ids = list(old.ids) + [f"new{i}" for i in range(extra)]
+        added = [(rng.choice(ids), rng.choice(ids)) for _ in range(rng.randint(0, 4))]
+        edges = list(zip(old.labels(old.src.tolist()), old.labels(old.dst.tolist()))) + added
+        # the new graph numbers its nodes differently
+        order = ids[:]
+        rng.shuffle(order)
+        index = {nid: i for i, nid in enumerate(order)}
+        graph = CompiledGraph(order, [index[u] for u, _ in edges], [index[v] for _, v in edges],
+                              [1.0] * len(edges))
+        carry_over(old, graph, added)
+        for directed in (False, True):
+            comps = graph.peek(("connectivity", directed))
+            if comps is None:
+                assert directed
+                continue
+            carried[directed] += 1
+            _check(graph, comps, directed)
+    assert carried[False] == 200 and carried[True] > 0
+
+
+def _chain(edges, ids=("a", "b", "c", "d")):
+    index = {nid: i for i, nid in enumerate(ids)}
+    return CompiledGraph(list(ids), [index[u] for u, _ in edges], [index[v] for _, v in edges], [1.0] * len(edges))
+
+
+def test_directed_insertion_merging_sccs_is_not_carried():
+    old = _chain([("a", "b"), ("b", "c"), ("c", "d")])
+    assert connectivity(old, True).count == 4
+    connectivity(old, False)
+    # c -> a closes the cycle a -> b -> c -> a
+    graph = _chain([("a", "b"), ("b", "c"), ("c", "d"), ("c", "a")])
+    carry_over(old, graph, [("c", "a")])
+    assert graph.peek(("connectivity", True)) is None
+    assert graph.peek(("connectivity", False)) is not None
+    comps = connectivity(graph, True)
+    assert comps.count == 2
+    assert len({int(comps.labels[v]) for v in range(3)}) == 1
+    _check(graph, comps, True)
+
+
+def test_directed_insertion_along_existing_reachability_is_carried():
+    old = _chain([("a", "b"), ("b", "c")])
+    connectivity(old, True)
+    graph = _chain([("a", "b"), ("b", "c"), ("a", "c")])
+    carry_over(old, graph, [("a", "c")])
+    comps = graph.peek(("connectivity", True))
+    assert comps is not None and comps.count == 4
+    _check(graph, comps, True)
+
+
+def test_undirected_insertion_merges_components():
+    old = _chain([("a", "b"), ("c", "d")])
+    assert connectivity(old, False).count == 2
+    graph = _chain([("a", "b"), ("c", "d"), ("b", "c")])
+    carry_over(old, graph, [("b", "c")])
+    comps = graph.peek(("connectivity", False))
+    assert comps is not None and comps.count == 1
+    _check(graph, comps, False)
+
+
+def _worker_indexes(graph):
+    return [graph.peek(("connectivity", directed)) is not None for directed in (False, True)]
+
+
+def test_large_session_ships_carried_indexes_to_compute_workers(monkeypatch):
+    n = INLINE_EDGES + 10
+    nodes = [Node(id=str(i)) for i in range(n + 1)]
+    # a path over all but the last node; "n" stays isolated
+    edges = [Edge(id=f"e{i}", source=str(i), target=str(i + 1)) for i in range(n - 1)]
+    session = GraphSession("large", nodes, edges)
+    graph = session.graph()
+    assert graph.m >= INLINE_EDGES
+    assert [graph.peek(("connectivity", d)) is not None for d in (False, True)] == [True, True]
+
+    builds = []
+    monkeypatch.setattr(conn, "build_components", lambda *a: builds.append(a) or build_components(*a))
+    # a shortcut along the path and a new node: both indexes carry over
+    session.apply(SessionDelta(add_nodes=[Node(id="new")], add_edges=[Edge(id="x", source="0", target="5")]))
+    graph = session.graph()
+    assert builds == []
+    assert graph.peek(("connectivity", False)).count == 3
+
+    executor = ComputeExecutor(workers=1, queue_depth=2)
+    try:
+        shipped = asyncio.run(executor.run(None, _worker_indexes, graph, size=graph.m))
+        out = asyncio.run(executor.run(None, run_algorithm, None, None, "dijkstra", str(n), "0",
+                                       {"directed": True}, graph, size=graph.m))
+    finally:
+        executor.shutdown()
+    assert shipped == [True, True]
+    assert out["path"] == [] and out["metrics"]["counters"].get("unreachable") == 1
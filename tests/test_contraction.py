@@ -0,0 +1,47 @@
+# backend/tests/test_contraction.py
+"""Contraction-hierarchy queries against reference distances."""
+
+import math
+import random
+
+import pytest
+
+from app.contraction import build_hierarchy
+from app.graph import CompiledGraph
+
+from .conftest import path_cost, random_graph, reference_distances
+
+
+def test_queries_match_reference():
+    rng = random.Random("ch")
+    for _ in range(100):
+        graph = random_graph(rng, max_nodes=12, max_edges=30)
+        directed = rng.random() < 0.5
+        ch = build_hierarchy(graph, directed)
+        for s in range(graph.n):
+            dist = reference_distances(graph, s, directed)
+            for t in range(graph.n):
+                path, distance, _ = ch.query(s, t)
+                if dist[t] == math.inf:
+                    assert path == [] and distance is None
+                    continue
+                assert distance == pytest.approx(dist[t])
+                assert path[0] == s and path[-1] == t
+                assert path_cost(graph, path, directed) == pytest.approx(dist[t])
+
+
+def test_zero_weight_ties_and_parallel_shortcuts():
+    # a zero-weight cycle, equal-cost routes and a parallel arc cheaper than its twin
+    graph = CompiledGraph([str(i) for i in range(5)], [0, 1, 2, 0, 0, 3, 3], [1, 2, 0, 3, 3, 4, 2],
+                          [0.0, 0.0, 0.0, 4.0, 1.0, 1.0, 1.0])
+    for directed in (False, True):
+        ch = build_hierarchy(graph, directed)
+        for s in range(graph.n):
+            dist = reference_distances(graph, s, directed)
+            for t in range(graph.n):
+                path, distance, _ = ch.query(s, t)
+                if dist[t] == math.inf:
+                    assert distance is None
+                else:
+                    assert distance == pytest.approx(dist[t])
+                    assert path_cost(graph, path, directed) == pytest.approx(dist[t])
@@ -0,0 +1,87 @@
+# backend/tests/test_dynamic.py
+"""Incrementally repaired shortest-path trees of a session against a fresh search after every delta."""
+
+import math
+import random
+
+import pytest
+
+from app.models import Edge, EdgeWeight, Node, SessionDelta
+from app.sessions import GraphSession
+
+from .conftest import reference_distances
+
+
+def _random_delta(rng, session, sources, serial):
+    nodes = sorted(session.nodes)
+    edges = sorted(session.edges)
+    removable = [nid for nid in nodes if nid not in sources]
+    remove_nodes = rng.sample(removable, min(len(removable), rng.choice((0, 0, 0, 1))))
+    live = [nid for nid in nodes if nid not in remove_nodes]
+    gone = set(remove_nodes)
+    remove_edges = [eid for eid in rng.sample(edges, min(len(edges), rng.randint(0, 2)))
+                    if not gone & {session.edges[eid].source, session.edges[eid].target}]
+    add_nodes = [Node(id=f"n{serial}-{i}") for i in range(rng.choice((0, 0, 1, 2)))]
+    live += [n.id for n in add_nodes]
+    add_edges = [Edge(source=rng.choice(live), target=rng.choice(live), weight=float(rng.randint(0, 6)))
+                 for _ in range(rng.randint(0, 3))]
+    untouched = [eid for eid in edges if eid not in remove_edges
+                 and not gone & {session.edges[eid].source, session.edges[eid].target}]
+    reweight = [EdgeWeight(id=eid, weight=float(rng.randint(0, 6)))
+                for eid in rng.sample(untouched, min(len(untouched), rng.randint(0, 3)))]
+    return SessionDelta(add_nodes=add_nodes, remove_nodes=remove_nodes, add_edges=add_edges,
+                        remove_edges=remove_edges, reweight_edges=reweight)
+
+
+@pytest.mark.parametrize("directed", (False, True))
+def test_repaired_trees_match_fresh_search(directed):
+    rng = random.Random(f"dynamic-{directed}")
+    for trial in range(40):
+        n = rng.randint(2, 8)
+        nodes = [Node(id=str(i)) for i in range(n)]
+        edges = [Edge(source=str(rng.randrange(n)), target=str(rng.randrange(n)), weight=float(rng.randint(0, 6)))
+                 for _ in range(rng.randint(0, 12))]
+        session = GraphSession(f"s{trial}", nodes, edges)
+        sources = rng.sample([nd.id for nd in nodes], rng.randint(1, min(3, n)))
+        routing = session.track(sources, directed)
+        for step in range(15):
+            before = {s: dict(routing.trees[s].dist) for s in sources}
+            out = session.apply(_random_delta(rng, session, sources, step))
+            graph = session.graph()
+            for s in sources:
+                tree = routing.trees[s]
+                dist = reference_distances(graph, graph.index[s], directed)
+                changed = {r["target"] for r in out["changed_routes"][s]}
+                for nid, v in graph.index.items():
+                    assert tree.dist[nid] == pytest.approx(dist[v])
+                    if tree.dist[nid] != before[s].get(nid, math.inf):
+                        assert nid in changed
+                    if dist[v] != math.inf:
+                        path = tree.path(nid)
+                        assert path[0] == s and path[-1] == nid
+                        hops = sum(min(e.weight for e in session.edges.values()
+                                       if (e.source, e.target) == (u, w)
+                                       or (not directed and (e.source, e.target) == (w, u)))
+                                   for u, w in zip(path, path[1:]))
+                        assert hops == pytest.approx(dist[v])
+                assert set(tree.dist) == set(graph.index)
+
+
+def test_parallel_edges_and_zero_weight_cycle():
+    nodes = [Node(id=nid) for nid in "sabc"]
+    edges = [Edge(id="p1", source="s", target="a", weight=1.0), Edge(id="p2", source="s", target="a", weight=4.0),
+             Edge(id="z1", source="a", target="b", weight=0.0), Edge(id="z2", source="b", target="c", weight=0.0),
+             Edge(id="z3", source="c", target="a", weight=0.0)]
+    session = GraphSession("parallel", nodes, edges)
+    tree = session.track(["s"], directed=True).trees["s"]
+    assert [tree.dist[n] for n in "abc"] == [1.0, 1.0, 1.0]
+    # losing the cheap twin moves the whole zero-weight cycle onto the other one
+    out = session.apply(SessionDelta(remove_edges=["p1"]))
+    assert [tree.dist[n] for n in "abc"] == [4.0, 4.0, 4.0]
+    assert {r["target"] for r in out["changed_routes"]["s"]} == set("abc")
+    # raising a cycle arc only re-routes what hangs below it
+    session.apply(SessionDelta(reweight_edges=[EdgeWeight(id="z2", weight=2.0)]))
+    assert [tree.dist[n] for n in "abc"] == [4.0, 4.0, 6.0]
+    session.apply(SessionDelta(add_edges=[Edge(id="p1", source="s", target="a", weight=1.0)]))
+    assert [tree.dist[n] for n in "abc"] == [1.0, 1.0, 3.0]
+    assert tree.path("c") == ["s", "a", "b", "c"]
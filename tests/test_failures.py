@@ -0,0 +1,86 @@
+# backend/tests/test_failures.py
+"""Single-failure sweep against re-running Dijkstra on every damaged graph."""
+
+import math
+import random
+
+import pytest
+
+from app.failures import STRETCH_RTOL, failure_sweep, sweep_sources
+from app.graph import CompiledGraph
+
+from .conftest import random_graph, reference_distances
+
+# per element: disconnected, degraded, stretch sum, stretch max, added distance
+_EMPTY = [0, 0, 0.0, 0.0, 0.0]
+
+
+def _impact(graph, directed, base, keep, dead=None):
+    damaged = CompiledGraph(graph.ids, graph.src[keep], graph.dst[keep], graph.weights[keep])
+    row = list(_EMPTY)
+    for s in range(graph.n):
+        if s == dead:
+            continue
+        dist = reference_distances(damaged, s, directed)
+        for t in range(graph.n):
+            old = base[s][t]
+            if t in (s, dead) or old == math.inf:
+                continue
+            if dist[t] == math.inf:
+                row[0] += 1
+            elif dist[t] > old + STRETCH_RTOL * max(1.0, abs(old)):
+                row[1] += 1
+                row[4] += dist[t] - old
+                if old > 0:
+                    row[2] += dist[t] / old
+                    row[3] = max(row[3], dist[t] / old)
+    return row
+
+
+def test_sweep_matches_brute_force():
+    rng = random.Random("failures")
+    for _ in range(150):
+        graph = random_graph(rng, max_edges=18)
+        directed = rng.random() < 0.5
+        got = sweep_sources(graph, range(graph.n), None, "both", directed)
+        base = [reference_distances(graph, s, directed) for s in range(graph.n)]
+        edges = list(range(graph.m))
+        for e in edges:
+            expected = _impact(graph, directed, base, [i for i in edges if i != e])
+            row = got.get(("edge", e), [0] + _EMPTY)[1:]
+            assert row[:2] == expected[:2]
+            assert row[2:] == pytest.approx(expected[2:])
+        for x in range(graph.n):
+            keep = [i for i in edges if x not in (int(graph.src[i]), int(graph.dst[i]))]
+            expected = _impact(graph, directed, base, keep, dead=x)
+            row = got.get(("node", x), [0] + _EMPTY)[1:]
+            assert row[:2] == expected[:2]
+            assert row[2:] == pytest.approx(expected[2:])
+
+
+def test_unused_parallel_edge_carries_no_route():
+    graph = CompiledGraph(["a", "b"], [0, 0], [1, 1], [1.0, 5.0])
+    out = failure_sweep(graph, elements="edges", top=None)
+    assert [e["index"] for e in out["edges"]] == [0]
+    assert out["edges"][0]["degraded"] == 2
+    assert out["edges"][0]["max_stretch"] == 5.0
+
+
+@pytest.mark.parametrize("directed", (False, True))
+def test_failure_on_equal_parallel_arc_is_harmless(directed):
+    graph = CompiledGraph(["a", "b", "c"], [0, 0, 1], [1, 1, 2], [1.0, 1.0, 2.0])
+    edges = {e["index"]: e for e in failure_sweep(graph, elements="edges", directed=directed, top=None)["edges"]}
+    routes = 2 if directed else 4
+    for twin in (0, 1):
+        assert edges[twin]["routes"] == routes
+        assert edges[twin]["disconnected"] == edges[twin]["degraded"] == 0
+    assert edges[2]["disconnected"] == routes
+
+
+def test_failure_on_one_direction_of_antiparallel_arcs():
+    graph = CompiledGraph(["a", "b"], [0, 1], [1, 0], [1.0, 3.0])
+    directed = {e["index"]: e for e in failure_sweep(graph, elements="edges", directed=True, top=None)["edges"]}
+    assert directed[0]["disconnected"] == directed[1]["disconnected"] == 1
+    # undirected, both edges join a and b and only the cheaper one is used
+    undirected = failure_sweep(graph, elements="edges", top=None)["edges"]
+    assert [(e["index"], e["degraded"], e["max_stretch"]) for e in undirected] == [(0, 2, 3.0)]
@@ -0,0 +1,91 @@
+# backend/tests/test_kpaths.py
+"""Yen's k shortest loopless paths and the ECMP DAG against exhaustive path enumeration."""
+
+import math
+import random
+
+from app.graph import CompiledGraph
+from app.kpaths import ecmp_dag, k_shortest_paths
+
+from .conftest import random_graph
+
+
+def _all_simple_paths(graph, s, t, directed):
+    """Every loopless ``s -> t`` node sequence with its cheapest cost, sorted by cost."""
+    offsets, targets, weights = graph.csr(directed).lists()
+    costs = {}
+
+    def dfs(u, path, cost):
+        if u == t:
+            key = tuple(path)
+            costs[key] = min(costs.get(key, math.inf), cost)
+            return
+        for j in range(offsets[u], offsets[u+1]):
+            v = targets[j]
+            if v not in path:
+                path.append(v)
+                dfs(v, path, cost + weights[j])
+                path.pop()
+
+    dfs(s, [s], 0.0)
+    return sorted((c, p) for p, c in costs.items())
+
+
+def test_k_shortest_paths():
+    rng = random.Random("yen")
+    for _ in range(300):
+        graph = random_graph(rng)
+        directed = rng.random() < 0.5
+        s, t = rng.randrange(graph.n), rng.randrange(graph.n)
+        k = rng.randint(1, 12)
+        paths, _ = k_shortest_paths(graph, s, t, k, directed)
+        expected = _all_simple_paths(graph, s, t, directed)
+        assert [cost for _, cost in paths] == [c for c, _ in expected[:k]]
+        assert len({tuple(p) for p, _ in paths}) == len(paths)
+        costs = {p: c for c, p in expected}
+        for path, cost in paths:
+            assert costs.get(tuple(path)) == cost
+
+
+def test_ecmp_dag():
+    rng = random.Random("ecmp")
+    for _ in range(300):
+        graph = random_graph(rng)
+        directed = rng.random() < 0.5
+        s, t = rng.randrange(graph.n), rng.randrange(graph.n)
+        dag = ecmp_dag(graph, s, t, directed, limit=1000)
+        expected = _all_simple_paths(graph, s, t, directed)
+        if not expected:
+            assert dag["distance"] is None
+            continue
+        best = expected[0][0]
+        assert dag["distance"] == best
+        assert sorted(tuple(p) for p in dag["paths"]) == sorted(p for c, p in expected if c == best)
+        if dag["path_count"] is not None and 0 not in graph.weights:
+            assert dag["path_count"] == sum(1 for c, _ in expected if c == best)
+
+
+def test_yen_with_equal_cost_ties():
+    # three cost-2 routes through a, b and c (a twice, as parallel edges), then s-c-b-t at 3
+    ids = ["s", "a", "b", "c", "t"]
+    src = [0, 0, 1, 0, 2, 0, 3, 3]
+    dst = [1, 1, 4, 2, 4, 3, 4, 2]
+    graph = CompiledGraph(ids, src, dst, [1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0])
+    for k in (1, 2, 3, 4):
+        paths, _ = k_shortest_paths(graph, 0, 4, k, directed=True)
+        assert len(paths) == min(k, 4)
+        assert len({tuple(p) for p, _ in paths}) == len(paths)
+        assert [c for _, c in paths] == [2.0, 2.0, 2.0, 3.0][:k]
+    paths, _ = k_shortest_paths(graph, 0, 4, 10, directed=True)
+    assert {tuple(graph.labels(p)) for p, c in paths if c == 2.0} == {("s", "a", "t"), ("s", "b", "t"), ("s", "c", "t")}
+    assert [graph.labels(p) for p, c in paths if c > 2.0] == [["s", "c", "b", "t"]]
+    dag = ecmp_dag(graph, 0, 4, directed=True)
+    assert dag["distance"] == 2.0 and dag["path_count"] == 3
+
+
+def test_yen_with_zero_weight_ties():
+    # a zero-weight detour makes s-a-t and s-b-a-t cost the same
+    graph = CompiledGraph(["s", "a", "b", "t"], [0, 1, 0, 2], [1, 3, 2, 1], [1.0, 1.0, 1.0, 0.0])
+    paths, _ = k_shortest_paths(graph, 0, 3, 5, directed=True)
+    assert sorted(graph.labels(p) for p, _ in paths) == [["s", "a", "t"], ["s", "b", "a", "t"]]
+    assert [c for _, c in paths] == [2.0, 2.0]
@@ -0,0 +1,58 @@
+# backend/tests/test_searches.py
+"""Point-to-point searches (plain, bidirectional, ALT, CH) against reference distances."""
+
+import math
+import random
+
+import pytest
+
+from app.algorithms import run_algorithm
+from app.graph import CompiledGraph
+
+from .conftest import WEIGHTS, path_cost, random_graph, reference_distances
+
+ALGORITHMS = ("dijkstra", "bidirectional", "alt", "a*", "bellman-ford")
+
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_search_distances(algorithm):
+    rng = random.Random(f"search-{algorithm}")
+    for _ in range(150):
+        # the Euclidean heuristic is only admissible when no edge is shorter than its span
+        graph = random_graph(rng, weights=(2.0, 3.0, 5.0) if algorithm == "a*" else WEIGHTS)
+        directed = rng.random() < 0.5
+        s, t = rng.randrange(graph.n), rng.randrange(graph.n)
+        expected = reference_distances(graph, s, directed)[t]
+        out = run_algorithm(None, None, algorithm, str(s), str(t), {"directed": directed}, graph)
+        distance = out["metrics"]["distance"]
+        if expected == math.inf:
+            assert out["path"] == [] and distance is None
+            continue
+        assert distance == pytest.approx(expected)
+        path = [int(v) for v in out["path"]]
+        assert path[0] == s and path[-1] == t
+        assert path_cost(graph, path, directed) == pytest.approx(expected)
+
+
+
+def _meeting_trap():
+    """The first node both frontiers settle (m, 2 + 2) is not on the shortest path s-a-b-t (3.5)."""
+    ids = ["s", "m", "t", "a", "b"]
+    src, dst, w = [0, 1, 0, 3, 4], [1, 2, 3, 4, 2], [2.0, 2.0, 1.0, 1.5, 1.0]
+    return CompiledGraph(ids, src, dst, w, x=[0.0, 1.0, 2.0, 0.5, 1.5], y=[0.0, 1.0, 0.0, 0.0, 0.0])
+
+
+@pytest.mark.parametrize("algorithm", ("bidirectional", "alt"))
+@pytest.mark.parametrize("directed", (False, True))
+def test_search_does_not_stop_at_first_meeting(algorithm, directed):
+    out = run_algorithm(None, None, algorithm, "s", "t", {"directed": directed}, _meeting_trap())
+    assert out["path"] == ["s", "a", "b", "t"]
+    assert out["metrics"]["distance"] == pytest.approx(3.5)
+
+
+@pytest.mark.parametrize("algorithm", ("bidirectional", "alt"))
+def test_search_respects_direction(algorithm):
+    # reachable one way only; the reverse search must not borrow the forward arc
+    graph = CompiledGraph(["a", "b"], [0], [1], [1.0], x=[0.0, 1.0], y=[0.0, 0.0])
+    assert run_algorithm(None, None, algorithm, "b", "a", {"directed": True}, graph)["path"] == []
+    assert run_algorithm(None, None, algorithm, "b", "a", {"directed": False}, graph)["path"] == ["b", "a"]